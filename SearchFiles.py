@@ -20,21 +20,34 @@ To do:
 """
 
 import argparse
+import re
 import sys
 import logging
+from datetime import datetime
 from pathlib import Path
 
 from PyQt5 import QtGui, QtCore, QtWidgets
+import pyperclip
 
 from modules.sf_search_progress import SearchProgress
 from modules.sf_settings import Settings
 from modules.sf_report_columns import SelectReportFields
-from modules.sf_utilities import app_icon, app_dir
-from modules.sf_file_selection import FileSelection
-
-logging.basicConfig(stream=open(r'.\log.txt', 'w', encoding='utf-8'),
-                    level=logging.DEBUG,
-                    format='[%(filename)s %(lineno)03d] %(message)s')
+from modules.sf_utilities import app_icon, app_dir, format_size
+from modules.sf_file_selection import FileSelection, WatchedSelection
+from modules.sf_search import root_directories
+from modules.sf_content_search import ContentFilter
+from modules.sf_query import Query, QueryError
+from modules.sf_fuzzy import FuzzyMatcher
+from modules.sf_snapshot import is_snapshot_file, save_snapshot, load_snapshot
+from modules.sf_mapped_result import is_mapped_result_file, save_mapped_result, open_mapped_result
+from modules.sf_result_model import MappedResultModel
+from modules.sf_duplicates import HashCache
+from modules.sf_diff import ResultDiff, report_lines as diff_report_lines
+from modules.sf_watch import IncrementalSearch
+import modules.sf_constants as const
+from modules.sf_search_service import SearchService
+from modules.sf_logging import setup_logging, set_log_level, timed_span
+from modules.sf_profile import start_profiling, stop_profiling
 
 # These items sit in a list in the main thread
 class FileItem(QtGui.QStandardItem):
@@ -45,10 +58,21 @@ class FileItem(QtGui.QStandardItem):
         super().__init__(app_icon("icon_file.ico"), selected_file.entry.name)
 
 
+class SizeItem(QtGui.QStandardItem):
+    """Item to be displayed in the numeric columns of the model view"""
+
+    def __init__(self, text):
+        """Right aligned item that cannot be edited"""
+        super().__init__(text)
+        self.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        self.setEditable(False)
+
+
 class Window(QtWidgets.QMainWindow):
     """Main window"""
 
-    def __init__(self, parent=None, filename_settings = "settings.json"):
+    def __init__(self, parent=None, filename_settings = "settings.json", log_level=None):
+        """log_level overrides the level of the log file in the settings"""
         super().__init__(parent)
 
         self.root_directory = Path().home()
@@ -62,10 +86,14 @@ class Window(QtWidgets.QMainWindow):
 
         # Specify settings file and load settings 
         self.settings = Settings(filename_settings)
+        set_log_level(log_level or self.settings.log_level)
 
         # Object containing selected files
         self.file_selection = FileSelection()
 
+        # Worker thread that is reused for each search
+        self.search_service = SearchService(self)
+
         # Create a vertical layout with status
         main_layout = QtWidgets.QVBoxLayout()
 
@@ -83,6 +111,13 @@ class Window(QtWidgets.QMainWindow):
         root_dir_btn.clicked.connect(self.select_root_file)
         root_dir_layout.addWidget(root_dir_btn, stretch=0)
 
+        # Button to add another directory to the search
+        root_dir_add_btn = QtWidgets.QPushButton(app_icon('icon_folder_add.svg'), '', self)
+        root_dir_add_btn.setIconSize(QtCore.QSize(24,24))
+        root_dir_add_btn.setToolTip(f"Add another directory, directories are separated by '{const.ROOT_SEPARATOR}'")
+        root_dir_add_btn.clicked.connect(self.add_root_file)
+        root_dir_layout.addWidget(root_dir_add_btn, stretch=0)
+
         # Combo box with path
         self.root_dir_combo = QtWidgets.QComboBox(self)
         self.root_dir_combo.setFont(font)
@@ -127,6 +162,70 @@ class Window(QtWidgets.QMainWindow):
         self.check_case.setChecked(self.settings.filename_case_sensitive)
         filter_layout.addWidget(self.check_case, 0, 4)
 
+        content_lbl = QtWidgets.QLabel('File contains')
+        filter_layout.addWidget(content_lbl, 1, 2)
+
+        self.le_file_contains = QtWidgets.QComboBox(self)
+        self.le_file_contains.setFont(font)
+        self.le_file_contains.setEditable(True)
+        self.le_file_contains.addItems(self.settings.recent_content_filters)
+        self.le_file_contains.setCurrentText(self.settings.filter_content)
+        self.le_file_contains.currentTextChanged.connect(self.file_contains_changed)
+        filter_layout.addWidget(self.le_file_contains, 1, 3)
+
+        self.check_regex = QtWidgets.QCheckBox("Regular expression", self)
+        self.check_regex.setChecked(self.settings.content_regular_expression)
+        filter_layout.addWidget(self.check_regex, 1, 4)
+
+        self.check_duplicates = QtWidgets.QCheckBox("Only files with duplicates", self)
+        self.check_duplicates.setChecked(self.settings.find_duplicates)
+        filter_layout.addWidget(self.check_duplicates, 1, 0, 1, 2)
+
+        query_lbl = QtWidgets.QLabel('Query')
+        filter_layout.addWidget(query_lbl, 2, 0)
+
+        self.le_query = QtWidgets.QComboBox(self)
+        self.le_query.setFont(font)
+        self.le_query.setEditable(True)
+        self.le_query.addItems(self.settings.recent_queries)
+        self.le_query.setCurrentText(self.settings.filter_query)
+        self.le_query.setToolTip('For example: ext:jpg,png size>5MB modified<2023-01-01 '
+                                 'name~"IMG_\\d+" -path:backup')
+        self.le_query.currentTextChanged.connect(self.query_changed)
+        filter_layout.addWidget(self.le_query, 2, 1, 1, 4)
+
+        top_lbl = QtWidgets.QLabel('Show')
+        filter_layout.addWidget(top_lbl, 3, 0)
+
+        # Only keep the largest, newest or oldest files instead of all files
+        self.top_mode_combo = QtWidgets.QComboBox(self)
+        for mode, text in [(const.TOP_ALL, 'All files'), (const.TOP_LARGEST, 'Largest files'),
+                           (const.TOP_NEWEST, 'Newest files'), (const.TOP_OLDEST, 'Oldest files')]:
+            self.top_mode_combo.addItem(text, mode)
+        self.top_mode_combo.setCurrentIndex(max(self.top_mode_combo.findData(self.settings.top_mode), 0))
+        filter_layout.addWidget(self.top_mode_combo, 3, 1)
+
+        self.top_count_spin = QtWidgets.QSpinBox(self)
+        self.top_count_spin.setRange(1, 1000000)
+        self.top_count_spin.setValue(self.settings.top_count)
+        self.top_count_spin.setToolTip('Number of files that is shown')
+        filter_layout.addWidget(self.top_count_spin, 3, 2)
+
+        # Stop the search after a number of files, 0 searches everything
+        self.match_limit_spin = QtWidgets.QSpinBox(self)
+        self.match_limit_spin.setRange(0, 1000000)
+        self.match_limit_spin.setPrefix('Stop after ')
+        self.match_limit_spin.setSuffix(' files')
+        self.match_limit_spin.setSpecialValueText('Find all files')
+        self.match_limit_spin.setValue(self.settings.match_limit)
+        filter_layout.addWidget(self.match_limit_spin, 3, 3)
+
+        self.check_breadth_first = QtWidgets.QCheckBox("Breadth first", self)
+        self.check_breadth_first.setToolTip("Search all directories at one level before the next level, "
+                                            "so files close to the start directory are found first")
+        self.check_breadth_first.setChecked(self.settings.breadth_first)
+        filter_layout.addWidget(self.check_breadth_first, 3, 4)
+
         for col, stch in [(0,0), (1,1), (2,0), (3,3), (4,0)]:
             filter_layout.setColumnStretch(col, stch)
         filter_box.setLayout(filter_layout)
@@ -145,7 +244,59 @@ class Window(QtWidgets.QMainWindow):
         self.report_btn.setEnabled(False)
         self.execute_lyt.addWidget(self.report_btn)
 
+        self.directory_report_btn = QtWidgets.QPushButton(app_icon('icon_report.ico'),
+                                                'Copy directory sizes to clipboard')
+        self.directory_report_btn.clicked.connect(self.copy_directory_report_to_clipboard)
+        self.directory_report_btn.setEnabled(False)
+        self.execute_lyt.addWidget(self.directory_report_btn)
+
+        self.save_snapshot_btn = QtWidgets.QPushButton(app_icon('icon_destination.svg'), 'Save result')
+        self.save_snapshot_btn.clicked.connect(self.save_snapshot)
+        self.save_snapshot_btn.setEnabled(False)
+        self.execute_lyt.addWidget(self.save_snapshot_btn)
+
+        open_snapshot_btn = QtWidgets.QPushButton(app_icon('icon_folder.ico'), 'Open result')
+        open_snapshot_btn.clicked.connect(self.select_snapshot)
+        self.execute_lyt.addWidget(open_snapshot_btn)
+
+        compare_btn = QtWidgets.QPushButton(app_icon('icon_copied.svg'), 'Compare results')
+        compare_btn.clicked.connect(self.compare_snapshots)
+        self.execute_lyt.addWidget(compare_btn)
+
+        # Search again at a fixed interval and only show the changes
+        self.watch_btn = QtWidgets.QPushButton(app_icon('icon_search_folder2.ico'), 'Watch')
+        self.watch_btn.setCheckable(True)
+        self.watch_btn.setToolTip('Search again at a fixed interval and show the files that were added, '
+                                  'removed or modified. With a "File contains" filter or a query on the contents, '
+                                  'the matching files are read again in each search')
+        self.watch_btn.toggled.connect(self.watch_toggled)
+        self.execute_lyt.addWidget(self.watch_btn)
+
+        self.watch_interval_spin = QtWidgets.QSpinBox(self)
+        self.watch_interval_spin.setRange(1, 24*60*60)
+        self.watch_interval_spin.setPrefix('every ')
+        self.watch_interval_spin.setSuffix(' s')
+        self.watch_interval_spin.setValue(self.settings.watch_interval)
+        self.execute_lyt.addWidget(self.watch_interval_spin)
+
+        self.watcher = None
+        self.watch_item = None
+        self.watch_timer = QtCore.QTimer(self)
+        self.watch_timer.timeout.connect(self.check_watched_search)
+
         self.execute_lyt.addStretch()
+
+        # Find names in the result that look like a text, without searching the disk again
+        self.le_similar = QtWidgets.QLineEdit(self)
+        self.le_similar.setPlaceholderText('Find similar names in the result')
+        self.le_similar.setClearButtonEnabled(True)
+        self.le_similar.returnPressed.connect(self.find_similar_names)
+        self.execute_lyt.addWidget(self.le_similar)
+
+        similar_btn = QtWidgets.QPushButton(app_icon('icon_search_folder2.ico'), 'Find')
+        similar_btn.clicked.connect(self.find_similar_names)
+        self.execute_lyt.addWidget(similar_btn)
+
         self.execute_grp.setLayout(self.execute_lyt)
         main_layout.addWidget(self.execute_grp)
 
@@ -160,6 +311,9 @@ class Window(QtWidgets.QMainWindow):
         self.tree_view.setModel(self.model)
         main_layout.addWidget(self.tree_view)
 
+        self.mapped_result = None # Mapped search result shown instead of the selected files
+        self.spilled_result = None # Temporary files of the mapped result of a search that did not fit in memory
+        self.file_changes = None  # Differences between two search results shown instead of the selected files
         self.file_items = {}      # Items in the treeview that display filename
         self.comment_items = {}   # Items in the treeview that display status of the file
         self.clear_treeview()
@@ -169,6 +323,13 @@ class Window(QtWidgets.QMainWindow):
         widget.setLayout(main_layout)
         self.setCentralWidget(widget)
 
+    def closeEvent(self, event):
+        """Stop the search thread when the window is closed"""
+        self.stop_watching()
+        self.search_service.shutdown()
+        self.clear_treeview()
+        super().closeEvent(event)
+
     def select_root_file(self):
         """Event triggered when root file is selected"""
         initial_directory = self.root_dir_combo.currentText()
@@ -177,6 +338,20 @@ class Window(QtWidgets.QMainWindow):
         self.root_dir_combo.addItem(self.settings.root_directory)
         self.root_dir_combo.setCurrentIndex (self.root_dir_combo.count()-1)
 
+    def add_root_file(self):
+        """Event triggered when another root directory is added to the search"""
+        search_directories = root_directories(self.root_dir_combo.currentText())
+        initial_directory = str(search_directories[-1]) if search_directories else ''
+        directory = QtWidgets.QFileDialog.getExistingDirectory(self,
+            'Add directory to the search', initial_directory )
+        if not directory:
+            return
+
+        self.settings.root_directory = const.ROOT_SEPARATOR.join(
+            [ str(search_directory) for search_directory in search_directories ] + [ directory ] )
+        self.root_dir_combo.addItem(self.settings.root_directory)
+        self.root_dir_combo.setCurrentIndex (self.root_dir_combo.count()-1)
+
     def root_directory_index_changed(self):
         """Event triggered when index of root file is changed"""
         self.settings.root_directory = self.root_dir_combo.currentText()
@@ -195,24 +370,93 @@ class Window(QtWidgets.QMainWindow):
         """Event triggered when filename contains field is changed"""
         self.settings.filter_filename = new_text
 
+    def file_contains_changed(self, new_text):
+        """Event triggered when file contains field is changed"""
+        self.settings.filter_content = new_text
+
+    def query_changed(self, new_text):
+        """Event triggered when the query is changed"""
+        self.settings.filter_query = new_text
+
+    def query(self):
+        """Returns the compiled query, or None if no query is entered"""
+        if not self.settings.filter_query.strip():
+            return None
+
+        try:
+            return Query(self.settings.filter_query, self.settings.filename_case_sensitive)
+        except QueryError as error:
+            QtWidgets.QMessageBox.warning(self, "Search for files", f"Invalid query: {error}")
+            return False
+
+    def content_filter(self):
+        """Returns the filter on file contents, or None if the contents are not searched"""
+        if not self.settings.filter_content:
+            return None
+
+        try:
+            return ContentFilter(self.settings.filter_content,
+                                 self.settings.content_regular_expression,
+                                 self.settings.filename_case_sensitive)
+        except re.error as error:
+            QtWidgets.QMessageBox.warning(self, "Search for files",
+                                          f"Invalid regular expression: {error}")
+            return False
+
     def search_files(self):
         """Search files and directories"""
 
-        if not Path(self.settings.root_directory).is_dir():
+        # Saved results in the list of recent directories are opened instead of searched
+        if is_snapshot_file(self.settings.root_directory) or \
+           is_mapped_result_file(self.settings.root_directory):
+            self.open_snapshot(self.settings.root_directory)
+            return
+
+        search_directories = root_directories(self.settings.root_directory)
+        if not search_directories or not all(directory.is_dir() for directory in search_directories):
             logging.info('%s not found', self.settings.root_directory)
             return
 
-        self.settings.filename_case_sensitive = self.check_case.isChecked()
-        self.settings.save()
+        self.update_search_settings()
+
+        content_filter = self.content_filter()
+        if content_filter is False:
+            return
+
+        query = self.query()
+        if query is False:
+            return
 
         self.file_selection.select_files(self.settings.root_directory,
                                          self.settings.filter_extension,
                                          self.settings.filter_filename,
-                                         self.settings.filename_case_sensitive)
-
-        dlg = SearchProgress(self, self.file_selection)
+                                         self.settings.filename_case_sensitive,
+                                         self.settings.scan_entry_counts.get(self.settings.root_directory),
+                                         content_filter,
+                                         self.settings.find_duplicates,
+                                         self.settings.scan_concurrency,
+                                         query,
+                                         self.settings.top_mode,
+                                         self.settings.top_count,
+                                         self.settings.match_limit,
+                                         self.settings.breadth_first,
+                                         self.settings.memory_budget)
+
+        dlg = SearchProgress(self, self.file_selection, self.search_service)
         if dlg.exec()==QtWidgets.QDialog.Accepted:
             self.file_selection.selected_files = list(dlg.result())
+            self.file_selection.directory_totals = dlg.directory_totals()
+            self.file_selection.duplicate_groups = dlg.duplicate_groups()
+
+            # Remember the number of entries to estimate the duration of the next search
+            if not dlg.limit_reached():
+                self.settings.scan_entry_counts[self.settings.root_directory] = dlg.statistics().entries
+                self.settings.save()
+
+            # Files that did not fit in memory are shown from disk
+            if dlg.spilled_result() is not None:
+                self.show_spilled_result(dlg.spilled_result())
+                return
         else:
             self.file_selection.new_search()
 
@@ -220,13 +464,245 @@ class Window(QtWidgets.QMainWindow):
 
         logging.info("End of search_files function")
 
+    def update_search_settings(self):
+        """Store the search options that are not saved when they are changed"""
+        self.settings.filename_case_sensitive = self.check_case.isChecked()
+        self.settings.content_regular_expression = self.check_regex.isChecked()
+        self.settings.find_duplicates = self.check_duplicates.isChecked()
+        self.settings.top_mode = self.top_mode_combo.currentData()
+        self.settings.top_count = self.top_count_spin.value()
+        self.settings.match_limit = self.match_limit_spin.value()
+        self.settings.breadth_first = self.check_breadth_first.isChecked()
+        self.settings.watch_interval = self.watch_interval_spin.value()
+        self.settings.save()
+
+    def watch_toggled(self, checked):
+        """Start or stop watching the search"""
+        if checked:
+            if not self.start_watching():
+                self.watch_btn.setChecked(False)
+        else:
+            self.stop_watching()
+
+    def start_watching(self):
+        """Search the directories again at a fixed interval, the first search only remembers the files
+        Returns False if the search cannot be watched"""
+        search_directories = root_directories(self.settings.root_directory)
+        if not search_directories or not all(directory.is_dir() for directory in search_directories):
+            logging.info('%s cannot be watched', self.settings.root_directory)
+            return False
+
+        self.update_search_settings()
+        content_filter = self.content_filter()
+        query = self.query()
+        if content_filter is False or query is False:
+            return False
+
+        file_search = IncrementalSearch()
+        file_search.select_files(self.settings.root_directory,
+                                 self.settings.filter_extension,
+                                 self.settings.filter_filename,
+                                 self.settings.filename_case_sensitive,
+                                 content_filter=content_filter,
+                                 scan_concurrency=self.settings.scan_concurrency,
+                                 query=query)
+        self.watcher = WatchedSelection(file_search, self.settings.watch_interval)
+        self.watcher.changes.connect(self.show_watched_changes)
+        logging.info('Watching %s every %d s', self.settings.root_directory, self.settings.watch_interval)
+
+        self.watch_timer.start(self.settings.watch_interval * 1000)
+        self.check_watched_search()
+        return True
+
+    def stop_watching(self):
+        """Stop watching the search, also if it is running"""
+        self.watch_timer.stop()
+        if self.watcher is not None:
+            if self.search_service.current_search is self.watcher:
+                self.search_service.cancel(timeout=0)
+            self.watcher = None
+
+    def check_watched_search(self):
+        """Search the watched directories again, unless another search is running"""
+        if self.watcher is not None and self.search_service.worker.idle.is_set():
+            self.search_service.search(self.watcher)
+
+    def show_watched_changes(self, changes):
+        """Add the changes of the watched search to a group at the top of the tree view"""
+        if self.watch_item is None:
+            self.watch_item = QtGui.QStandardItem(app_icon('icon_search_folder2.ico'), 'Changes')
+            font = QtGui.QFont()
+            font.setBold(True)
+            self.watch_item.setFont(font)
+            self.model.invisibleRootItem().insertRow(0, [self.watch_item, SizeItem(''), SizeItem('')])
+
+        now = datetime.now().strftime('%H:%M:%S')
+        for change, selected_file in changes:
+            self.watch_item.appendRow([QtGui.QStandardItem(f"{now} {change}: {selected_file.entry}"),
+                                       SizeItem(''),
+                                       SizeItem(format_size(selected_file.file_size()))])
+        self.model.item(0, 1).setText(str(self.watch_item.rowCount()))
+        self.tree_view.expand(self.watch_item.index())
+
+    def save_snapshot(self):
+        """Save the search result to a file"""
+        file_name, _ = QtWidgets.QFileDialog.getSaveFileName(self, 'Save search result',
+            str(Path(Path().home(), 'search result' + const.SNAPSHOT_EXTENSION)),
+            self.snapshot_file_filter())
+        if not file_name:
+            return
+
+        logging.info('Saving search result to %s', file_name)
+        if self.spilled_result is not None:
+            if not file_name.lower().endswith(const.MAPPED_RESULT_EXTENSION):
+                QtWidgets.QMessageBox.warning(self, "Save search result", "The result does not fit in memory, "
+                                              f"save it with the extension {const.MAPPED_RESULT_EXTENSION}")
+                return
+            self.spilled_result.save(file_name)
+        elif file_name.lower().endswith(const.MAPPED_RESULT_EXTENSION):
+            save_mapped_result(self.file_selection, file_name)
+        else:
+            save_snapshot(self.file_selection, file_name)
+        self.add_snapshot_to_recent_list(file_name)
+
+    def select_snapshot(self):
+        """Select a file with a saved search result and open it"""
+        file_name, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Open search result',
+            str(Path().home()), self.snapshot_file_filter())
+        if not file_name:
+            return
+
+        self.open_snapshot(file_name)
+        self.add_snapshot_to_recent_list(file_name)
+
+    @staticmethod
+    def snapshot_file_filter():
+        """File dialog filter for saved search results"""
+        return f"Search results (*{const.SNAPSHOT_EXTENSION});;" \
+               f"Mapped search results for very large results (*{const.MAPPED_RESULT_EXTENSION})"
+
+    def open_snapshot(self, file_name):
+        """Show a saved search result in the tree view"""
+        logging.info('Opening search result %s', file_name)
+        if str(file_name).lower().endswith(const.MAPPED_RESULT_EXTENSION):
+            self.open_mapped_result(file_name)
+            return
+
+        try:
+            load_snapshot(self.file_selection, file_name)
+        except (OSError, ValueError) as error:
+            QtWidgets.QMessageBox.warning(self, "Open search result", f"Cannot open {file_name}: {error}")
+            return
+
+        self.update_treeview()
+
+    def open_mapped_result(self, file_name):
+        """Show a mapped search result in the tree view, without loading all files"""
+        try:
+            mapped_result = open_mapped_result(file_name)
+        except (OSError, ValueError) as error:
+            QtWidgets.QMessageBox.warning(self, "Open search result", f"Cannot open {file_name}: {error}")
+            return
+
+        self.file_selection.new_search()
+        self.clear_treeview()
+        self.mapped_result = mapped_result
+        self.tree_view.setModel(MappedResultModel(self.mapped_result, self))
+
+        self.report_btn.setEnabled(self.mapped_result.file_count > 0)
+        self.directory_report_btn.setEnabled(self.mapped_result.file_count > 0)
+        self.save_snapshot_btn.setEnabled(False)
+
+        # Expanding the whole tree would read every directory, so only show the top level
+        self.tree_view.setHeaderHidden(False)
+        self.tree_view.header().setStretchLastSection(False)
+        self.tree_view.header().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+
+    def compare_snapshots(self):
+        """Select an old and a new saved search result and show the files that changed"""
+        old_file_name, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Open old search result',
+            str(Path().home()), self.snapshot_file_filter())
+        if not old_file_name:
+            return
+        new_file_name, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Open new search result',
+            str(Path(old_file_name).parent), self.snapshot_file_filter())
+        if not new_file_name:
+            return
+
+        self.show_file_changes(ResultDiff(old_file_name, new_file_name, HashCache()))
+
+    def show_file_changes(self, result_diff):
+        """Show a group in the tree view for the added, removed, modified and moved files"""
+        try:
+            file_changes = list(result_diff.iter_changes())
+        except (OSError, ValueError) as error:
+            QtWidgets.QMessageBox.warning(self, "Compare search results", f"Cannot compare: {error}")
+            return
+
+        self.file_selection.new_search()
+        self.clear_treeview()
+        self.file_changes = file_changes
+        self.report_btn.setEnabled(len(self.file_changes) > 0)
+        self.directory_report_btn.setEnabled(False)
+        self.save_snapshot_btn.setEnabled(False)
+
+        font = QtGui.QFont()
+        font.setBold(True)
+        group_items = {}
+        for change in const.CHANGES:
+            if result_diff.counts[change] > 0:
+                group_items[change] = QtGui.QStandardItem(app_icon('icon_folder.ico'), change)
+                group_items[change].setFont(font)
+                self.model.invisibleRootItem().appendRow([group_items[change],
+                                                          SizeItem(str(result_diff.counts[change])),
+                                                          SizeItem('')])
+
+        # Show the full path, since the files are in different directories
+        for file_change in self.file_changes:
+            text = str(file_change.path())
+            if file_change.change == const.CHANGE_MOVED:
+                text += f"  (from {file_change.old_path})"
+            group_items[file_change.change].appendRow([QtGui.QStandardItem(text),
+                                                       SizeItem(''),
+                                                       SizeItem(format_size(file_change.size()))])
+
+        self.show_treeview()
+
+    def show_spilled_result(self, spilled_result):
+        """Show a search result that did not fit in memory like a mapped result
+        The temporary files are removed when the tree view is cleared"""
+        self.open_mapped_result(spilled_result.mapped_result_file)
+        if self.mapped_result is None:
+            spilled_result.remove()
+            return
+
+        self.spilled_result = spilled_result
+        self.save_snapshot_btn.setEnabled(True)
+
+    def add_snapshot_to_recent_list(self, file_name):
+        """Add a saved search result to the recent directories, so it can be opened again"""
+        self.settings.root_directory = str(Path(file_name))
+        self.settings.save()
+        if self.root_dir_combo.findText(self.settings.root_directory) < 0:
+            self.root_dir_combo.addItem(self.settings.root_directory)
+        self.root_dir_combo.setCurrentText(self.settings.root_directory)
+
     def clear_treeview(self):
         """Clear the tree view"""
         logging.info('clear_treeview called')
+        if self.mapped_result is not None:
+            self.tree_view.setModel(self.model)
+            self.mapped_result.close()
+            self.mapped_result = None
+        if self.spilled_result is not None:
+            self.spilled_result.remove()
+            self.spilled_result = None
+        self.file_changes = None
+        self.watch_item = None
         self.model.clear()
         self.file_items = {}
-        self.model.setColumnCount(1)
-        self.model.setHorizontalHeaderLabels(['File'])
+        self.model.setColumnCount(3)
+        self.model.setHorizontalHeaderLabels(['File', 'Files', 'Size'])
 
         # self.directory_tree is a dictionary of lists
         # Name of the key is directory name
@@ -241,14 +717,24 @@ class Window(QtWidgets.QMainWindow):
 
         self.clear_treeview()
 
-        # Only enable clipboard button if file list is not empty
+        # Only enable clipboard buttons if file list is not empty
         self.report_btn.setEnabled( len(self.file_selection.selected_files)>0 )
+        self.directory_report_btn.setEnabled( len(self.file_selection.selected_files)>0 )
+        self.save_snapshot_btn.setEnabled( len(self.file_selection.selected_files)>0 )
 
         # Skip if no files were found
         if len(self.file_selection.selected_files)==0:
             # Todo: perhaps fire a dialog
             return
 
+        with timed_span('tree', files=len(self.file_selection.selected_files)):
+            if self.file_selection.duplicate_groups is not None:
+                self.add_duplicate_groups()
+            else:
+                self.add_selected_files()
+
+    def add_selected_files(self):
+        """Add a node for each directory and each file found to the tree view"""
         # Only create directory entries
         logging.info("Creating directories")
         for selected_file in self.file_selection.selected_files:
@@ -257,7 +743,7 @@ class Window(QtWidgets.QMainWindow):
             place_in_directory_tree = self.directory_tree
 
             # Go over path step by step
-            for parent in selected_file.parents:
+            for depth, parent in enumerate(selected_file.parents):
 
                 # Create new dir if needed
                 if str(parent) not in place_in_directory_tree.keys():
@@ -265,7 +751,14 @@ class Window(QtWidgets.QMainWindow):
                     font = QtGui.QFont()
                     font.setBold(True)
                     subdirectory.setFont(font)
-                    direct_parent.appendRow([subdirectory])
+
+                    # Number of files and total size were accumulated during the search
+                    file_count, total_size = self.file_selection.directory_totals[
+                        selected_file.parents[:depth+1]]
+
+                    direct_parent.appendRow([subdirectory,
+                                             SizeItem(str(file_count)),
+                                             SizeItem(format_size(total_size))])
                     place_in_directory_tree[str(parent)] = [subdirectory, {}]
 
                 # Link to new location in the path
@@ -284,38 +777,141 @@ class Window(QtWidgets.QMainWindow):
 
             self.file_items[selected_file.identifier] = FileItem(selected_file)
 
-            direct_parent.appendRow([self.file_items[selected_file.identifier] ])
+            direct_parent.appendRow([self.file_items[selected_file.identifier],
+                                     SizeItem(''),
+                                     SizeItem(format_size(selected_file.file_size()))])
 
-        self.tree_view.expandAll()
-        self.tree_view.header().hide()
+        self.show_treeview()
+
+
+    def find_similar_names(self):
+        """Show the files in the result of which the name is most similar to the text, best match first
+        An empty text shows the complete result again"""
+        text = self.le_similar.text().strip()
+        logging.info('find_similar_names called for %s', text)
 
+        if self.mapped_result is not None:
+            if not text:
+                self.tree_view.setModel(MappedResultModel(self.mapped_result, self))
+                return
+            matches = [ (score, self.mapped_result.selected_file(file_number)) for score, file_number
+                        in self.mapped_result.similar_names(text, const.DEFAULT_TOP_COUNT) ]
+        else:
+            if not text:
+                self.update_treeview()
+                return
+            matches = FuzzyMatcher(text).best(self.file_selection.selected_files, const.DEFAULT_TOP_COUNT)
+
+        # The mapped result stays open, so the complete result can be shown again
+        self.model.clear()
+        self.file_items = {}
+        self.model.setColumnCount(3)
+        self.model.setHorizontalHeaderLabels(['File', 'Score', 'Size'])
+        self.tree_view.setModel(self.model)
+
+        # Show the full path, since the files are in different directories
+        for score, selected_file in matches:
+            file_item = FileItem(selected_file)
+            file_item.setText(str(selected_file.entry))
+            self.model.invisibleRootItem().appendRow([file_item,
+                                                      SizeItem(f"{score:.2f}"),
+                                                      SizeItem(format_size(selected_file.file_size()))])
+
+        self.show_treeview()
+
+    def show_treeview(self):
+        """Expand the tree view and show the columns"""
+        self.tree_view.expandAll()
+        self.tree_view.setHeaderHidden(False)
+        self.tree_view.header().setStretchLastSection(False)
+        self.tree_view.header().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+
+    def add_duplicate_groups(self):
+        """Add a node for each group of files with the same contents to the tree view"""
+        logging.info("Adding groups of duplicates")
+        for group_number, group in enumerate(self.file_selection.duplicate_groups, start=1):
+            group_item = QtGui.QStandardItem(app_icon('icon_copied.svg'), f"Duplicate group {group_number}")
+            font = QtGui.QFont()
+            font.setBold(True)
+            group_item.setFont(font)
+
+            total_size = sum(selected_file.file_size() for selected_file in group)
+            self.model.invisibleRootItem().appendRow([group_item,
+                                                      SizeItem(str(len(group))),
+                                                      SizeItem(format_size(total_size))])
+
+            # Show the full path, since the files are in different directories
+            for selected_file in group:
+                self.file_items[selected_file.identifier] = FileItem(selected_file)
+                self.file_items[selected_file.identifier].setText(str(selected_file.entry))
+                group_item.appendRow([self.file_items[selected_file.identifier],
+                                      SizeItem(''),
+                                      SizeItem(format_size(selected_file.file_size()))])
+
+        self.show_treeview()
 
     def copy_report_to_clipboard(self):
         """Copy the files found to the clipboard"""
         logging.info('create_report called')
+        if self.file_changes is not None:
+            # The report of the differences between two results has fixed columns
+            pyperclip.copy('\n'.join(diff_report_lines(self.file_changes)))
+            return
+
         dlg = SelectReportFields(self, self.settings.report_columns)
         if dlg.exec()==QtWidgets.QDialog.Accepted:
             self.settings.report_columns = dlg.result()
             logging.info(self.settings.report_columns)
-            self.file_selection.copy_report_to_clipboard(self.settings.report_columns)
+            with timed_span('report', output='clipboard'):
+                if self.mapped_result is not None:
+                    pyperclip.copy('\n'.join(self.mapped_result.report_lines(self.settings.report_columns)))
+                else:
+                    self.file_selection.copy_report_to_clipboard(self.settings.report_columns)
             self.settings.save()
 
+    def copy_directory_report_to_clipboard(self):
+        """Copy the number of files and total size per directory to the clipboard"""
+        logging.info('copy_directory_report_to_clipboard called')
+        with timed_span('report', output='clipboard', kind='directories'):
+            if self.mapped_result is not None:
+                pyperclip.copy('\n'.join(self.mapped_result.directory_report_lines()))
+            else:
+                self.file_selection.copy_directory_report_to_clipboard()
+
 # Main program
 if __name__ == '__main__':
     # Parse the arguments to allow the user to use a different settings file on different computers
     parser = argparse.ArgumentParser()
     parser.add_argument("--settings", help="Specifies which settings file to use on this computer")
+    parser.add_argument("--log-file", default=const.DEFAULT_LOG_FILE,
+                        help=f"Write log messages to this file instead of {const.DEFAULT_LOG_FILE}")
+    parser.add_argument("--log-level", choices=const.LOG_LEVELS,
+                        help="Level of the messages in the log file, instead of the level in the settings")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="Profile the searches, tree and reports of this session and write a report "
+                             "with the time per phase and per function to this file when the window is closed")
     args = parser.parse_args()
 
+    # The level of the settings is set when the settings are loaded
+    setup_logging(args.log_file, args.log_level or const.DEFAULT_LOG_LEVEL)
+
     SETTINGS_FILE = "settings.json"
     if args.settings:
         SETTINGS_FILE = args.settings
         print(f"Using settings file {SETTINGS_FILE}")
 
+    if args.profile:
+        start_profiling()
+
     app = QtWidgets.QApplication(sys.argv)
-    window = Window(filename_settings = SETTINGS_FILE)
+    window = Window(filename_settings = SETTINGS_FILE, log_level=args.log_level)
     #stylesheet = """color: white;
     #                background-color: #202020"""
     #window.setStyleSheet(stylesheet)
     window.show()
-    sys.exit(app.exec())
+    exit_code = app.exec()
+
+    if args.profile:
+        stop_profiling(args.profile)
+        print(f"Profile written to {args.profile}")
+    sys.exit(exit_code)
@@ -0,0 +1,12 @@
+"""Command line version of SearchFiles, which runs without a GUI:
+- searches a directory
+- allows narrowing down search on name or extension
+- writes a tab separated report to stdout or to a file
+"""
+
+import sys
+
+from modules.sf_cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
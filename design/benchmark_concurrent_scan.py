@@ -0,0 +1,67 @@
+"""Benchmark of the concurrent scan on a file system with artificial latency.
+A synthetic directory tree is created in a temporary directory, and every
+directory listing and stat is delayed to simulate a network mount.
+Run from the main directory: python design/benchmark_concurrent_scan.py"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.sf_search import FileSearch
+
+# Delay of each directory listing and each stat in seconds
+LATENCY = 0.002
+
+def create_tree(root, depth=3, directories=6, files=10):
+    """Create a synthetic directory tree"""
+    for file_number in range(files):
+        Path(root, f"file_{file_number}.txt").write_text("x")
+    if depth > 0:
+        for directory_number in range(directories):
+            subdirectory = Path(root, f"dir_{directory_number}")
+            subdirectory.mkdir()
+            create_tree(subdirectory, depth-1, directories, files)
+
+def add_latency():
+    """Delay listings and stats of pathlib, like a network file system would"""
+    original_iterdir = Path.iterdir
+    original_stat = Path.stat
+    original_lstat = Path.lstat
+
+    def iterdir(self):
+        time.sleep(LATENCY)
+        return iter(list(original_iterdir(self)))
+
+    def stat(self, *args, **kwargs):
+        time.sleep(LATENCY)
+        return original_stat(self, *args, **kwargs)
+
+    def lstat(self):
+        time.sleep(LATENCY)
+        return original_lstat(self)
+
+    Path.iterdir = iterdir
+    Path.stat = stat
+    Path.lstat = lstat
+
+def scan(root, concurrency):
+    """Scan all files and return the number of files and the duration of the scan"""
+    file_search = FileSearch()
+    # Only the scan with paths gets the artificial latency
+    file_search.directory_fds = False
+    file_search.select_files(root, '', '', False, scan_concurrency={ str(root): concurrency })
+    start_time = time.perf_counter()
+    file_count = sum(1 for selected_file in file_search.iter_selection())
+    return file_count, time.perf_counter() - start_time
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as root:
+        create_tree(root)
+        add_latency()
+
+        for concurrency in [1, 4, 16, 64]:
+            file_count, duration = scan(root, concurrency)
+            print(f"Concurrency {concurrency:3d}: {file_count} files in {duration:.2f} s")
@@ -0,0 +1,67 @@
+"""Benchmark of the scan relative to directory file descriptors against the scan with full paths.
+Synthetic directory trees with long paths are created in a temporary directory: a deep chain
+of directories with a few files in each, and a wide tree with many files per directory.
+Each tree is scanned for all files and for a filename that only a few files match, in which
+case the fd scan builds almost no paths.
+Run from the main directory on Linux: python design/benchmark_fd_scan.py"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.sf_search import FileSearch
+from modules.sf_fd_scan import FD_SCAN_SUPPORTED
+
+# Number of scans of which the fastest is reported
+REPEAT = 3
+
+def create_deep_tree(root, depth=100, files=20):
+    """Create a chain of depth directories with long names, with files in each directory"""
+    directory = Path(root)
+    for level in range(depth):
+        directory = directory / f"level_{level:03d}_with_a_long_directory_name"
+        directory.mkdir()
+        for file_number in range(files):
+            Path(directory, f"file_{file_number}.txt").write_text("x")
+    Path(directory, "needle.txt").write_text("x")
+
+def create_wide_tree(root, depth=4, directories=5, files=40):
+    """Create a tree of which each directory has subdirectories and many files"""
+    for file_number in range(files):
+        Path(root, f"file_{file_number}.txt").write_text("x")
+    if depth > 0:
+        for directory_number in range(directories):
+            subdirectory = Path(root, f"directory_{directory_number}_with_a_long_name")
+            subdirectory.mkdir()
+            create_wide_tree(subdirectory, depth-1, directories, files)
+
+def scan(root, filename, directory_fds):
+    """Scan the tree and return the number of selected files and the fastest duration"""
+    durations = []
+    for _ in range(REPEAT):
+        file_search = FileSearch()
+        file_search.directory_fds = directory_fds
+        file_search.select_files(root, '', filename, False)
+        start_time = time.perf_counter()
+        file_count = sum(1 for selected_file in file_search.iter_selection())
+        durations.append(time.perf_counter() - start_time)
+    return file_count, min(durations)
+
+if __name__ == '__main__':
+    if not FD_SCAN_SUPPORTED:
+        print("Reading directories relative to a file descriptor is not supported on this system")
+        sys.exit(1)
+
+    for tree_name, create_tree in [('Deep', create_deep_tree), ('Wide', create_wide_tree)]:
+        with tempfile.TemporaryDirectory() as root:
+            create_tree(root)
+            for filename in ['', 'needle']:
+                file_count, path_duration = scan(root, filename, False)
+                fd_count, fd_duration = scan(root, filename, True)
+                assert fd_count == file_count
+                print(f"{tree_name} tree, filename '{filename}': {file_count} files, "
+                      f"paths {path_duration:.3f} s, file descriptors {fd_duration:.3f} s, "
+                      f"{path_duration / fd_duration:.1f}x")
@@ -0,0 +1,154 @@
+"""Generates modules/sf_extension_categories.py from the list of extensions in list_of_extensions.py
+The extensions are grouped in a small number of categories, based on the headings in the list.
+Run this script again after the list is changed:
+    python design/generate_extension_categories.py
+"""
+
+import re
+from pathlib import Path
+
+from list_of_extensions import EXTENSIONS
+
+# Headings in the list that start a category, other headings keep the current category
+HEADING_CATEGORIES = {
+    'Archive and compressed': 'archive',
+    'Physical recordable media archiving': 'diskimage',
+    'Other extensions': 'other',
+    'Computer-aided design': 'cad',
+    'Electronic design automation (EDA)': 'cad',
+    'Test technology': 'data',
+    'Database': 'database',
+    'Big Data (Distributed)': 'database',
+    'Desktop publishing': 'document',
+    'Document': 'document',
+    'Financial records': 'data',
+    'Financial data transfer formats': 'data',
+    'Font file': 'font',
+    'General purpose': 'data',
+    'Geographic information system': 'data',
+    'Graphical information organizers': 'document',
+    'Graphics': 'image',
+    '3D graphics': '3d',
+    'Links and shortcuts': 'other',
+    'Mathematical': 'data',
+    'Object code, executable files, shared and dynamically linked libraries': 'executable',
+    'Page description language': 'document',
+    'Personal information manager': 'document',
+    'Presentation': 'presentation',
+    'Project management software': 'document',
+    'Reference management software': 'document',
+    'Scientific data (data exchange)': 'data',
+    'Programming languages and scripts': 'code',
+    'Security': 'security',
+    'Signal data (non-audio)': 'data',
+    'Sound and music': 'audio',
+    'Recorded television formats': 'video',
+    'Source code for computer programs': 'code',
+    'Spreadsheet': 'spreadsheet',
+    'Tabulated data': 'data',
+    'Video': 'video',
+    'Video editing, production': 'video',
+    'Video game data': 'game',
+    'Video game storage media': 'game',
+    'Virtual machines': 'diskimage',
+    'Web page': 'web',
+    'Markup languages and other web standards-based formats': 'web',
+    'Other': 'other',
+    'Configurations, Metadata': 'configuration',
+    'Generic file extensions': 'other',
+    'Text files': 'text',
+    'Partial files': 'other',
+    'Temporary files': 'other' }
+
+# Order in which categories are chosen if an extension is listed under more than one heading,
+# the list for instance mentions JPG and PY under archives
+CATEGORY_PRIORITY = [ 'image', 'video', 'audio', 'text', 'spreadsheet', 'presentation', 'code',
+                      'executable', 'font', '3d', 'cad', 'database', 'diskimage', 'web', 'archive',
+                      'document', 'security', 'game', 'data', 'configuration', 'other' ]
+
+# Common camera and video formats that are missing in the list
+ADDITIONAL_EXTENSIONS = {
+    'image': [ 'heic', 'heif', 'nef', 'arw', 'orf', 'rw2', 'raf', 'webp' ],
+    'video': [ 'mp4', 'm4v', 'mts', 'm2ts' ] }
+
+# Category of common extensions, which is used instead of the category from the headings.
+# The list mentions many common extensions under unrelated headings, for instance XML under
+# sound and music, DNG under archives and subtitles under archives
+CATEGORY_OVERRIDES = {
+    'xml': 'data', 'json': 'data', 'yml': 'data', 'yaml': 'data', 'toml': 'configuration',
+    'ini': 'configuration', 'cfg': 'configuration', 'conf': 'configuration', 'plist': 'configuration',
+    'properties': 'configuration', 'reg': 'configuration', 'xaml': 'code', 'xsd': 'data',
+    'dng': 'image', 'cr3': 'image', 'stl': '3d', 'obj': '3d', 'dxf': 'cad', 'vsdx': 'document',
+    'srt': 'video', 'ass': 'video', 'ssa': 'video', 'vtt': 'video', 'sub': 'video',
+    'ogg': 'audio', 'm4a': 'audio', 'opus': 'audio',
+    'pyw': 'code', 'pyi': 'code', 'pyx': 'code', 'jsx': 'code', 'tsx': 'code',
+    'md': 'text', 'rst': 'text', 'ps': 'document', 'eml': 'document', 'mbox': 'document',
+    'woff2': 'font', 'eot': 'font', 'msi': 'executable', 'whl': 'archive', 'ova': 'diskimage',
+    'bin': 'other', 'dat': 'other' }
+
+# Extensions consist of letters, digits and a few other characters
+EXTENSION = re.compile(r'[\w!~$#+-]{1,16}')
+
+def extension_categories(extensions_text):
+    """Returns a dictionary with the set of extensions of each category
+    Each extension is only added to one category, CATEGORY_OVERRIDES is applied last"""
+    extension_headings = {}
+    category = None
+    for line in extensions_text.split('\n'):
+        line = line.strip()
+        if line in HEADING_CATEGORIES:
+            category = HEADING_CATEGORIES[line]
+            continue
+
+        # Lines with extensions have the extensions, a dash and a description
+        parts = re.split(r'\s[-–]\s', line.replace('–', ' – '), maxsplit=1)
+        if len(parts) < 2 or category is None:
+            continue
+
+        for extension in parts[0].split(','):
+            extension = extension.strip().lower().lstrip('.')
+            if extension.endswith('(file format)'):
+                extension = extension.split('(file format)')[0].strip()
+            if EXTENSION.fullmatch(extension):
+                extension_headings.setdefault(extension, set()).add(category)
+
+    for category, extensions in ADDITIONAL_EXTENSIONS.items():
+        for extension in extensions:
+            extension_headings.setdefault(extension, set()).add(category)
+
+    categories = {}
+    for extension, extension_categories in extension_headings.items():
+        if extension not in CATEGORY_OVERRIDES:
+            category = min(extension_categories, key=CATEGORY_PRIORITY.index)
+            categories.setdefault(category, set()).add(extension)
+
+    for extension, category in CATEGORY_OVERRIDES.items():
+        categories.setdefault(category, set()).add(extension)
+
+    return categories
+
+def write_module(categories, file_name):
+    """Write the categories as a Python module, which is loaded from the compiled .pyc file"""
+    lines = [ '"""sf_extension_categories maps file extensions to a category, such as image or archive.',
+              'Generated by design/generate_extension_categories.py from design/list_of_extensions.py,',
+              'do not edit this file"""',
+              '',
+              '# Extensions without leading dot, in lower case, per category',
+              'CATEGORIES = {' ]
+    for category in sorted(categories):
+        extensions = ', '.join(repr(extension) for extension in sorted(categories[category]))
+        lines.append(f'    {category!r}: frozenset({{{extensions}}}),')
+    lines += [ '}',
+               '',
+               '# Category of each extension',
+               'EXTENSION_CATEGORY = { extension: category for category, extensions in CATEGORIES.items()',
+               '                       for extension in extensions }',
+               '' ]
+    Path(file_name).write_text('\n'.join(lines), encoding='utf-8')
+
+if __name__ == '__main__':
+    # The list is stored as utf-8, but declared as latin-1
+    categories = extension_categories(EXTENSIONS.encode('latin-1').decode('utf-8'))
+    for category, extensions in sorted(categories.items()):
+        print(f"{category:15} {len(extensions):5} extensions")
+    write_module(categories, Path(__file__).parent.parent / 'modules' / 'sf_extension_categories.py')
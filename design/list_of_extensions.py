@@ -1830,46 +1830,47 @@ Temporary files
 .temp, .tmp – Temporary file sometimes in a specific format, but often just raw data in the middle of processing
 Pseudo-pipelines, Pseudo-pipeline – Pseudo-pipeline file used to simulate a software pipe"""
 
-result = []
-header = ""
-for line in EXTENSIONS.split('\n'):
+if __name__ == '__main__':
+    result = []
+    header = ""
+    for line in EXTENSIONS.split('\n'):
 
-    # Remove additional spaces
-    line = line.strip()
-    line = line.replace('–', '-')
+        # Remove additional spaces
+        line = line.strip()
+        line = line.replace('–', '-')
 
-    # Lines to ignore
-    if any([line.lower().startswith(s.lower()) for s in [ \
-        "list of", "these file formats are", "main article", "see also", \
-       "3d graphics are 3d models", "formats used by"]]):
-        continue
+        # Lines to ignore
+        if any([line.lower().startswith(s.lower()) for s in [ \
+            "list of", "these file formats are", "main article", "see also", \
+           "3d graphics are 3d models", "formats used by"]]):
+            continue
 
-    # Lines that are designated as headers
-    if any([line.lower().startswith(s.lower()) for s in [ \
-        "markup languages", "signal data (non", "electronic design automation", \
-       "files output from", "Pseudo" ] ] ):
-        header = line
-        continue
+        # Lines that are designated as headers
+        if any([line.lower().startswith(s.lower()) for s in [ \
+            "markup languages", "signal data (non", "electronic design automation", \
+           "files output from", "Pseudo" ] ] ):
+            header = line
+            continue
 
-    # Check if the line consists of an extension and a comment
-    if "-" in line:
-        extensions, comment = line.split("-", maxsplit=1)
-        comment = comment.strip()
-        for extension in extensions.split(','):
-            extension = extension.strip()
-            if extension.startswith('.'):
-                extension = extension[1:]
-            if extension.lower().endswith('(file format)'):
-                extension = extension.split('(file format)')[0]
+        # Check if the line consists of an extension and a comment
+        if "-" in line:
+            extensions, comment = line.split("-", maxsplit=1)
+            comment = comment.strip()
+            for extension in extensions.split(','):
+                extension = extension.strip()
+                if extension.startswith('.'):
+                    extension = extension[1:]
+                if extension.lower().endswith('(file format)'):
+                    extension = extension.split('(file format)')[0]
 
-            if extension != '':
-                result.append( f"{extension}\t{comment}\t{header}\t{line}" )
-                print(extension, comment)
+                if extension != '':
+                    result.append( f"{extension}\t{comment}\t{header}\t{line}" )
+                    print(extension, comment)
 
-    else:
-        # Assume the line is a header
-        header = line
+        else:
+            # Assume the line is a header
+            header = line
 
-print(len(result))
-import pyperclip
-pyperclip.copy('\n'.join(result))
+    print(len(result))
+    import pyperclip
+    pyperclip.copy('\n'.join(result))
@@ -0,0 +1,101 @@
+"""sf_batch defines a class BatchSearch that evaluates several saved queries
+in a single walk of the root directories, with a separate result per query.
+The saved queries are read from a json file with the name and the query of each search:
+    { "photos": "ext:jpg,png", "large files": "size>1GB", "old logs": "ext:log modified<2023" }
+"""
+
+import json
+import logging
+
+from modules.sf_search import FileSearch
+from modules.sf_query import Query, COST_STAT
+from modules.sf_utilities import iter_in_threads
+
+def load_batch(file_name, case_sensitive=False):
+    """Returns the list of (name, Query) tuples of the saved queries in the file
+    Raises QueryError if one of the queries cannot be parsed"""
+    with open(file_name, 'r', encoding='utf-8') as openfile:
+        saved_queries = json.load(openfile)
+
+    return [ (name, Query(text, case_sensitive)) for name, text in saved_queries.items() ]
+
+class BatchSearch(FileSearch):
+    """Searches the root directories once and selects the files of each query
+    The result of each query is a FileSearch in self.results, so the usual reports can be made"""
+
+    # Maximum number of files that are waiting for the expensive predicates
+    max_pending_files = 256
+
+    def __init__(self, queries):
+        """queries is a list of (name, Query) tuples"""
+        super().__init__()
+        self.queries = queries
+        self.results = {}
+
+    def new_search(self):
+        super().new_search()
+        self.results = {}
+        for name, query in self.queries:
+            result = FileSearch()
+            result.root_directory = self.root_directory
+            result.query = query
+            result.new_search()
+            self.results[name] = result
+
+    def requirement(self, entry):
+        """The common filters must match, and the name must match at least one query"""
+        if not super().requirement(entry):
+            return False
+        return any(query.accepts_name(entry) for name, query in self.queries)
+
+    def iter_selection(self):
+        """Generator like FileSearch.iter_selection, but the files are not counted,
+        since run only counts the files that match at least one query"""
+        selected_files = self.iter_name_selection()
+        if self.content_filter is not None:
+            selected_files = self.content_filter.iter_matches(selected_files)
+        return selected_files
+
+    def matching_queries(self, selected_file):
+        """Returns the results of the queries that the file matches"""
+        return [ self.results[name] for name, query in self.queries if query.accepts(selected_file) ]
+
+    def run(self):
+        """Search the root directories and fill the result of each query"""
+        logging.info("Starting batch search with %d queries", len(self.queries))
+        self.new_search()
+
+        selected_files = self.iter_selection()
+        if max([ query.cost for name, query in self.queries ], default=COST_STAT) > COST_STAT:
+            matches = iter_in_threads(selected_files, self.matching_queries, self.max_pending_files)
+        else:
+            matches = ( (selected_file, self.matching_queries(selected_file))
+                        for selected_file in selected_files )
+
+        for selected_file, results in matches:
+            if results:
+                self.statistics.matches += 1
+                self.statistics.bytes += selected_file.file_size()
+            for result in results:
+                result.selected_files.append(selected_file)
+                result.add_to_directory_totals(selected_file)
+                result.statistics.matches += 1
+                result.statistics.bytes += selected_file.file_size()
+
+        for name, query in self.queries:
+            query.save_caches()
+
+        # Do not report results of a search that was cancelled
+        if not self.continue_execution:
+            logging.info("Batch search cancelled")
+            return
+
+        self.statistics = self.statistics.snapshot()
+        for name, result in self.results.items():
+            result.sort_selected_files()
+            result.statistics.directories = self.statistics.directories
+            result.statistics.entries = self.statistics.entries
+            logging.info("%s: %d files found", name, len(result.selected_files))
+
+        logging.info("%d entries searched for %d queries", self.statistics.entries, len(self.queries))
+        self.report_finished()
@@ -0,0 +1,339 @@
+"""This module defines the command line interface, that searches files and writes
+the report to stdout or to a file without loading PyQt5"""
+
+import argparse
+import logging
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+import modules.sf_constants as const
+from modules.sf_search import FileSearch, root_directories
+from modules.sf_content_search import ContentFilter
+from modules.sf_query import Query, QueryError
+from modules.sf_batch import BatchSearch, load_batch
+from modules.sf_snapshot import is_snapshot_file, save_snapshot, load_snapshot
+from modules.sf_mapped_result import is_mapped_result_file, save_mapped_result, open_mapped_result
+from modules.sf_duplicates import HashCache
+from modules.sf_diff import ResultDiff
+from modules.sf_watch import IncrementalSearch, SearchWatcher, change_lines
+from modules.sf_scan_profile import ScanProfile
+from modules.sf_logging import setup_logging, timed_span
+
+def report_columns(column_names):
+    """Converts a comma separated list of column names to the list of report columns"""
+    available_columns = [column for column, checked in const.DEFAULT_COLUMNS]
+
+    if column_names is None:
+        return [ [column, checked] for column, checked in const.DEFAULT_COLUMNS ]
+
+    selected_columns = [ column.strip() for column in column_names.split(',') ]
+    for column in selected_columns:
+        if column not in available_columns:
+            raise argparse.ArgumentTypeError(f"Invalid column '{column}', "
+                                             f"choose from: {', '.join(available_columns)}")
+
+    return [ [column, True] for column in selected_columns ]
+
+def argument_parser():
+    """Parser for the command line arguments"""
+    parser = argparse.ArgumentParser(description="Search files and write a tab separated report")
+    parser.add_argument("root", nargs='+', help="One or more directories in which the search starts, "
+                        f"or a saved search result (*{const.SNAPSHOT_EXTENSION} or "
+                        f"*{const.MAPPED_RESULT_EXTENSION}) to report")
+    parser.add_argument("--extension", default='', help="Only select files with this extension")
+    parser.add_argument("--filename", default='', help="Only select files of which the name contains this text")
+    parser.add_argument("--contains", default='', help="Only select files that contain this text")
+    parser.add_argument("--query", default='',
+                        help="Only select files that match the query, "
+                             "for example 'ext:jpg,png size>5MB modified<2023-01-01 -path:backup'")
+    parser.add_argument("--batch", help="Json file with saved queries that are all evaluated "
+                        "in one search, one report per query is written to the --output directory")
+    parser.add_argument("--regex", action='store_true', help="The --contains text is a regular expression")
+    parser.add_argument("--processes", action='store_true',
+                        help="Search the contents of the files in parallel processes instead of threads")
+    parser.add_argument("--case-sensitive", action='store_true',
+                        help="Filename and contents filters are case sensitive")
+    parser.add_argument("--columns", type=report_columns, default=report_columns(None),
+                        help="Comma separated list of columns in the report, "
+                             "for example \"Path,Filename,File size\"")
+    parser.add_argument("--concurrency", type=int, default=const.DEFAULT_SCAN_CONCURRENCY,
+                        help="Number of directories read at the same time, "
+                             "use for instance 32 on a network mount")
+    parser.add_argument("--duplicates", action='store_true',
+                        help="Only report files that have the same contents as another file")
+    parser.add_argument("--top", choices=const.TOP_MODES,
+                        help="Only report the largest, newest or oldest files, best file first")
+    parser.add_argument("--top-count", type=int, default=const.DEFAULT_TOP_COUNT,
+                        help=f"Number of files reported with --top, default {const.DEFAULT_TOP_COUNT}")
+    parser.add_argument("--limit", type=int, default=0,
+                        help="Stop the search after this number of files is found")
+    parser.add_argument("--breadth-first", action='store_true',
+                        help="Search all directories at one level before the next level, "
+                             "so files close to the root are found first")
+    parser.add_argument("--similar", help="Only report the files of which the name is most similar "
+                        "to this text, allowing typing errors. Use with a saved search result "
+                        "to prevent searching the disk again")
+    parser.add_argument("--similar-count", type=int, default=const.DEFAULT_TOP_COUNT,
+                        help=f"Number of files reported with --similar, default {const.DEFAULT_TOP_COUNT}")
+    parser.add_argument("--compare", help="Report the files that were added, removed, modified or moved "
+                        f"since this saved search result (*{const.SNAPSHOT_EXTENSION} or "
+                        f"*{const.MAPPED_RESULT_EXTENSION}), instead of all files")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="Search again every number of seconds and only report the files that were "
+                             "added, removed or modified, until the program is interrupted")
+    parser.add_argument("--memory-budget", type=int, metavar="MB",
+                        help="Keep the files found on disk when they need more than this number of "
+                             f"megabytes of memory, default {const.DEFAULT_MEMORY_BUDGET}, 0 for no limit")
+    parser.add_argument("--scan-profile", metavar="FILE",
+                        help="Write the directories that took most time to read to this file, "
+                             "with their number of entries and errors and the totals of their subtree")
+    parser.add_argument("--hot-directories", type=int, default=const.DEFAULT_HOT_DIRECTORIES,
+                        help="Number of directories in the --scan-profile report, "
+                             f"default {const.DEFAULT_HOT_DIRECTORIES}")
+    parser.add_argument("--flame-graph", metavar="FILE",
+                        help="Write the time to read each directory to this file as folded stacks, "
+                             "which flame graph tools such as flamegraph.pl or speedscope can show")
+    parser.add_argument("--directory-report", action='store_true',
+                        help="Report the number of files and total size per directory")
+    parser.add_argument("--log-file", help="Write log messages to this file")
+    parser.add_argument("--log-level", choices=const.LOG_LEVELS, default=const.DEFAULT_LOG_LEVEL,
+                        help=f"Level of the messages in the --log-file, default {const.DEFAULT_LOG_LEVEL}")
+    parser.add_argument("--output", help="Write the report to this file instead of stdout, "
+                        "or to this directory for --batch")
+    parser.add_argument("--save-result", help="Save the search result to this file, "
+                        "it can be opened in the GUI or reported again without searching. "
+                        f"Use the extension {const.MAPPED_RESULT_EXTENSION} for very large results")
+    return parser
+
+def main(argv=None):
+    """Search files and write the report"""
+    parser = argument_parser()
+    args = parser.parse_args(argv)
+    if args.log_file:
+        setup_logging(args.log_file, args.log_level)
+
+    content_filter = None
+    if args.contains:
+        try:
+            content_filter = ContentFilter(args.contains, args.regex, args.case_sensitive, args.processes)
+        except re.error as error:
+            print(f"Invalid regular expression: {error}", file=sys.stderr)
+            return 2
+
+    query = None
+    if args.query:
+        try:
+            query = Query(args.query, args.case_sensitive)
+        except QueryError as error:
+            print(f"Invalid query: {error}", file=sys.stderr)
+            return 2
+
+    if args.batch:
+        # The queries of the batch are the only selection of files, and each query gets a complete report
+        combined = [ option for option, value in [('--query', args.query), ('--top', args.top),
+                                                  ('--limit', args.limit), ('--duplicates', args.duplicates),
+                                                  ('--similar', args.similar), ('--compare', args.compare),
+                                                  ('--watch', args.watch), ('--save-result', args.save_result),
+                                                  ('--memory-budget', args.memory_budget is not None)]
+                     if value ]
+        if combined:
+            parser.error(f"--batch cannot be combined with {', '.join(combined)}")
+        return run_batch(args, content_filter)
+
+    if args.watch:
+        return run_watch(args, content_filter, query)
+
+    # Saved results are compared without loading them
+    if args.compare and len(args.root) == 1 and \
+            (is_mapped_result_file(args.root[0]) or is_snapshot_file(args.root[0])):
+        return write_diff_report(args.compare, args.root[0], args.output)
+
+    # A mapped result is reported directly from the file
+    if len(args.root) == 1 and is_mapped_result_file(args.root[0]):
+        if args.save_result:
+            print("A mapped result cannot be saved again", file=sys.stderr)
+            return 2
+        return report_mapped_result(open_mapped_result(args.root[0]), args)
+
+    file_search = FileSearch()
+    if args.scan_profile or args.flame_graph:
+        file_search.scan_profile = ScanProfile()
+
+    if len(args.root) == 1 and is_snapshot_file(args.root[0]):
+        load_snapshot(file_search, args.root[0])
+    else:
+        file_search.select_files(args.root, args.extension, args.filename, args.case_sensitive,
+                                 content_filter=content_filter, find_duplicates=args.duplicates,
+                                 query=query, top_mode=args.top or const.TOP_ALL, top_count=args.top_count,
+                                 match_limit=args.limit, breadth_first=args.breadth_first,
+                                 scan_concurrency={ str(root): args.concurrency
+                                                    for root in root_directories(args.root) },
+                                 memory_budget=const.DEFAULT_MEMORY_BUDGET if args.memory_budget is None
+                                               else args.memory_budget)
+        file_search.run()
+    logging.info("%d files found", file_search.statistics.matches)
+
+    if file_search.scan_profile is not None:
+        write_scan_profile(file_search.scan_profile, args)
+
+    if file_search.spilled_result is not None:
+        try:
+            return report_spilled_result(file_search.spilled_result, args)
+        finally:
+            file_search.spilled_result.remove()
+
+    if args.similar:
+        file_search.select_similar_names(args.similar, args.similar_count)
+
+    if args.save_result and args.save_result.lower().endswith(const.MAPPED_RESULT_EXTENSION):
+        save_mapped_result(file_search, args.save_result)
+    elif args.save_result:
+        save_snapshot(file_search, args.save_result)
+
+    if args.compare:
+        # The new search is compared as a saved result
+        with tempfile.TemporaryDirectory() as directory:
+            new_result = Path(directory, 'result' + const.SNAPSHOT_EXTENSION)
+            save_snapshot(file_search, new_result)
+            return write_diff_report(args.compare, new_result, args.output)
+
+    return write_report(file_search, args, args.output)
+
+def report_mapped_result(mapped_result, args):
+    """Write the report of a mapped result and close it"""
+    logging.info("%d files in mapped result", mapped_result.file_count)
+    try:
+        if args.similar and not args.directory_report:
+            lines = mapped_result.report_lines(args.columns,
+                                               mapped_result.similar_names(args.similar, args.similar_count))
+            return write_lines(lines, args.output)
+        return write_report(mapped_result, args, args.output)
+    finally:
+        mapped_result.close()
+
+def report_spilled_result(spilled_result, args):
+    """Save, compare or report a search result that did not fit in memory, like a mapped result"""
+    if args.save_result:
+        if not args.save_result.lower().endswith(const.MAPPED_RESULT_EXTENSION):
+            print(f"The result does not fit in memory, save it with the extension "
+                  f"{const.MAPPED_RESULT_EXTENSION}", file=sys.stderr)
+            return 2
+        spilled_result.save(args.save_result)
+
+    if args.compare:
+        return write_diff_report(args.compare, spilled_result.mapped_result_file, args.output)
+
+    return report_mapped_result(spilled_result.open(), args)
+
+def write_diff_report(old_result, new_result, output_name):
+    """Write the report of the differences between two saved results"""
+    result_diff = ResultDiff(old_result, new_result, HashCache())
+    try:
+        return write_lines(result_diff.report_lines(), output_name)
+    except (OSError, ValueError) as error:
+        print(f"Cannot compare {old_result} with {new_result}: {error}", file=sys.stderr)
+        return 2
+
+def run_batch(args, content_filter):
+    """Search once for all saved queries and write a report per query"""
+    if not args.output:
+        print("--batch needs an --output directory for the reports", file=sys.stderr)
+        return 2
+
+    try:
+        queries = load_batch(args.batch, args.case_sensitive)
+    except (OSError, ValueError) as error:
+        print(f"Cannot read the queries from {args.batch}: {error}", file=sys.stderr)
+        return 2
+
+    # The name of the query is used as file name, without characters that are not allowed.
+    # File names are compared without case, since they are the same file on Windows
+    file_names = {}
+    for name, query in queries:
+        file_name = re.sub(r'[^\w\-. ]', '_', name) + '.txt'
+        other_name = next(( other for other, other_file in file_names.items()
+                            if other_file.lower() == file_name.lower() ), None)
+        if other_name is not None:
+            print(f"The reports of the queries {other_name} and {name} would both be written to {file_name}, "
+                  "rename one of the queries", file=sys.stderr)
+            return 2
+        file_names[name] = file_name
+
+    batch_search = BatchSearch(queries)
+    if args.scan_profile or args.flame_graph:
+        batch_search.scan_profile = ScanProfile()
+    batch_search.select_files(args.root, args.extension, args.filename, args.case_sensitive,
+                              content_filter=content_filter, breadth_first=args.breadth_first,
+                              scan_concurrency={ str(root): args.concurrency
+                                                 for root in root_directories(args.root) })
+    batch_search.run()
+
+    if batch_search.scan_profile is not None:
+        write_scan_profile(batch_search.scan_profile, args)
+
+    output_directory = Path(args.output)
+    output_directory.mkdir(parents=True, exist_ok=True)
+    for name, result in batch_search.results.items():
+        write_report(result, args, output_directory / file_names[name])
+
+    return 0
+
+def run_watch(args, content_filter, query):
+    """Search again and again, and write the changes of each search as soon as they are found
+    The output file is appended, so it is a log of all changes"""
+    file_search = IncrementalSearch()
+    file_search.select_files(args.root, args.extension, args.filename, args.case_sensitive,
+                             content_filter=content_filter, query=query,
+                             scan_concurrency={ str(root): args.concurrency
+                                                for root in root_directories(args.root) })
+    watcher = SearchWatcher(file_search, args.watch)
+
+    def report_changes(changes):
+        output = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+        try:
+            for line in change_lines(changes):
+                output.write(line + '\n')
+            output.flush()
+        finally:
+            if args.output:
+                output.close()
+
+    try:
+        watcher.watch(report_changes)
+    except KeyboardInterrupt:
+        logging.info("Watching stopped")
+    return 0
+
+def write_scan_profile(scan_profile, args):
+    """Write the hot directories report and the folded stacks of a profiled search"""
+    if args.scan_profile:
+        write_lines(scan_profile.report_lines(args.hot_directories), args.scan_profile)
+    if args.flame_graph:
+        write_lines(scan_profile.folded_lines(), args.flame_graph)
+
+def write_report(file_search, args, output_name):
+    """Write the report of a search or a saved result to a file, or to stdout if no file is given"""
+    if args.directory_report:
+        lines = file_search.directory_report_lines()
+    else:
+        lines = file_search.report_lines(args.columns)
+    with timed_span('report', output=output_name or 'stdout'):
+        return write_lines(lines, output_name)
+
+def write_lines(lines, output_name):
+    """Write the lines of a report to a file, or to stdout if no file is given"""
+    # Write the report line by line instead of building it in memory
+    output = sys.stdout
+    if output_name:
+        output = open(output_name, 'w', encoding='utf-8')
+
+    try:
+        for line in lines:
+            output.write(line + '\n')
+    finally:
+        if output_name:
+            output.close()
+
+    return 0
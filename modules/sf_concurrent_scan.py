@@ -0,0 +1,104 @@
+"""sf_concurrent_scan defines a class ConcurrentScan that scans a directory tree
+with many directory listings in flight at the same time.
+On network file systems each listing and stat waits for the server, so scanning
+directories concurrently hides most of that latency.
+An asyncio event loop distributes the directories over a fixed number of workers,
+which read the directories in a thread pool"""
+
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class ConcurrentScan():
+    """Scans a directory tree with a limited number of directories read at the same time"""
+
+    def __init__(self, read_directory, concurrency, continue_execution=None):
+        """read_directory is a function that is called in a worker thread for each directory,
+        and returns a tuple (number of entries, list of subdirectories, list of results)
+        concurrency is the maximum number of directories that are read at the same time
+        continue_execution is an optional function that returns False if the scan is interrupted"""
+        self.read_directory = read_directory
+        self.concurrency = concurrency
+        self.continue_execution = continue_execution
+        self.stopped = False
+
+    def keep_going(self):
+        """Returns False if the scan must stop"""
+        if self.stopped:
+            return False
+        return self.continue_execution is None or self.continue_execution()
+
+    def iter_results(self, root_directory, statistics, progress=None, progress_interval=0.1):
+        """Generator that yields the results of all directories below the root directory
+        as soon as they are available. statistics counts the directories and entries.
+        progress is an optional function that is called at least every progress_interval seconds"""
+        results = queue.Queue()
+
+        def run_event_loop():
+            try:
+                asyncio.run(self.scan(root_directory, statistics, results))
+            except Exception as error:
+                logging.info("Error scanning %s: %s", str(root_directory), error)
+            finally:
+                # Tell the consumer that the scan is complete
+                results.put(None)
+
+        self.stopped = False
+        scan_thread = threading.Thread(target=run_event_loop, daemon=True)
+        scan_thread.start()
+
+        try:
+            while True:
+                try:
+                    result = results.get(timeout=progress_interval)
+                except queue.Empty:
+                    result = False
+
+                if progress is not None:
+                    progress()
+
+                if result is None:
+                    break
+                if result:
+                    yield result
+        finally:
+            # If the caller stopped iterating, stop reading new directories
+            self.stopped = True
+            scan_thread.join()
+
+    async def scan(self, root_directory, statistics, results):
+        """Read all directories with a fixed number of workers"""
+        loop = asyncio.get_running_loop()
+        directories = asyncio.Queue()
+        directories.put_nowait(root_directory)
+        statistics.directories += 1
+
+        with ThreadPoolExecutor(self.concurrency) as executor:
+
+            async def worker():
+                while True:
+                    directory = await directories.get()
+                    try:
+                        if self.keep_going():
+                            entry_count, subdirectories, directory_results = \
+                                await loop.run_in_executor(executor, self.read_directory, directory)
+
+                            statistics.entries += entry_count
+                            statistics.directories += len(subdirectories)
+                            for subdirectory in subdirectories:
+                                directories.put_nowait(subdirectory)
+                            for result in directory_results:
+                                results.put(result)
+                    except Exception as error:
+                        logging.info("Error reading %s: %s", str(directory), error)
+                    finally:
+                        directories.task_done()
+
+            workers = [ asyncio.create_task(worker()) for count in range(self.concurrency) ]
+            await directories.join()
+
+            for worker_task in workers:
+                worker_task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
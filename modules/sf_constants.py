@@ -11,6 +11,21 @@ SETTINGS_FILTER_FILENAME         = "FilterFilename"
 SETTINGS_FILENAME_CASE_SENSITIVE = "FilenameCaseSensitive"
 SETTINGS_RECENT_FILENAMES        = "RecentFilenames"
 SETTINGS_REPORT_COLUMNS          = "ReportColumns"
+SETTINGS_SCAN_ENTRY_COUNTS       = "ScanEntryCounts"
+SETTINGS_FILTER_CONTENT          = "FilterContent"
+SETTINGS_CONTENT_REGEX           = "ContentRegularExpression"
+SETTINGS_RECENT_CONTENTS         = "RecentContents"
+SETTINGS_FIND_DUPLICATES         = "FindDuplicates"
+SETTINGS_SCAN_CONCURRENCY        = "ScanConcurrency"
+SETTINGS_FILTER_QUERY            = "FilterQuery"
+SETTINGS_RECENT_QUERIES          = "RecentQueries"
+SETTINGS_TOP_MODE                = "TopMode"
+SETTINGS_TOP_COUNT               = "TopCount"
+SETTINGS_MATCH_LIMIT             = "MatchLimit"
+SETTINGS_BREADTH_FIRST           = "BreadthFirst"
+SETTINGS_WATCH_INTERVAL          = "WatchInterval"
+SETTINGS_MEMORY_BUDGET           = "MemoryBudget"
+SETTINGS_LOG_LEVEL               = "LogLevel"
 
 # Column names in the report
 COL_PATH              = 'Path'
@@ -25,6 +40,12 @@ COL_ACCESSED_DATE     = 'Accessed date'
 COL_IMAGE_TAKEN_DATE  = 'Image taken date'
 COL_IMAGE_WIDTH       = 'Image width'
 COL_IMAGE_HEIGHT      = 'Image height'
+COL_CONTENT_MATCHES   = 'Content matches'
+COL_CONTENT_FIRST_LINE= 'First matching line'
+COL_DUPLICATE_GROUP   = 'Duplicate group'
+COL_FILE_CATEGORY     = 'Category'
+COL_DETECTED_TYPE     = 'Detected type'
+COL_MATCH_SCORE       = 'Match score'
 
 # Default columns
 DEFAULT_COLUMNS = [
@@ -39,7 +60,89 @@ DEFAULT_COLUMNS = [
     (COL_IMAGE_TAKEN_DATE  , False  ),
     (COL_IMAGE_WIDTH       , False  ),
     (COL_IMAGE_HEIGHT      , False  ),
-    (COL_PATH_AND_NAME     , False  ) ]
+    (COL_PATH_AND_NAME     , False  ),
+    (COL_CONTENT_MATCHES   , False  ),
+    (COL_CONTENT_FIRST_LINE, False  ),
+    (COL_DUPLICATE_GROUP   , False  ),
+    (COL_FILE_CATEGORY     , False  ),
+    (COL_DETECTED_TYPE     , False  ),
+    (COL_MATCH_SCORE       , False  ) ]
+
+# Column names in the directory report
+COL_DIRECTORY         = 'Directory'
+COL_DIR_FILE_COUNT    = 'Number of files'
+COL_DIR_TOTAL_SIZE    = 'Total size'
+
+DIRECTORY_REPORT_COLUMNS = [COL_DIRECTORY, COL_DIR_FILE_COUNT, COL_DIR_TOTAL_SIZE]
+
+# Column names in the report of the differences between two search results
+COL_CHANGE            = 'Change'
+COL_OLD_PATH          = 'Old path'
+COL_OLD_FILE_SIZE     = 'Old file size'
+COL_OLD_MODIFIED_DATE = 'Old modified date'
+
+DIFF_REPORT_COLUMNS = [COL_CHANGE, COL_PATH_AND_NAME, COL_FILE_SIZE, COL_MODIFIED_DATE,
+                       COL_OLD_PATH, COL_OLD_FILE_SIZE, COL_OLD_MODIFIED_DATE]
+
+# Columns of the report of the directories that took most time to read
+COL_LISTING_SECONDS     = 'Listing seconds'
+COL_ENTRIES             = 'Entries'
+COL_ERRORS              = 'Errors'
+COL_SUBTREE_SECONDS     = 'Subtree seconds'
+COL_SUBTREE_ENTRIES     = 'Subtree entries'
+COL_SUBTREE_DIRECTORIES = 'Subtree directories'
+
+SCAN_PROFILE_COLUMNS = [COL_PATH, COL_LISTING_SECONDS, COL_ENTRIES, COL_ERRORS,
+                        COL_SUBTREE_SECONDS, COL_SUBTREE_ENTRIES, COL_SUBTREE_DIRECTORIES]
+
+# Kinds of changes between two search results, in the order in which they are shown
+CHANGE_MODIFIED = 'Modified'
+CHANGE_MOVED    = 'Moved'
+CHANGE_REMOVED  = 'Removed'
+CHANGE_ADDED    = 'Added'
+CHANGES         = [CHANGE_MODIFIED, CHANGE_MOVED, CHANGE_REMOVED, CHANGE_ADDED]
+
+# Separates root directories if more than one directory is searched
+ROOT_SEPARATOR = ';'
+
+# Number of directories read at the same time, unless specified otherwise for a directory
+DEFAULT_SCAN_CONCURRENCY = 1
+
+# Modes that only keep the files with the highest value
+TOP_ALL     = ''
+TOP_LARGEST = 'largest'
+TOP_NEWEST  = 'newest'
+TOP_OLDEST  = 'oldest'
+TOP_MODES   = [TOP_LARGEST, TOP_NEWEST, TOP_OLDEST]
+DEFAULT_TOP_COUNT = 100
+
+# Levels of the log file, OFF disables logging
+LOG_LEVEL_OFF = 'OFF'
+LOG_LEVELS = ['DEBUG', 'INFO', 'WARNING', 'ERROR', LOG_LEVEL_OFF]
+DEFAULT_LOG_LEVEL = 'INFO'
+
+# Name of the log file, in the directory where the program is started
+DEFAULT_LOG_FILE = 'log.txt'
+
+# Columns of the phases in the report of --profile, and the number of functions in the report
+PROFILE_PHASE_COLUMNS = ['Phase', 'Count', 'Wall seconds', 'Thread CPU seconds', 'Read system calls',
+                         'Write system calls', 'Peak memory']
+DEFAULT_PROFILE_FUNCTIONS = 40
+
+# Number of seconds between two searches when a search is watched
+DEFAULT_WATCH_INTERVAL = 60
+
+# Number of megabytes the files found may use, more files are kept in temporary files on disk
+DEFAULT_MEMORY_BUDGET = 2048
+
+# Number of directories in the report of the directories that took most time to read
+DEFAULT_HOT_DIRECTORIES = 50
+
+# Extension of files with a saved search result
+SNAPSHOT_EXTENSION = '.sfs'
+
+# Extension of files with a saved search result that is opened with mmap
+MAPPED_RESULT_EXTENSION = '.sfm'
 
 # Date format used for files
 DATE_FMT = '%Y-%m-%d %H:%M:%S'
@@ -0,0 +1,83 @@
+"""sf_content_search defines a class ContentFilter that selects files on their contents.
+The files are read with mmap in a pool of threads or processes, binary files are skipped"""
+
+import logging
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from modules.sf_utilities import iter_in_threads
+
+# Files with a zero byte in the first part of the file are considered binary
+BINARY_CHECK_SIZE = 8192
+
+def search_file(file_name, pattern):
+    """Search a file for a compiled bytes pattern
+    Returns a tuple (number of matches, line number of the first match),
+    or None if the file is binary or cannot be read"""
+    try:
+        with open(file_name, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return (0, None)
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+                if b'\0' in contents[:BINARY_CHECK_SIZE]:
+                    return None
+
+                match_count = 0
+                first_line = None
+                for match in pattern.finditer(contents):
+                    if match_count == 0:
+                        first_line = contents[:match.start()].count(b'\n') + 1
+                    match_count += 1
+
+                return (match_count, first_line)
+    except (OSError, ValueError) as error:
+        logging.info("Error reading contents of %s: %s", file_name, error)
+        return None
+
+class ContentFilter():
+    """Selects files that contain a text or a regular expression"""
+
+    # Maximum number of files that are waiting to be searched
+    max_pending_files = 256
+
+    def __init__(self, text, regular_expression=False, case_sensitive=False, use_processes=False):
+        """The text is encoded as utf-8, case insensitive matching only applies to ASCII characters
+        Searching in processes is faster for complex regular expressions, threads are
+        faster for simple texts since the files do not have to be passed to another process"""
+        self.text = text
+        self.regular_expression = regular_expression
+        self.case_sensitive = case_sensitive
+        self.use_processes = use_processes
+
+        pattern = text if regular_expression else re.escape(text)
+        flags = 0 if case_sensitive else re.IGNORECASE
+        self.pattern = re.compile(pattern.encode('utf-8'), flags | re.MULTILINE)
+
+    def iter_matches(self, selected_files):
+        """Generator that searches the contents of the selected files in parallel
+        and yields the files that contain the pattern, in the order they were received.
+        The number of matches and first line are stored in selected_file.content_matches"""
+        process_pool = ProcessPoolExecutor() if self.use_processes else None
+        searched_files = iter_in_threads(selected_files,
+                                         lambda selected_file: self.search(selected_file, process_pool),
+                                         self.max_pending_files)
+        try:
+            for selected_file, content_matches in searched_files:
+                if content_matches is not None and content_matches[0] > 0:
+                    selected_file.content_matches = content_matches
+                    yield selected_file
+        finally:
+            # The threads wait for the processes, so the threads are stopped first
+            searched_files.close()
+            if process_pool is not None:
+                process_pool.shutdown()
+
+    def search(self, selected_file, process_pool=None):
+        """Returns the number of matches and the first matching line of the file, see search_file
+        The file is searched in the thread of the caller, or in the process pool if it is given"""
+        if process_pool is None:
+            return search_file(str(selected_file.entry), self.pattern)
+        return process_pool.submit(search_file, str(selected_file.entry), self.pattern).result()
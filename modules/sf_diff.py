@@ -0,0 +1,242 @@
+"""sf_diff compares two saved search results, snapshots or mapped results, and finds
+the files that were added, removed, modified or moved between them.
+Both results are read as streams of files sorted on their path and merged like two sorted
+lists, so only the changed files are kept in memory, even for results with millions of files.
+Files are compared on their path relative to the root directory, so a result can also be
+compared with a copy of the same directories at a different place.
+A removed and an added file are the same file that was moved if they have the same inode,
+size and modified time, or the same size and contents, using the hashes of the removed files
+in the hash cache"""
+
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+
+import modules.sf_constants as const
+from modules.sf_search import SelectedFile
+from modules.sf_duplicates import PARTIAL_HASH_SIZE, partial_hash, full_hash
+from modules.sf_snapshot import read_snapshot_header, iter_snapshot_files
+from modules.sf_mapped_result import open_mapped_result
+
+class SavedResult():
+    """Files of a snapshot or a mapped result, read in the order of their path"""
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.mapped_result = None
+        if str(file_name).lower().endswith(const.MAPPED_RESULT_EXTENSION):
+            self.mapped_result = open_mapped_result(file_name)
+            self.root_directories = self.mapped_result.root_directories
+        else:
+            with open(file_name, 'rb') as openfile:
+                header = read_snapshot_header(openfile, file_name)
+            self.root_directories = [ Path(root) for root in header['root_directories'] ]
+
+    def close(self):
+        """Close the mapped result"""
+        if self.mapped_result is not None:
+            self.mapped_result.close()
+            self.mapped_result = None
+
+    def iter_files(self):
+        """Generates (parts of the path, size, modified time, inode) of each file, sorted on path"""
+        if self.mapped_result is not None:
+            return self.mapped_result.iter_sorted_files()
+        return iter_snapshot_files(self.file_name)
+
+    def path(self, saved_file):
+        """Returns the path of the file, with more than one root the root is the first part"""
+        if len(self.root_directories) == 1:
+            return Path(self.root_directories[0], *saved_file[0])
+        return Path(*saved_file[0])
+
+    def selected_file(self, saved_file):
+        """Returns the file as SelectedFile, with the size and modified time that were saved"""
+        parts, size, modified, inode = saved_file
+        stat = os.stat_result((0, inode, 0, 1, 0, 0, size, 0, modified // 10**9, 0),
+                              { 'st_mtime': modified / 1e9, 'st_mtime_ns': modified })
+        return SelectedFile(0, self.path(saved_file).parent, self.path(saved_file), stat, parents=())
+
+def iter_merged(old_files, new_files):
+    """Generates (old file, new file) pairs from two streams of files sorted on path,
+    with None for a file that is only in one of the streams"""
+    old = next(old_files, None)
+    new = next(new_files, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            yield old, None
+            old = next(old_files, None)
+        elif old is None or new[0] < old[0]:
+            yield None, new
+            new = next(new_files, None)
+        else:
+            yield old, new
+            old = next(old_files, None)
+            new = next(new_files, None)
+
+class FileChange():
+    """A file that was added, removed, modified or moved, with the old and the new version
+    as (parts of the path, size, modified time, inode), or None if there is no such version"""
+
+    def __init__(self, change, old, new, old_path, new_path):
+        self.change = change
+        self.old = old
+        self.new = new
+        self.old_path = old_path
+        self.new_path = new_path
+
+    def path(self):
+        """The new path of the file, or the old path if it was removed"""
+        return self.new_path if self.new is not None else self.old_path
+
+    def size(self):
+        """The new size of the file, or the old size if it was removed"""
+        return (self.new or self.old)[1]
+
+    def field(self, column):
+        """Returns a field of the diff report"""
+        if column == const.COL_CHANGE:
+            return self.change
+        if column == const.COL_PATH_AND_NAME:
+            return self.path()
+        if column == const.COL_OLD_PATH:
+            return self.old_path if self.change == const.CHANGE_MOVED else ''
+        if column in (const.COL_FILE_SIZE, const.COL_MODIFIED_DATE):
+            saved_file = self.new
+        else:
+            saved_file = self.old
+        if saved_file is None:
+            return ''
+        if column in (const.COL_FILE_SIZE, const.COL_OLD_FILE_SIZE):
+            return saved_file[1]
+        return datetime.fromtimestamp(saved_file[2] / 1e9).strftime(const.DATE_FMT)
+
+class ResultDiff():
+    """Compares an old and a new saved search result"""
+
+    def __init__(self, old_file_name, new_file_name, hash_cache=None):
+        """If a hash cache is given, files with the same contents are recognized as moved,
+        even if they have a different inode, for instance after a copy to another disk"""
+        self.old_file_name = old_file_name
+        self.new_file_name = new_file_name
+        self.hash_cache = hash_cache
+        self.counts = dict.fromkeys(const.CHANGES, 0)
+
+    def iter_changes(self):
+        """Generates the changed files as FileChange. The modified files are generated while both
+        results are read, the moved, removed and added files at the end, since a moved file can
+        be anywhere in the other result"""
+        logging.info("Comparing %s with %s", self.old_file_name, self.new_file_name)
+        self.counts = dict.fromkeys(const.CHANGES, 0)
+        old_result = SavedResult(self.old_file_name)
+        try:
+            new_result = SavedResult(self.new_file_name)
+        except (OSError, ValueError):
+            old_result.close()
+            raise
+
+        try:
+            removed = []
+            added = []
+            for old, new in iter_merged(old_result.iter_files(), new_result.iter_files()):
+                if new is None:
+                    removed.append(old)
+                elif old is None:
+                    added.append(new)
+                elif old[1] != new[1] or old[2] != new[2]:
+                    yield self.file_change(const.CHANGE_MODIFIED, old, new, old_result, new_result)
+
+            logging.info("%d removed and %d added files, looking for moved files", len(removed), len(added))
+            moved = self.moved_files(removed, added, old_result, new_result)
+            moved_old = { old[0] for old, new in moved }
+            moved_new = { new[0] for old, new in moved }
+
+            for old, new in moved:
+                yield self.file_change(const.CHANGE_MOVED, old, new, old_result, new_result)
+            for old in removed:
+                if old[0] not in moved_old:
+                    yield self.file_change(const.CHANGE_REMOVED, old, None, old_result, new_result)
+            for new in added:
+                if new[0] not in moved_new:
+                    yield self.file_change(const.CHANGE_ADDED, None, new, old_result, new_result)
+        finally:
+            old_result.close()
+            new_result.close()
+
+        logging.info("Changes: %s", self.counts)
+
+    def file_change(self, change, old, new, old_result, new_result):
+        """Returns the change with the paths of both versions and counts it"""
+        self.counts[change] += 1
+        return FileChange(change, old, new,
+                          old_result.path(old) if old is not None else None,
+                          new_result.path(new) if new is not None else None)
+
+    def moved_files(self, removed, added, old_result, new_result):
+        """Returns the (old file, new file) pairs of removed and added files that are the same file"""
+        # Inodes of removed files are reused for new files, so a moved file must also have the same
+        # size and modified time, which are kept when a file is moved
+        by_inode = { old[1:]: old for old in removed if old[3] != 0 }
+        moved = []
+        remaining = []
+        for new in added:
+            old = by_inode.pop(new[1:], None) if new[3] != 0 else None
+            if old is not None:
+                moved.append( (old, new) )
+            else:
+                remaining.append(new)
+
+        if self.hash_cache is None:
+            return moved
+
+        # Only removed files of which the hash is known can be compared on contents
+        matched = { old[0] for old, new in moved }
+        by_hash = {}
+        for old in removed:
+            if old[0] not in matched and old[1] > 0:
+                old_hash = self.hash_cache.get(old_result.selected_file(old), hash_kind(old[1]))
+                if old_hash is not None:
+                    by_hash.setdefault( (old[1], old_hash), old)
+        sizes = { size for size, old_hash in by_hash }
+
+        for new in remaining:
+            if new[1] in sizes:
+                new_hash = self.file_hash(new_result.selected_file(new))
+                old = by_hash.pop( (new[1], new_hash), None)
+                if old is not None:
+                    moved.append( (old, new) )
+
+        self.hash_cache.save()
+        return moved
+
+    def file_hash(self, selected_file):
+        """Returns the hash of the file from the cache, or reads the file, None if it cannot be read"""
+        kind = hash_kind(selected_file.file_size())
+        file_hash = self.hash_cache.get(selected_file, kind)
+        if file_hash is None:
+            try:
+                if kind == 'partial':
+                    file_hash = partial_hash(selected_file.entry, selected_file.file_size())
+                else:
+                    file_hash = full_hash(selected_file.entry)
+            except OSError as error:
+                logging.info("Error hashing %s: %s", str(selected_file.entry), error)
+                return None
+            self.hash_cache.set(selected_file, kind, file_hash)
+        return file_hash
+
+    def report_lines(self):
+        """Generates the lines of a tab separated report with the changed files"""
+        return report_lines(self.iter_changes())
+
+def report_lines(file_changes):
+    """Generates the lines of a tab separated report with the changed files"""
+    yield '\t'.join(const.DIFF_REPORT_COLUMNS)
+
+    for file_change in file_changes:
+        yield '\t'.join([str(file_change.field(column)) for column in const.DIFF_REPORT_COLUMNS])
+
+def hash_kind(size):
+    """The partial hash covers the whole contents of small files, see DuplicateFinder"""
+    return 'partial' if size <= 2*PARTIAL_HASH_SIZE else 'full'
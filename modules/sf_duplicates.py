@@ -0,0 +1,171 @@
+"""sf_duplicates finds files with the same contents in the search result.
+Files are grouped by size first, then by a hash of the first and last part of the file,
+and only the remaining candidates are hashed completely.
+Hashes are kept in a cache on disk, so unchanged files are not read again"""
+
+import hashlib
+import json
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.sf_utilities import app_dir
+
+# Number of bytes at the start and at the end of the file used for the partial hash
+PARTIAL_HASH_SIZE = 4096
+
+# Number of bytes read at once for the full hash
+FULL_HASH_BLOCK_SIZE = 1024 * 1024
+
+def partial_hash(file_name, file_size):
+    """Hash of the first and last part of the file"""
+    file_hash = hashlib.blake2b(digest_size=16)
+    with open(file_name, 'rb') as file:
+        file_hash.update(file.read(PARTIAL_HASH_SIZE))
+        if file_size > PARTIAL_HASH_SIZE:
+            file.seek(max(file_size - PARTIAL_HASH_SIZE, PARTIAL_HASH_SIZE))
+            file_hash.update(file.read(PARTIAL_HASH_SIZE))
+    return file_hash.hexdigest()
+
+def full_hash(file_name):
+    """Hash of the complete contents of the file"""
+    file_hash = hashlib.blake2b(digest_size=16)
+    with open(file_name, 'rb') as file:
+        while True:
+            block = file.read(FULL_HASH_BLOCK_SIZE)
+            if not block:
+                break
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+class HashCache():
+    """Hashes of files stored on disk, a hash is only valid if the size
+    and modification time of the file did not change"""
+
+    def __init__(self, cache_file="hash_cache.json"):
+        self.cache_file = app_dir(cache_file)
+        self.hashes = {}
+        self.load()
+
+    def load(self):
+        """Read the cache from disk"""
+        if self.cache_file.exists() and not self.cache_file.is_dir():
+            try:
+                with open(self.cache_file, 'r') as openfile:
+                    self.hashes = json.load(openfile)
+            except ValueError:
+                logging.info("Hash cache %s is damaged, starting a new cache", str(self.cache_file))
+                self.hashes = {}
+
+    def save(self):
+        """Write the cache to disk"""
+        logging.info("Saving %d hashes to %s", len(self.hashes), str(self.cache_file))
+        with open(self.cache_file, 'w') as outfile:
+            json.dump(self.hashes, outfile)
+
+    def get(self, selected_file, kind):
+        """Returns the partial or full hash from the cache, or None if it is not known"""
+        stat = selected_file.file_stat()
+        cached = self.hashes.get(str(selected_file.entry))
+        if cached is None or cached['size'] != stat.st_size or cached['mtime'] != stat.st_mtime_ns:
+            return None
+        return cached.get(kind)
+
+    def set(self, selected_file, kind, file_hash):
+        """Stores the partial or full hash in the cache"""
+        stat = selected_file.file_stat()
+        cached = self.hashes.get(str(selected_file.entry))
+        if cached is None or cached['size'] != stat.st_size or cached['mtime'] != stat.st_mtime_ns:
+            cached = {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+            self.hashes[str(selected_file.entry)] = cached
+        cached[kind] = file_hash
+
+class DuplicateFinder():
+    """Finds groups of files with the same contents"""
+
+    def __init__(self, cache=None, max_workers=None, continue_execution=None):
+        """continue_execution is an optional function that returns False if the search is interrupted"""
+        self.cache = cache
+        self.max_workers = max_workers
+        self.continue_execution = continue_execution
+
+    def hashes(self, selected_files, kind):
+        """Returns a dictionary with the partial or full hash of each file,
+        files that could not be read are left out"""
+        result = {}
+        to_be_hashed = []
+        for selected_file in selected_files:
+            file_hash = self.cache.get(selected_file, kind) if self.cache else None
+            if file_hash is None:
+                to_be_hashed.append(selected_file)
+            else:
+                result[selected_file] = file_hash
+
+        def hash_file(selected_file):
+            # Allow the user to interrupt the search
+            if self.continue_execution is not None and not self.continue_execution():
+                return None
+            try:
+                if kind == 'partial':
+                    return partial_hash(selected_file.entry, selected_file.file_size())
+                return full_hash(selected_file.entry)
+            except OSError as error:
+                logging.info("Error hashing %s: %s", str(selected_file.entry), error)
+                return None
+
+        # Hashing releases the GIL, so the files are read and hashed in parallel
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            for selected_file, file_hash in zip(to_be_hashed, executor.map(hash_file, to_be_hashed)):
+                if file_hash is not None:
+                    result[selected_file] = file_hash
+                    if self.cache:
+                        self.cache.set(selected_file, kind, file_hash)
+
+        logging.info("%d %s hashes, %d read from disk", len(result), kind, len(to_be_hashed))
+        return result
+
+    def duplicate_groups(self, selected_files):
+        """Returns a list of groups of files with the same contents, largest files first
+        Each file in a group gets the number of its group in selected_file.duplicate_group"""
+
+        # Only files with the same size can be the same, empty files are ignored
+        by_size = defaultdict(list)
+        for selected_file in selected_files:
+            if selected_file.file_size() > 0:
+                by_size[selected_file.file_size()].append(selected_file)
+        candidates = [ group for group in by_size.values() if len(group) > 1 ]
+
+        # Only files with the same start and end can be the same
+        candidates = self.split_groups(candidates, 'partial')
+
+        # Files that are smaller than the parts of the partial hash do not have to be read again
+        small_groups = [ group for group in candidates if group[0].file_size() <= 2*PARTIAL_HASH_SIZE ]
+        large_groups = [ group for group in candidates if group[0].file_size() > 2*PARTIAL_HASH_SIZE ]
+        groups = small_groups + self.split_groups(large_groups, 'full')
+
+        if self.cache:
+            self.cache.save()
+
+        groups.sort( key= lambda group: (-group[0].file_size(), str(group[0].entry)) )
+        for group_number, group in enumerate(groups, start=1):
+            group.sort( key= lambda selected_file: str(selected_file.entry) )
+            for selected_file in group:
+                selected_file.duplicate_group = group_number
+
+        logging.info("%d groups of duplicate files found", len(groups))
+        return groups
+
+    def split_groups(self, groups, kind):
+        """Splits each group in groups of files with the same hash,
+        only groups with more than one file are returned"""
+        file_hashes = self.hashes([ selected_file for group in groups for selected_file in group ], kind)
+
+        result = []
+        for group in groups:
+            by_hash = defaultdict(list)
+            for selected_file in group:
+                if selected_file in file_hashes:
+                    by_hash[file_hashes[selected_file]].append(selected_file)
+            result.extend( new_group for new_group in by_hash.values() if len(new_group) > 1 )
+
+        return result
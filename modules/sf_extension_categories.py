@@ -0,0 +1,32 @@
+"""sf_extension_categories maps file extensions to a category, such as image or archive.
+Generated by design/generate_extension_categories.py from design/list_of_extensions.py,
+do not edit this file"""
+
+# Extensions without leading dot, in lower case, per category
+CATEGORIES = {
+    '3d': frozenset({'3dm', '3dmf', '3ds', '3mf', 'ac', 'an8', 'aoi', 'b3d', 'bdl4', 'bfres', 'blend', 'block', 'bmd3', 'brres', 'c4d', 'cal3d', 'ccp4', 'cfl', 'core3d', 'ctm', 'dae', 'dpm', 'fact', 'fbx', 'g', 'glb', 'glm', 'gltf', 'hec', 'io', 'iob', 'jas', 'jmesh', 'ldr', 'lwo', 'lws', 'lxf', 'lxo', 'm3d', 'ma', 'mb', 'md2', 'md3', 'md5', 'mdx', 'mesh', 'mimodel', 'miobject', 'miparticle', 'mm3d', 'mpd', 'mpo', 'nif', 'obj', 'ogex', 'ply', 'pov', 'prc', 'prt', 'r3d', 'rwx', 'sia', 'sldasm', 'sldprt', 'smd', 'stl', 'u3d', 'usd', 'usda', 'usdc', 'usdz', 'vim', 'vrml97', 'vue', 'vwx', 'w3d', 'wings', 'x', 'z3d', 'zbmx'}),
+    'archive': frozenset({'7z', 'ace', 'alz', 'appx', 'arc', 'arj', 'at3', 'b', 'ba', 'bkf', 'bz2', 'c4', 'cab', 'cals', 'ddz', 'deb', 'dn', 'dpe', 'ecab', 'esd', 'ezip', 'flipchart', 'fun', 'gbs', 'ggp', 'gho', 'ghs', 'gsc', 'gz', 'gzip', 'ipg', 'lawrence', 'lbr', 'lqr', 'lz', 'lzh', 'lzma', 'lzo', 'lzx', 'mbw', 'mpq', 'nl2pkg', 'nth', 'oar', 'osg', 'osk', 'osr', 'osz', 'paf', 'pak', 'par2', 'pea', 'pk3', 'pk4', 'pnj', 'pxz', 'pyk', 'rag', 'rags', 'rar', 'rax', 'rbxl', 'rbxlx', 'rbxm', 'rbxmx', 'rpm', 'sb', 'sea', 'sen', 'sf2', 'sf3', 'sf4', 'sis', 'sisx', 'sitx', 'sq', 'swm', 'szs', 'tar', 'tb', 'tib', 'uha', 'uue', 'viv', 'vol', 'vsa', 'wax', 'whl', 'wim', 'xz', 'z', 'zim', 'zip', 'zoo'}),
+    'audio': frozenset({'16svx', '8svx', 'aac', 'abc', 'ac3', 'aif', 'aifc', 'aiff', 'aimppl', 'alc', 'alp', 'als', 'amr', 'ape', 'ast', 'asx', 'atmos', 'au', 'audio', 'aup', 'aup3', 'aw', 'band', 'bcwav', 'brstm', 'btm', 'bwf', 'cau', 'cdda', 'cel', 'cpr', 'cust', 'cwav', 'cwp', 'darms', 'dff', 'dmkit', 'drm', 'dsf', 'dts', 'dtshd', 'dtsma', 'dwd', 'ens', 'etf', 'flac', 'flm', 'flp', 'ftm', 'gp', 'grir', 'gsm', 'gym', 'it', 'jam', 'kern', 'la', 'logic', 'ly', 'm3u', 'm4a', 'mei', 'metadata', 'mid', 'midi', 'mmp', 'mmr', 'mod', 'mp1', 'mp2', 'mp3', 'mpc', 'mscx', 'mscz', 'mt2', 'mus', 'musx', 'mx6hs', 'mxl', 'niff', 'npr', 'nsf', 'off', 'ofr', 'ofs', 'ogg', 'omf', 'omfi', 'opus', 'ots', 'pac', 'pls', 'psf', 'ptb', 'ptf', 'pts', 'ptx', 'pvd', 'ra', 'ram', 'reapeaks', 'rin', 'rka', 'rmj', 'rpp', 'rpp-bak', 's3m', 'ses', 'sfk', 'sfl', 'shn', 'sib', 'sid', 'smdl', 'smp', 'snd', 'sng', 'spc', 'spx', 'stf', 'swa', 'syn', 'tak', 'thd', 'tta', 'txm', 'ust', 'vcls', 'vgm', 'voc', 'vox', 'vpr', 'vqf', 'vsq', 'vsqx', 'wav', 'wma', 'wv', 'xm', 'xpl', 'xspf', 'ym', 'zpl'}),
+    'cad': frozenset({'3dxml', 'acp', 'aec', 'ar', 'bim', 'brd', 'brep', 'bsdl', 'c3d', 'c3p', 'cad', 'catdrawing', 'catpart', 'catprocess', 'catproduct', 'ccc', 'ccm', 'ccs', 'cdl', 'cgr', 'cir', 'ckd', 'ckt', 'co', 'cpf', 'def', 'dft', 'dgk', 'dgn', 'dmt', 'dotxsi', 'drw', 'dwb', 'dwf', 'dwg', 'dxf', 'easm', 'edif', 'edrw', 'emb', 'eprt', 'escpcb', 'escsch', 'esw', 'excellon', 'exp', 'f3d', 'fcstd', 'fm', 'fmz', 'fsdb', 'gdsii', 'grb', 'gri', 'gro', 'hex', 'iam', 'icd', 'idw', 'ifc', 'iges', 'ipn', 'ipt', 'jt', 'lef', 'mcd', 'mdg', 'model', 'ms12', 'oasis', 'ocd', 'openaccess', 'par', 'pipe', 'pln', 'psfxl', 'psm', 'psmodel', 'pwi', 'pyt', 'rfa', 'rlf', 'rvm', 'rvt', 'rxf', 's12', 's19', 'scad', 'scdoc', 'sdf', 'slddrw', 'spef', 'spi', 'srec', 'sst2', 'std', 'step', 'stil', 'sv', 'tct', 'tcw', 'tlf', 'unv', 'upf', 'v', 'vc6', 'vcd', 'vhd', 'vhdl', 'vlm', 'vs', 'wgl', 'x_b', 'x_t', 'xe', 'zofzproj'}),
+    'code': frozenset({'ada', 'adb', 'ads', 'ahk', 'applescript', 'as', 'asm', 'au3', 'awk', 'bas', 'bat', 'bb', 'bmx', 'c', 'cbl', 'cbp', 'cc', 'cia', 'class', 'clj', 'cljs', 'cls', 'cmd', 'cob', 'coffee', 'cpp', 'cs', 'csproj', 'cxx', 'd', 'dba', 'dbpro123', 'e', 'ebuild', 'efs', 'egg', 'el', 'erb', 'f', 'f77', 'f90', 'for', 'frm', 'frx', 'fth', 'ftn', 'ged', 'gm6', 'gmd', 'gmk', 'gml', 'go', 'h', 'hpp', 'hs', 'hta', 'hxx', 'i', 'ibi', 'ici', 'ijs', 'inc', 'ino', 'ipynb', 'itcl', 'java', 'js', 'jsfl', 'jsx', 'kt', 'l', 'lgt', 'lisp', 'lua', 'm', 'm4', 'ml', 'mrc', 'msqr', 'n', 'ncf', 'nqp', 'nuc', 'nud', 'nut', 'o', 'p', 'pas', 'pde', 'php', 'php3', 'php4', 'php5', 'phps', 'phtml', 'piv', 'pl', 'pl1', 'pli', 'pm', 'pol', 'pp', 'prg', 'pro', 'ps1', 'ps1xml', 'psc1', 'psd1', 'psm1', 'py', 'pyc', 'pyi', 'pyo', 'pyw', 'pyx', 'r', 'raku', 'rakudoc', 'rakumod', 'rakutest', 'rb', 'rc', 'rc2', 'rdp', 'red', 'reds', 'resx', 'rkt', 'rktl', 'rs', 's', 'sb2', 'sb3', 'scala', 'sce', 'sci', 'scm', 'scpt', 'scptd', 'sd7', 'sdl', 'sh', 'skb', 'skc', 'skd', 'skf', 'skg', 'ski', 'skk', 'skm', 'sko', 'skp', 'skq', 'sks', 'skt', 'skz', 'sln', 'spin', 'sprite3', 'spwn', 'stk', 'swg', 'syjs', 'sypy', 'tcl', 'tns', 'ts', 'tsx', 'vap', 'vb', 'vbg', 'vbp', 'vbproj', 'vbs', 'vcproj', 'vdproj', 'vip', 'xaml', 'xq', 'xsl', 'y'}),
+    'configuration': frozenset({'cfg', 'conf', 'css', 'ini', 'plist', 'properties', 'reg', 'toml', 'tpl', 'xslt'}),
+    'data': frozenset({'ab1', 'acq', 'adicht', 'bam', 'bcf', 'bci2000', 'bed', 'bkr', 'brik', 'bufr', 'caf', 'cbf', 'cbfx', 'cdf', 'cfwb', 'cgns', 'cml', 'cram', 'csdm', 'dcm', 'ddbj', 'dicom', 'dif', 'dted', 'dx', 'e00', 'eas3', 'ebf', 'ebfx', 'ecgml', 'edf', 'edf+', 'embl', 'eossa', 'fasta', 'fastq', 'fef', 'fits', 'fmf', 'g6', 'gcproj', 'gdf', 'genbank', 'geojson', 'geotiff', 'gff', 'gii', 'gms', 'gpx', 'grib', 'gtf', 'h4', 'h5', 'harwell-boeing', 'hdf', 'hdr', 'head', 'hitran', 'hl7', 'hl7aecg', 'ifds', 'ifx', 'irock', 'itn', 'jdx', 'json', 'kml', 'maf', 'mfer', 'mgh', 'mgz', 'minc', 'mml', 'mnc', 'mol', 'mseed', 'mxd', 'myo', 'myob', 'nasa-ames', 'ncbi', 'netcdf', 'nexml', 'nexus', 'nifti', 'nii', 'nwk', 'odf', 'ofx', 'openxdf', 'ov2', 'phd', 'qif', 'root', 's6', 'sac', 'sam', 'sbml', 'scf', 'scp-ecg', 'sd', 'sdxf', 'seed', 'segy', 'sff', 'shp', 'sigif', 'silo', 'sra', 'stockholm', 'swiss-prot', 'sxm', 'tax', 'topojson', 'tsv', 'vcf', 'wfdb', 'win', 'win32', 'xdf', 'xdt', 'xml', 'xsd', 'yaml', 'yml', 'ynab'}),
+    'database': frozenset({'4db', '4dd', '4dindx', '4dindy', '4dr', 'accdb', 'accde', 'adp', 'adt', 'apr', 'avro', 'box', 'chml', 'daf', 'db', 'dbf', 'dta', 'eap', 'ess', 'fdb', 'fp', 'fp3', 'fp5', 'fp7', 'gdb', 'gtable', 'kexi', 'kexic', 'kexis', 'ldb', 'lirs', 'mda', 'mdb', 'mde', 'mdf', 'myd', 'myi', 'ntf', 'nv2', 'odb', 'ora', 'orc', 'parquet', 'pcontact', 'pdb', 'pdi', 'pdx', 'rec', 'rel', 'sdb', 'sql', 'sqlite', 'udl', 'wadata', 'waindx', 'wajournal', 'wamodel', 'wdb', 'wmdb'}),
+    'diskimage': frozenset({'adf', 'adz', 'b5t', 'b6t', 'bwt', 'c2d', 'cdi', 'cif', 'cow', 'cue', 'd64', 'daa', 'dmg', 'dms', 'dsk', 'ffppkg', 'hdd', 'img', 'iso', 'lemonapp', 'mds', 'nrg', 'nvram', 'ova', 'pvs', 'qcow', 'qcow2', 'qed', 'sav', 'sdi', 'vbox-extpack', 'vdi', 'vfd', 'vmc', 'vmdk', 'vmem', 'vmsd', 'vmsn', 'vmss', 'vmtm', 'vmx', 'vmxf', 'vsv', 'vud'}),
+    'document': frozenset({'0', '1st', '3dt', '600', '602', 'abw', 'acl', 'afp', 'ami', 'ans', 'aty', 'ave', 'aww', 'bib', 'cag', 'cap', 'ccf', 'chp', 'cwk', 'dbk', 'dita', 'doc', 'docm', 'docx', 'dot', 'dotx', 'dtp', 'dvi', 'eml', 'enl', 'epub', 'ezw', 'fdx', 'fes', 'ftx', 'gdoc', 'gdraw', 'hwp', 'hwpml', 'ildoc', 'indd', 'info', 'lwp', 'mbox', 'mbp', 'mcf', 'mcw', 'me', 'mgmf', 'mm', 'mnb', 'mobi', 'mpp', 'msg', 'neis', 'nq', 'nt', 'odm', 'odoc', 'odt', 'omm', 'org', 'osheet', 'ost', 'ott', 'pages', 'pap', 'pcl', 'pdax', 'pdf', 'pdr', 'per', 'pld', 'pmd', 'ppp', 'ps', 'pst', 'pub', 'quox', 'qxd', 'radix-64', 'ris', 'rpt', 'rtf', 'sc2', 'scd', 'sdw', 'sla', 'snp', 'stw', 'sty', 'sxw', 'tex', 'tpc', 'troff', 'uof', 'uoml', 'vgr', 'via', 'vsdx', 'wpd', 'wps', 'wpt', 'wrd', 'wrf', 'wri', 'xps', 'xsl-fo', 'zave'}),
+    'executable': frozenset({'8bf', 'a', 'apk', 'app', 'bac', 'bpl', 'bundle', 'coff', 'com', 'dcu', 'dll', 'dol', 'ear', 'elf', 'exe', 'ipa', 'jar', 'jeff', 'ko', 'lib', 'list', 'mach-o', 'msi', 'nlm', 'ocx', 'rll', 's1es', 'so', 'tlb', 'vbx', 'war', 'xap', 'xbe', 'xcoff', 'xex', 'xpi'}),
+    'font': frozenset({'abf', 'afm', 'bdf', 'bmf', 'brfnt', 'eot', 'fnt', 'fon', 'fond', 'mgf', 'otf', 'pfa', 'pfb', 'pfm', 'sfd', 'snf', 'tdf', 'tfm', 'ttc', 'ttf', 'ufo', 'woff', 'woff2'}),
+    'game': frozenset({'078', '32x', 'a26', 'a52', 'a78', 'bol', 'bsp', 'cgb', 'chr', 'cps', 'dbpf', 'deh', 'dem', 'diva', 'dmo', 'dsg', 'dsi', 'escape', 'esm', 'esp', 'eur', 'fc#', 'fds', 'fig', 'fontdat', 'frz', 'gb', 'gba', 'gbc', 'gbx', 'gcf', 'gcm', 'gg', 'grp', 'hambu', 'he0', 'he2', 'he4', 'hl2', 'itm', 'j64', 'jag', 'jap', 'jst', 'lip', 'lmp', 'lnx', 'loc', 'love', 'map', 'mca', 'mcaddon', 'mcfunction', 'mcmeta', 'mcpack', 'mcr', 'mctemplate', 'mcworld', 'mdl', 'min', 'n64', 'nbs', 'nbt', 'nds', 'nes', 'ngc', 'ngp', 'npc', 'oec', 'osb', 'osc', 'osf2', 'osu', 'osz2', 'p3d', 'pbo', 'pce', 'pj', 'pk2', 'pkg', 'plagueinc', 'pod', 'prison', 'pss', 'rct', 'rep', 'sc4lot', 'sc4model', 'scbtex', 'scskin', 'scworld', 'sfc', 'sg', 'sgm', 'simcity', 'smc', 'sms', 'smzip', 'sna', 'solitairetheme8', 'sqf', 'sqm', 'srm', 't64', 'tap', 'tzx', 'u', 'u64', 'uax', 'umx', 'unr', 'upk', 'usa', 'usld', 'usx', 'ut2', 'ut3', 'utx', 'uxx', 'v64', 'vec', 'vmf', 'vmt', 'vpk', 'vvvvvv', 'wad', 'wbfs', 'wdf', 'ws', 'wsc', 'z5', 'z64', 'z80', 'zst'}),
+    'image': frozenset({'3dmlw', 'act', 'ai', 'amf', 'art', 'arw', 'ase', 'awg', 'blp', 'bmp', 'bti', 'bw', 'cd5', 'cdr', 'cgm', 'cit', 'clip', 'cmx', 'cpl', 'cpt', 'cr2', 'cr3', 'dds', 'dib', 'djvu', 'dng', 'dp', 'drawio', 'e2d', 'egt', 'emf', 'ep', 'eps', 'exif', 'fs', 'gbr', 'gif', 'gpl', 'grf', 'heic', 'heif', 'icb', 'icc', 'icm', 'icns', 'ico', 'iff', 'ilbm', 'int', 'jfif', 'jng', 'jp2', 'jpeg', 'jpg', 'jps', 'kra', 'lbm', 'max', 'miff', 'mng', 'msp', 'nef', 'nitf', 'odg', 'orf', 'otb', 'pal', 'pbm', 'pc1', 'pc2', 'pc3', 'pcf', 'pct', 'pcx', 'pdd', 'pdn', 'pgf', 'pgm', 'pi1', 'pi2', 'pi3', 'pict', 'pix', 'png', 'pnm', 'pns', 'ppm', 'procreate', 'psb', 'psd', 'psp', 'px', 'pxm', 'pxr', 'qfx', 'raf', 'raw', 'renderman', 'rgb', 'rle', 'rw2', 'sct', 'sgi', 'svg', 'sxd', 'targa', 'tga', 'tgax', 'tif', 'tiff', 'v2d', 'vda', 'vdoc', 'vnd', 'vsd', 'vst', 'vtf', 'webp', 'wmf', 'wrl', 'x3d', 'xar', 'xbm', 'xcf', 'xpm', 'zif'}),
+    'other': frozenset({'!ut', 'alias', 'ani', 'appref-ms', 'asciidoc', 'axd', 'bak', 'bca', 'bin', 'bk', 'cex', 'col', 'crdownload', 'credx', 'cur', 'dat', 'ddb', 'ddi', 'desktop', 'diff', 'dupx', 'ftmb', 'fx', 'ga3', 'hlp', 'igc', 'inf', 'jnlp', 'kcl', 'kmc', 'ktr', 'lnk', 'lsm', 'melmod', 'melsave', 'midata', 'miframes', 'milanguage', 'nal', 'narc', 'oer', 'opdownload', 'pa', 'part', 'partial', 'pif', 'por', 'pseudo-pipeline', 'pseudo-pipelines', 'restructuredtext', 'rise', 'scr', 'smes', 'sym', 'szh', 'temp', 'tmp', 'topc', 'url', 'vdhx', 'webloc', 'xlf', 'xmc', 'yni', 'zed', 'zone'}),
+    'presentation': frozenset({'gslides', 'key', 'keynote', 'nb', 'nbp', 'odp', 'otp', 'pez', 'pot', 'pps', 'ppt', 'pptx', 'prz', 'sdd', 'shf', 'show', 'shw', 'slp', 'sspss', 'sti', 'sxi', 'thmx', 'watch'}),
+    'security': frozenset({'axx', 'bpw', 'cer', 'crt', 'der', 'eea', 'gxk', 'kdb', 'kdbx', 'kode', 'nsign', 'nsigne', 'p12', 'p7b', 'p7c', 'pem', 'pfx', 'ppk', 'ssh', 'tc'}),
+    'spreadsheet': frozenset({'123', 'ab2', 'ab3', 'aws', 'bcsv', 'cell', 'clf', 'csv', 'gnumeric', 'gsheet', 'lcw', 'numbers', 'ods', 'qpw', 'sdc', 'slk', 'stc', 'sxc', 'tab', 'vc', 'wk1', 'wk3', 'wk4', 'wks', 'wq1', 'xlk', 'xlr', 'xls', 'xlsb', 'xlsm', 'xlsx', 'xlt', 'xltm', 'xlw'}),
+    'text': frozenset({'asc', 'cnf', 'log', 'md', 'rst', 'text', 'txt'}),
+    'video': frozenset({'3gp', 'aaf', 'asf', 'ass', 'avchd', 'avi', 'bik', 'braw', 'cam', 'collab', 'drp', 'dvr-ms', 'fcp', 'fla', 'flr', 'flv', 'imoviemobile', 'imovieproj', 'kdenlive', 'm2ts', 'm4v', 'mkv', 'motn', 'mov', 'mp4', 'mpe', 'mpeg', 'mpeg-1', 'mpeg-2', 'mpeg-4', 'mpg', 'mswmm', 'mts', 'mxf', 'noa', 'nsv', 'pds', 'ppj', 'prproj', 'rm', 'roq', 'smi', 'smk', 'sol', 'srt', 'ssa', 'str', 'sub', 'suf', 'svi', 'swf', 'thp', 'veg', 'veg-bak', 'vpj', 'vproj', 'vtt', 'webm', 'wfp', 'wlmp', 'wmv', 'wrap', 'wtv', 'wve', 'yuv'}),
+    'web': frozenset({'asp', 'aspx', 'atom', 'bml', 'cfm', 'cgi', 'dtd', 'htm', 'html', 'ihtml', 'jsonld', 'jsp', 'kprx', 'las', 'lasso', 'lassoapp', 'maff', 'markdown', 'met', 'metalink', 'mht', 'mhtml', 'rss', 'se', 'shtml', 'stm', 'xht', 'xhtml'}),
+}
+
+# Category of each extension
+EXTENSION_CATEGORY = { extension: category for category, extensions in CATEGORIES.items()
+                       for extension in extensions }
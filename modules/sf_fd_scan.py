@@ -0,0 +1,62 @@
+"""sf_fd_scan supports the scan of a directory tree relative to the file descriptors of the
+directories, on systems where os.scandir accepts a file descriptor, such as Linux.
+Each directory is opened relative to its parent, and entries are tested with stat relative
+to their directory, so the kernel does not resolve every part of the full path again for each
+entry. The full path is only built for the entries that are selected"""
+
+import os
+
+# True if directories can be read and opened relative to the file descriptor of their parent
+FD_SCAN_SUPPORTED = os.scandir in os.supports_fd and os.open in os.supports_dir_fd
+
+# Flags to open a directory for reading its entries
+DIRECTORY_FLAGS = os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0) | getattr(os, 'O_CLOEXEC', 0)
+
+class DirectoryEntry():
+    """Entry of a directory that was read with a file descriptor, it has the name, is_dir,
+    is_symlink and stat of a Path, but the path is only built when it is converted to a string"""
+
+    __slots__ = ('directory', 'dir_entry')
+
+    def __init__(self, directory, dir_entry):
+        """directory is the path of the directory as string, dir_entry the os.DirEntry"""
+        self.directory = directory
+        self.dir_entry = dir_entry
+
+    @property
+    def name(self):
+        """Name of the entry"""
+        return self.dir_entry.name
+
+    @property
+    def path(self):
+        """Full path of the entry as string"""
+        return os.path.join(self.directory, self.dir_entry.name)
+
+    def is_dir(self):
+        """True if the entry is a directory or a link to a directory, usually without a stat"""
+        return self.dir_entry.is_dir()
+
+    def is_symlink(self):
+        """True if the entry is a symbolic link"""
+        return self.dir_entry.is_symlink()
+
+    def stat(self):
+        """Result of stat on the entry, relative to the file descriptor of the directory"""
+        return self.dir_entry.stat()
+
+    def __fspath__(self):
+        return self.path
+
+    def __str__(self):
+        return self.path
+
+def open_directory(name, dir_fd=None):
+    """Returns a file descriptor and an iterator over the entries of the directory
+    If dir_fd is given, name is relative to that directory. The caller closes both"""
+    fd = os.open(name, DIRECTORY_FLAGS, dir_fd=dir_fd)
+    try:
+        return fd, os.scandir(fd)
+    except OSError:
+        os.close(fd)
+        raise
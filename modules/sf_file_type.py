@@ -0,0 +1,141 @@
+"""sf_file_type detects the type of a file from the first bytes of its contents,
+for files of which the extension is wrong or missing.
+Detected types are named after the usual extension of the type, so the category of the
+type can be looked up in sf_extension_categories. Types are kept in a cache on disk,
+so unchanged files are not read again"""
+
+import logging
+
+from modules.sf_duplicates import HashCache
+from modules.sf_utilities import iter_in_threads
+
+# Number of bytes read from the start of the file
+SNIFF_SIZE = 512
+
+# Offset, signature and type, the more specific signatures first
+SIGNATURES = [
+    (0,   b'\xff\xd8\xff',                 'jpg'),
+    (0,   b'\x89PNG\r\n\x1a\n',            'png'),
+    (0,   b'GIF87a',                       'gif'),
+    (0,   b'GIF89a',                       'gif'),
+    (0,   b'II*\x00\x10\x00\x00\x00CR',    'cr2'),
+    (0,   b'II*\x00',                      'tif'),
+    (0,   b'MM\x00*',                      'tif'),
+    (0,   b'BM',                           'bmp'),
+    (0,   b'8BPS',                         'psd'),
+    (0,   b'\x00\x00\x01\x00',             'ico'),
+    (0,   b'%PDF',                         'pdf'),
+    (0,   b'%!PS',                         'ps'),
+    (0,   b'{\\rtf',                       'rtf'),
+    (0,   b'\x1f\x8b',                     'gz'),
+    (0,   b'BZh',                          'bz2'),
+    (0,   b'\xfd7zXZ\x00',                 'xz'),
+    (0,   b'7z\xbc\xaf\x27\x1c',           '7z'),
+    (0,   b'Rar!\x1a\x07',                 'rar'),
+    (257, b'ustar',                        'tar'),
+    (0,   b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'doc'),
+    (0,   b'SQLite format 3\x00',          'sqlite'),
+    (0,   b'\x7fELF',                      'elf'),
+    (0,   b'MZ',                           'exe'),
+    (0,   b'\xca\xfe\xba\xbe',             'class'),
+    (0,   b'ID3',                          'mp3'),
+    (0,   b'\xff\xfb',                     'mp3'),
+    (0,   b'\xff\xf3',                     'mp3'),
+    (0,   b'fLaC',                         'flac'),
+    (0,   b'OggS',                         'ogg'),
+    (0,   b'\x1aE\xdf\xa3',                'mkv'),
+    (0,   b'\x00\x01\x00\x00\x00',         'ttf'),
+    (0,   b'OTTO',                         'otf'),
+    (0,   b'wOFF',                         'woff'),
+    (0,   b'<?xml',                        'xml') ]
+
+# Subtypes of RIFF files, at offset 8
+RIFF_TYPES = { b'WEBP': 'webp', b'WAVE': 'wav', b'AVI ': 'avi' }
+
+# Brands of ISO media files, at offset 8, all other brands are reported as mp4
+FTYP_BRANDS = { b'heic': 'heic', b'heix': 'heic', b'mif1': 'heic', b'msf1': 'heic', b'avif': 'avif',
+                b'crx ': 'cr3', b'qt  ': 'mov', b'M4A ': 'm4a', b'3gp4': '3gp', b'3gp5': '3gp' }
+
+# Name of the first part in zip files of office documents
+ZIP_DOCUMENTS = [ (b'word/', 'docx'), (b'xl/', 'xlsx'), (b'ppt/', 'pptx'),
+                  (b'application/vnd.oasis.opendocument.text', 'odt'),
+                  (b'application/vnd.oasis.opendocument.spreadsheet', 'ods'),
+                  (b'application/vnd.oasis.opendocument.presentation', 'odp') ]
+
+def detect_file_type(header):
+    """Returns the type of a file with these first bytes, or an empty string if it is unknown"""
+    if header.startswith(b'PK\x03\x04'):
+        for marker, file_type in ZIP_DOCUMENTS:
+            if marker in header:
+                return file_type
+        return 'zip'
+
+    if header.startswith(b'RIFF'):
+        return RIFF_TYPES.get(header[8:12], '')
+
+    if header[4:8] == b'ftyp':
+        return FTYP_BRANDS.get(header[8:12], 'mp4')
+
+    for offset, signature, file_type in SIGNATURES:
+        if header.startswith(signature, offset):
+            return file_type
+
+    # Web pages and text files have no signature
+    start = header.lstrip()[:15].lower()
+    if start.startswith(b'<!doctype html') or start.startswith(b'<html'):
+        return 'html'
+    if header and b'\x00' not in header:
+        try:
+            # The last character may be cut off
+            header.decode('utf-8')
+            return 'txt'
+        except UnicodeDecodeError as error:
+            if error.start >= len(header) - 3:
+                return 'txt'
+    return ''
+
+def sniff_file_type(file_name):
+    """Returns the type of the file from its first bytes, or an empty string if it is unknown"""
+    try:
+        with open(file_name, 'rb') as file:
+            return detect_file_type(file.read(SNIFF_SIZE))
+    except OSError as error:
+        logging.info("Error reading type of %s: %s", file_name, error)
+        return ''
+
+class FileTypeCache(HashCache):
+    """Detected types of files stored on disk, a type is only valid if the size
+    and modification time of the file did not change"""
+
+    def __init__(self, cache_file="file_type_cache.json"):
+        super().__init__(cache_file)
+
+class FileTypeDetector():
+    """Detects the types of files, using the cache for files that did not change"""
+
+    # Maximum number of files that are waiting to be read
+    max_pending_files = 256
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else FileTypeCache()
+
+    def file_type(self, selected_file):
+        """Returns the type of the file and stores it in selected_file.detected_type"""
+        if selected_file.detected_type is None:
+            try:
+                file_type = self.cache.get(selected_file, 'type')
+                if file_type is None:
+                    file_type = sniff_file_type(str(selected_file.entry))
+                    self.cache.set(selected_file, 'type', file_type)
+            except OSError as error:
+                logging.info("Error reading type of %s: %s", str(selected_file.entry), error)
+                file_type = ''
+            selected_file.detected_type = file_type
+
+        return selected_file.detected_type
+
+    def detect_file_types(self, selected_files):
+        """Detect the types of all files in parallel threads and save the cache"""
+        for selected_file, file_type in iter_in_threads(selected_files, self.file_type, self.max_pending_files):
+            pass
+        self.cache.save()
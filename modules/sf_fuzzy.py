@@ -0,0 +1,72 @@
+"""sf_fuzzy finds the files of which the name is most similar to a text, allowing typing
+errors and words in a different order. The names are compared on the groups of three
+characters (trigrams) of each word, and only the best matches are kept in a heap.
+The files of an earlier search are used, so the disk is not searched again"""
+
+import heapq
+import os
+import re
+
+SEPARATORS = re.compile(r'[\W_]+')
+
+def padded_words(text):
+    """The words of the text in lower case, with two spaces before and one space after each word,
+    so the trigrams at the start and the end of a word are recognized"""
+    return '  ' + SEPARATORS.sub('   ', text.lower()).strip() + ' '
+
+def trigrams(text):
+    """The set of trigrams of the words in the text, so the order of the words does not matter
+    Trigrams that span two words are left out"""
+    padded = padded_words(text)
+    return { padded[position:position+3] for position in range(len(padded) - 2)
+             if not padded.endswith('  ', position, position+3) }
+
+class FuzzyMatcher():
+    """Scores names on their similarity with the text"""
+
+    def __init__(self, text):
+        self.text = text.lower()
+        self.trigrams = trigrams(text)
+
+    def score(self, name):
+        """Similarity between 0 and 1, names that contain the text score at least 0.5,
+        and 1 if the name is equal to the text
+        The extension is ignored, unless the text contains an extension itself"""
+        name = name.lower()
+        if '.' not in self.text:
+            name = os.path.splitext(name)[0]
+
+        if self.text and self.text in name:
+            return 0.5 + 0.5 * len(self.text) / len(name)
+
+        # Count the trigrams of the name that are in the text, without building a set
+        # for each name. Each separator between two words adds two trigrams that span both words
+        padded = padded_words(name)
+        common = sum([ padded[position:position+3] in self.trigrams
+                       for position in range(len(padded) - 2) ])
+        if common == 0:
+            return 0.0
+        name_trigram_count = len(padded) - 2 - 2 * padded.count('   ')
+
+        # Dice coefficient, weighted towards the trigrams of the text,
+        # so long names are not penalized too much
+        return min(1.0, 0.5 * common / len(self.trigrams) +
+                        0.5 * 2 * common / (len(self.trigrams) + name_trigram_count))
+
+    def best(self, items, count, name=lambda item: item.entry.name):
+        """Returns the count items with the highest score as (score, item) tuples,
+        the best match first. Items that do not share a trigram with the text are left out"""
+        heap = []
+        for number, item in enumerate(items):
+            score = self.score(name(item))
+            if score <= 0:
+                continue
+
+            entry = (score, -number, item)
+            if len(heap) < count:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+
+        return [ (score, item) for score, number, item in
+                 sorted(heap, key= lambda entry: entry[:2], reverse=True) ]
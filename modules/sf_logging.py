@@ -0,0 +1,92 @@
+"""sf_logging sends the log records through a queue to a background thread that writes them
+to the log file, so the search never waits for the disk to log a message.
+The level is one of const.LOG_LEVELS. With level OFF, logging is disabled with logging.disable,
+so a call to logging.info costs a single comparison and no file is created.
+timed_span logs the wall and CPU time of a phase, such as the scan, the sort, building the tree
+or writing the report, as one line of key=value fields that can be filtered with grep"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import time
+from contextlib import contextmanager, ExitStack
+
+import modules.sf_constants as const
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(filename)s %(lineno)03d %(threadName)s] %(message)s'
+
+# Thread that writes the records in the queue to the log file
+listener = None
+
+# Functions that are called with the phase and the fields of each span, and return a context
+# manager that is entered around the block, for instance to profile the phases
+span_listeners = []
+
+def setup_logging(file_name=const.DEFAULT_LOG_FILE, level_name=const.DEFAULT_LOG_LEVEL):
+    """Log to the file from a background thread, instead of to the earlier handlers of the root logger
+    The file is only created when the first record is written"""
+    global listener
+    stop_logging()
+
+    log_queue = queue.SimpleQueue()
+    file_handler = logging.FileHandler(file_name, 'w', encoding='utf-8', delay=True)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    set_log_level(level_name)
+
+    listener.start()
+    atexit.unregister(stop_logging)
+    atexit.register(stop_logging)
+
+def set_log_level(level_name):
+    """Set the level of the root logger to one of const.LOG_LEVELS"""
+    if level_name == const.LOG_LEVEL_OFF:
+        logging.disable(logging.CRITICAL)
+        return
+    logging.disable(logging.NOTSET)
+    logging.getLogger().setLevel(level_name)
+
+def stop_logging():
+    """Write the records that are still in the queue and close the log file"""
+    global listener
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    listener = None
+
+@contextmanager
+def timed_span(phase, **fields):
+    """Logs the wall time and the CPU time of the current thread of the block as a span
+    of the phase, with the fields.
+    The block receives the fields as a dictionary, to add for instance the number of files.
+    Nothing is measured when INFO messages are not logged and there are no span listeners.
+    The span is logged with the file and line of the with statement, two frames above the generator"""
+    log_span = logging.getLogger().isEnabledFor(logging.INFO)
+    if not log_span and not span_listeners:
+        yield fields
+        return
+
+    with ExitStack() as listener_stack:
+        for span_listener in list(span_listeners):
+            listener_stack.enter_context(span_listener(phase, fields))
+
+        start_time = time.perf_counter()
+        start_cpu_time = time.thread_time()
+        try:
+            yield fields
+        finally:
+            if log_span:
+                wall_time = time.perf_counter() - start_time
+                cpu_time = time.thread_time() - start_cpu_time
+                logging.info("span phase=%s wall=%.3f cpu=%.3f%s", phase, wall_time, cpu_time,
+                             ''.join(f" {key}={value}" for key, value in fields.items()),
+                             extra={ 'span': dict(fields, phase=phase, wall=wall_time, cpu=cpu_time) },
+                             stacklevel=3)
@@ -0,0 +1,379 @@
+"""sf_mapped_result saves the result of a search in a fixed layout file that is
+opened with mmap, so that even results with millions of files open immediately.
+Only the parts of the file that are actually used are read from disk.
+
+The file starts with an identifier, the number of files and directories, a table with
+the position of each section and a json header with the search settings.
+The sections are arrays with fixed size elements, aligned on 8 bytes:
+- per directory: parent, first subdirectory, number of subdirectories, first file,
+  number of files, total number of files and total size below it, and its name
+- per file: size, modified, created and accessed time, inode, directory and name
+Names are stored in a single block per section, with an array of offsets into that block.
+Subdirectories of a directory are consecutive, and so are the files in a directory,
+so the tree is read without searching"""
+
+import heapq
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+
+import modules.sf_constants as const
+import modules.sf_search as sf_search
+from modules.sf_fuzzy import FuzzyMatcher
+
+MAPPED_RESULT_IDENTIFIER = b'SFMAP\x00\x00\x01'
+MAPPED_RESULT_VERSION = 1
+
+# Number of files, number of directories, length of the json header
+COUNTS = struct.Struct('<QQQ')
+
+# Name and array type of each section in the file
+SECTIONS = [
+    ('directory_parent',        'q'),
+    ('directory_first_subdir',  'Q'),
+    ('directory_subdir_count',  'Q'),
+    ('directory_first_file',    'Q'),
+    ('directory_file_count',    'Q'),
+    ('directory_total_files',   'Q'),
+    ('directory_total_size',    'Q'),
+    ('directory_name_offsets',  'Q'),
+    ('directory_names',         'B'),
+    ('file_size',               'Q'),
+    ('file_modified',           'q'),
+    ('file_created',            'q'),
+    ('file_accessed',           'q'),
+    ('file_inode',              'Q'),
+    ('file_directory',          'Q'),
+    ('file_name_offsets',       'Q'),
+    ('file_names',              'B') ]
+
+# Position and length of each section
+SECTION_TABLE = struct.Struct('<' + 'QQ' * len(SECTIONS))
+
+def is_mapped_result_file(file_name):
+    """Returns True if the file name refers to an existing mapped result"""
+    return str(file_name).lower().endswith(const.MAPPED_RESULT_EXTENSION) and Path(file_name).is_file()
+
+def mapped_order(parents, name):
+    """Sort key of a file in a mapped result: directories are numbered breadth first with the
+    subdirectories of a directory sorted on name, which is the order of the depth and the parts
+    of the path, and the files in a directory are sorted on name"""
+    return (len(parents), parents, name)
+
+def save_mapped_result(file_search, file_name):
+    """Save the selected files of the search to a file that can be opened with open_mapped_result"""
+    directories = { () }
+    for selected_file in file_search.selected_files:
+        parents = selected_file.parents
+        for depth in range(len(parents)):
+            directories.add(parents[:depth+1])
+
+    selected_files = sorted(file_search.selected_files, key= lambda selected_file:
+                            mapped_order(selected_file.parents, selected_file.entry.name) )
+
+    def iter_files():
+        for selected_file in selected_files:
+            stat = selected_file.file_stat()
+            yield (selected_file.parents, selected_file.entry.name, stat.st_size, stat.st_mtime_ns,
+                   stat.st_ctime_ns, stat.st_atime_ns, stat.st_ino)
+
+    write_mapped_result(file_name, iter_files(), directories, file_search.directory_totals,
+                        mapped_result_header(file_search))
+
+def mapped_result_header(file_search):
+    """The search settings that are stored in the header of a mapped result"""
+    return {
+        'version': MAPPED_RESULT_VERSION,
+        'root_directories': [ str(root) for root in file_search.root_directories ],
+        'filter_extension': file_search.filter_extension,
+        'filter_filename': file_search.filter_filename,
+        'filename_case_sensitive': file_search.filename_case_sensitive,
+        'entries': file_search.statistics.entries }
+
+class SectionFile():
+    """Section with an element per file, written to a temporary file in blocks,
+    so the files do not have to be in memory"""
+
+    # Number of elements written at once
+    block_size = 65536
+
+    def __init__(self, typecode):
+        self.file = tempfile.TemporaryFile()
+        self.block = array(typecode)
+        self.length = 0
+
+    def append(self, value):
+        """Add an element to the section"""
+        self.block.append(value)
+        if len(self.block) >= self.block_size:
+            self.flush()
+
+    def extend(self, values):
+        """Add elements to the section"""
+        self.block.extend(values)
+        if len(self.block) >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        """Write the elements that are not yet written"""
+        self.length += len(self.block) * self.block.itemsize
+        self.block.tofile(self.file)
+        del self.block[:]
+
+    def copy_to(self, outfile):
+        """Write the section to the mapped result and close the temporary file"""
+        self.flush()
+        self.file.seek(0)
+        shutil.copyfileobj(self.file, outfile)
+        self.file.close()
+
+def write_mapped_result(file_name, files, directories, directory_totals, header):
+    """Write a mapped result. files generates (parents, name, size, modified, created, accessed, inode)
+    of each file, in mapped_order. directories is the collection of the parents of all directories,
+    including the root (). directory_totals is the number of files and total size per directory.
+    The sections with an element per file are written to temporary files while the files are generated"""
+
+    # Number the directories breadth first, so subdirectories of a directory are consecutive
+    directories = sorted(directories, key= lambda directory: (len(directory), directory))
+    directory_numbers = { directory: number for number, directory in enumerate(directories) }
+    sections = { name: array(typecode) for name, typecode in SECTIONS }
+
+    subdirectory_counts = [0] * len(directories)
+    first_subdirectories = [0] * len(directories)
+    for number, directory in enumerate(directories[1:], start=1):
+        parent = directory_numbers[directory[:-1]]
+        if subdirectory_counts[parent] == 0:
+            first_subdirectories[parent] = number
+        subdirectory_counts[parent] += 1
+
+    # Files in the same directory are consecutive
+    file_sections = { name: SectionFile(typecode) for name, typecode in SECTIONS if name.startswith('file_') }
+    file_counts = [0] * len(directories)
+    first_files = [0] * len(directories)
+    names_length = 0
+    file_sections['file_name_offsets'].append(0)
+    file_number = 0
+    for parents, name, size, modified, created, accessed, inode in files:
+        directory_number = directory_numbers[parents]
+        if file_counts[directory_number] == 0:
+            first_files[directory_number] = file_number
+        file_counts[directory_number] += 1
+
+        file_sections['file_size'].append(size)
+        file_sections['file_modified'].append(modified)
+        file_sections['file_created'].append(created)
+        file_sections['file_accessed'].append(accessed)
+        file_sections['file_inode'].append(inode & 0xFFFFFFFFFFFFFFFF)
+        file_sections['file_directory'].append(directory_number)
+        name = os.fsencode(name)
+        file_sections['file_names'].extend(name)
+        names_length += len(name)
+        file_sections['file_name_offsets'].append(names_length)
+        file_number += 1
+
+    names = bytearray()
+    sections['directory_name_offsets'].append(0)
+    for number, directory in enumerate(directories):
+        sections['directory_parent'].append(directory_numbers[directory[:-1]] if directory else -1)
+        sections['directory_first_subdir'].append(first_subdirectories[number] or len(directories))
+        sections['directory_subdir_count'].append(subdirectory_counts[number])
+        sections['directory_first_file'].append(first_files[number])
+        sections['directory_file_count'].append(file_counts[number])
+        total_files, total_size = directory_totals.get(directory, [0, 0])
+        sections['directory_total_files'].append(total_files)
+        sections['directory_total_size'].append(total_size)
+        names += os.fsencode(directory[-1]) if directory else b''
+        sections['directory_name_offsets'].append(len(names))
+    sections['directory_names'] = array('B', names)
+
+    header_bytes = json.dumps(header).encode('utf-8')
+
+    # Determine the position of each section, aligned on 8 bytes
+    position = len(MAPPED_RESULT_IDENTIFIER) + COUNTS.size + SECTION_TABLE.size + len(header_bytes)
+    section_table = []
+    for name, typecode in SECTIONS:
+        position = (position + 7) // 8 * 8
+        if name in file_sections:
+            file_sections[name].flush()
+            length = file_sections[name].length
+        else:
+            length = len(sections[name]) * sections[name].itemsize
+        section_table += [position, length]
+        position += length
+
+    with open(file_name, 'wb') as outfile:
+        outfile.write(MAPPED_RESULT_IDENTIFIER)
+        outfile.write(COUNTS.pack(file_number, len(directories), len(header_bytes)))
+        outfile.write(SECTION_TABLE.pack(*section_table))
+        outfile.write(header_bytes)
+        for (name, typecode), section_position in zip(SECTIONS, section_table[::2]):
+            outfile.write(b'\0' * (section_position - outfile.tell()))
+            if name in file_sections:
+                file_sections[name].copy_to(outfile)
+            else:
+                outfile.write(sections[name].tobytes())
+
+def open_mapped_result(file_name):
+    """Open a file saved with save_mapped_result"""
+    return MappedResult(file_name)
+
+class MappedResult():
+    """Search result that is read directly from a memory mapped file"""
+
+    def __init__(self, file_name):
+        if sys.byteorder != 'little':
+            raise ValueError("Mapped results can only be opened on little endian computers")
+
+        self.file_name = file_name
+        with open(file_name, 'rb') as openfile:
+            self.mapped_file = mmap.mmap(openfile.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.mapped_file[:len(MAPPED_RESULT_IDENTIFIER)] != MAPPED_RESULT_IDENTIFIER:
+            self.mapped_file.close()
+            raise ValueError(f"{file_name} is not a mapped search result")
+
+        position = len(MAPPED_RESULT_IDENTIFIER)
+        self.file_count, self.directory_count, header_length = COUNTS.unpack_from(self.mapped_file, position)
+        position += COUNTS.size
+        section_table = SECTION_TABLE.unpack_from(self.mapped_file, position)
+        position += SECTION_TABLE.size
+        self.header = json.loads(self.mapped_file[position:position+header_length].decode('utf-8'))
+        self.root_directories = [ Path(root) for root in self.header['root_directories'] ]
+
+        # Each section is an array that reads directly from the mapped file
+        self.memory = memoryview(self.mapped_file)
+        self.sections = []
+        for (name, typecode), section_position, length in \
+                zip(SECTIONS, section_table[::2], section_table[1::2]):
+            section = self.memory[section_position:section_position+length].cast(typecode)
+            setattr(self, name, section)
+            self.sections.append(section)
+
+    def close(self):
+        """Release the arrays and close the mapped file"""
+        for section in self.sections:
+            section.release()
+        self.sections = []
+        self.memory.release()
+        self.mapped_file.close()
+
+    def directory_name(self, directory):
+        """Name of the directory"""
+        return os.fsdecode(self.directory_names[self.directory_name_offsets[directory]:
+                                                self.directory_name_offsets[directory+1]].tobytes())
+
+    def file_name_of(self, file_number):
+        """Name of the file"""
+        return os.fsdecode(self.file_names[self.file_name_offsets[file_number]:
+                                           self.file_name_offsets[file_number+1]].tobytes())
+
+    def directory_parents(self, directory):
+        """The names of the directory and the directories above it, relative to the root"""
+        parents = []
+        while directory > 0:
+            parents.append(self.directory_name(directory))
+            directory = self.directory_parent[directory]
+        return tuple(reversed(parents))
+
+    def directory_path(self, directory):
+        """Returns the path of the directory"""
+        parents = self.directory_parents(directory)
+        if len(self.root_directories) == 1:
+            return str(Path(self.root_directories[0], *parents))
+
+        # With more than one root directory, the first parent is the root directory
+        if not parents:
+            return const.ROOT_SEPARATOR.join(str(root) for root in self.root_directories)
+        return str(Path(*parents))
+
+    def selected_file(self, file_number):
+        """Returns the file as SelectedFile, to determine the fields of the report"""
+        directory = self.file_directory[file_number]
+        parents = self.directory_parents(directory)
+        if len(self.root_directories) == 1:
+            root = self.root_directories[0]
+            entry = Path(root, *parents, self.file_name_of(file_number))
+            top_directory = None
+        else:
+            root = Path(parents[0])
+            entry = Path(*parents, self.file_name_of(file_number))
+            top_directory = parents[0]
+            parents = parents[1:]
+
+        modified = self.file_modified[file_number]
+        created = self.file_created[file_number]
+        accessed = self.file_accessed[file_number]
+        stat = os.stat_result((0, self.file_inode[file_number], 0, 1, 0, 0, self.file_size[file_number],
+                               accessed // 10**9, modified // 10**9, created // 10**9),
+                              { 'st_atime': accessed / 1e9, 'st_mtime': modified / 1e9,
+                                'st_ctime': created / 1e9, 'st_atime_ns': accessed,
+                                'st_mtime_ns': modified, 'st_ctime_ns': created })
+        return sf_search.SelectedFile(file_number, root, entry, stat, top_directory, parents)
+
+    def iter_directory_entries(self, directory):
+        """Generates (name, is file, number) of the subdirectories and files of the directory,
+        sorted on name"""
+        first_subdir = self.directory_first_subdir[directory]
+        subdirectories = ( (self.directory_name(number), False, number) for number in
+                           range(first_subdir, first_subdir + self.directory_subdir_count[directory]) )
+        first_file = self.directory_first_file[directory]
+        files = ( (self.file_name_of(number), True, number) for number in
+                  range(first_file, first_file + self.directory_file_count[directory]) )
+        return heapq.merge(subdirectories, files)
+
+    def iter_sorted_files(self):
+        """Generates (parts of the path, size, modified time, inode) of each file, sorted on the
+        parts of the path like iter_snapshot_files. The tree is walked depth first, merging the
+        sorted subdirectories and files of each directory, so only the current path is in memory"""
+        stack = [ ((), self.iter_directory_entries(0)) ]
+        while stack:
+            parts, entries = stack[-1]
+            entry = next(entries, None)
+            if entry is None:
+                stack.pop()
+                continue
+
+            name, is_file, number = entry
+            if is_file:
+                yield (parts + (name,), self.file_size[number], self.file_modified[number],
+                       self.file_inode[number])
+            else:
+                stack.append( (parts + (name,), self.iter_directory_entries(number)) )
+
+    def similar_names(self, text, count):
+        """Returns the count files of which the name is most similar to the text,
+        as (score, file number) tuples, the best match first"""
+        return FuzzyMatcher(text).best(range(self.file_count), count, name=self.file_name_of)
+
+    def report_lines(self, report_columns, matches=None):
+        """Generates the lines of a tab separated report with only the selected columns
+        If matches is given, only these (score, file number) tuples are reported"""
+        selected_columns = [text for text, checked in report_columns if checked]
+        if matches is None:
+            matches = ( (None, file_number) for file_number in range(self.file_count) )
+
+        yield '\t'.join(selected_columns)
+
+        for score, file_number in matches:
+            selected_file = self.selected_file(file_number)
+            selected_file.match_score = score
+            yield '\t'.join([str(selected_file.field(column)) for column in selected_columns])
+
+    def directory_report_lines(self):
+        """Generates the lines of a tab separated report with the number of files and
+        total size per directory, largest directories first"""
+        directories = sorted(range(self.directory_count), key= lambda directory:
+                             -self.directory_total_size[directory])
+
+        yield '\t'.join(const.DIRECTORY_REPORT_COLUMNS)
+
+        for directory in directories:
+            yield '\t'.join([self.directory_path(directory),
+                             str(self.directory_total_files[directory]),
+                             str(self.directory_total_size[directory])])
@@ -0,0 +1,239 @@
+"""sf_profile profiles a session of the program, started with --profile, to find out why a search
+is slow on the computer of a user. The functions of the main thread and of the search thread are
+profiled with cProfile. For each phase that is timed with timed_span, such as the scan, the sort,
+building the tree and the report, the wall time, the CPU time of the thread of the phase, the
+number of read and write system calls and the peak memory are recorded. When the session ends,
+a report is written with the phases and the functions with the highest cumulative time, and the
+profile is saved with the extension .prof for viewers such as snakeviz"""
+
+import cProfile
+import ctypes
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import modules.sf_constants as const
+import modules.sf_logging as sf_logging
+from modules.sf_utilities import format_size
+
+# Profiler of the session, None if the session is not profiled
+active_profiler = None
+
+class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+    """Memory counters of a process on Windows"""
+    _fields_ = [('cb', ctypes.c_ulong), ('PageFaultCount', ctypes.c_ulong),
+                ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+class IO_COUNTERS(ctypes.Structure):
+    """Input and output counters of a process on Windows"""
+    _fields_ = [('ReadOperationCount', ctypes.c_ulonglong), ('WriteOperationCount', ctypes.c_ulonglong),
+                ('OtherOperationCount', ctypes.c_ulonglong), ('ReadTransferCount', ctypes.c_ulonglong),
+                ('WriteTransferCount', ctypes.c_ulonglong), ('OtherTransferCount', ctypes.c_ulonglong)]
+
+def peak_memory():
+    """Peak resident memory of the process in bytes, None if it is not available"""
+    if sys.platform == 'win32':
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        if ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                    ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+        return None
+    if resource is not None:
+        # Linux reports kilobytes, macOS bytes
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    return None
+
+def syscall_counts():
+    """Number of read and write system calls of the process so far, None if they are not available
+    Linux counts them in /proc/self/io, Windows counts the read and write operations"""
+    if sys.platform == 'win32':
+        counters = IO_COUNTERS()
+        if ctypes.windll.kernel32.GetProcessIoCounters(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                       ctypes.byref(counters)):
+            return (counters.ReadOperationCount, counters.WriteOperationCount)
+        return None
+    try:
+        with open('/proc/self/io', encoding='ascii') as io_file:
+            counts = dict(line.split(':') for line in io_file)
+        return (int(counts['syscr']), int(counts['syscw']))
+    except (OSError, KeyError, ValueError):
+        return None
+
+class PhaseTotals():
+    """Total wall and CPU time, system calls and the peak memory of the spans of one phase"""
+
+    def __init__(self):
+        self.count = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.read_calls = None
+        self.write_calls = None
+        self.peak_memory = None
+
+    def add(self, wall_time, cpu_time, start_syscalls, end_syscalls, memory):
+        """Add one span of the phase"""
+        self.count += 1
+        self.wall_time += wall_time
+        self.cpu_time += cpu_time
+        if start_syscalls is not None and end_syscalls is not None:
+            self.read_calls = (self.read_calls or 0) + end_syscalls[0] - start_syscalls[0]
+            self.write_calls = (self.write_calls or 0) + end_syscalls[1] - start_syscalls[1]
+        if memory is not None:
+            self.peak_memory = max(self.peak_memory or 0, memory)
+
+class Profiler():
+    """Collects the profiles of the threads and the totals of the phases of a session"""
+
+    def __init__(self):
+        self.profiles = []
+        self.phases = {}
+        self.lock = threading.Lock()
+        self.main_profile = cProfile.Profile()
+        self.start_time = time.perf_counter()
+        self.start_cpu_time = time.process_time()
+        self.start_syscalls = syscall_counts()
+
+    def start(self):
+        """Profile the current thread and the spans of all threads"""
+        sf_logging.span_listeners.append(self.span)
+        self.main_profile.enable()
+
+    def stop(self):
+        """Stop profiling"""
+        self.main_profile.disable()
+        self.add_profile(self.main_profile)
+        sf_logging.span_listeners.remove(self.span)
+
+    def add_profile(self, profile):
+        """Add the profile of a thread, that is reported together with the other profiles"""
+        with self.lock:
+            self.profiles.append(profile)
+
+    @contextmanager
+    def span(self, phase, fields):
+        """Listener of timed_span, that adds each span to the totals of its phase
+        The CPU time is that of the thread of the span, so the other threads are not counted"""
+        start_time = time.perf_counter()
+        start_cpu_time = time.thread_time()
+        start_syscalls = syscall_counts()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start_time
+            cpu_time = time.thread_time() - start_cpu_time
+            with self.lock:
+                self.phases.setdefault(phase, PhaseTotals()).add(wall_time, cpu_time, start_syscalls,
+                                                                 syscall_counts(), peak_memory())
+
+    def stats(self):
+        """Returns the combined pstats.Stats of all threads, None if nothing was profiled"""
+        stats = None
+        for profile in self.profiles:
+            # A profile without calls cannot be loaded
+            try:
+                if stats is None:
+                    stats = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+            except TypeError:
+                continue
+        return stats
+
+    def report_lines(self, top_count=const.DEFAULT_PROFILE_FUNCTIONS):
+        """Generates the lines of the report with the totals of the session and of each phase,
+        and the top_count functions with the highest cumulative time"""
+        end_syscalls = syscall_counts()
+        memory = peak_memory()
+        yield f"Profile of the session that ended at {datetime.now().strftime(const.DATE_FMT)}"
+        yield f"Wall time: {time.perf_counter() - self.start_time:.3f} s"
+        yield f"Process CPU time, all threads: {time.process_time() - self.start_cpu_time:.3f} s"
+        if self.start_syscalls is not None and end_syscalls is not None:
+            yield f"Read system calls: {end_syscalls[0] - self.start_syscalls[0]}"
+            yield f"Write system calls: {end_syscalls[1] - self.start_syscalls[1]}"
+        else:
+            yield "System calls: not available"
+        yield f"Peak memory: {format_size(memory) if memory is not None else 'not available'}"
+
+        yield ''
+        yield '\t'.join(const.PROFILE_PHASE_COLUMNS)
+        for phase, totals in self.phases.items():
+            yield '\t'.join([phase, str(totals.count), f"{totals.wall_time:.3f}", f"{totals.cpu_time:.3f}",
+                             '' if totals.read_calls is None else str(totals.read_calls),
+                             '' if totals.write_calls is None else str(totals.write_calls),
+                             '' if totals.peak_memory is None else format_size(totals.peak_memory)])
+
+        yield ''
+        stats = self.stats()
+        if stats is None:
+            yield "No functions were profiled"
+            return
+        output = io.StringIO()
+        stats.stream = output
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top_count)
+        yield from output.getvalue().splitlines()
+
+    def save(self, file_name):
+        """Write the report to the file, and the profile of all threads to a file with the
+        same name and the extension .prof"""
+        with open(file_name, 'w', encoding='utf-8') as report_file:
+            for line in self.report_lines():
+                report_file.write(line + '\n')
+
+        stats = self.stats()
+        if stats is not None:
+            stats.dump_stats(Path(file_name).with_suffix('.prof'))
+        logging.info("Profile written to %s", file_name)
+
+def start_profiling():
+    """Profile the session until stop_profiling is called, returns the profiler"""
+    global active_profiler
+    active_profiler = Profiler()
+    active_profiler.start()
+    return active_profiler
+
+def stop_profiling(file_name):
+    """Stop profiling the session and write the report"""
+    global active_profiler
+    profiler = active_profiler
+    active_profiler = None
+    profiler.stop()
+    profiler.save(file_name)
+
+@contextmanager
+def thread_profile():
+    """Profile the block in the current thread if the session is profiled
+    Functions of threads started by the block, such as a concurrent scan, are not profiled"""
+    profiler = active_profiler
+    if profiler is None:
+        yield
+        return
+
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Only one profiler can be active in versions of Python where cProfile profiles all threads
+        yield
+        return
+
+    try:
+        yield
+    finally:
+        profile.disable()
+        profiler.add_profile(profile)
@@ -0,0 +1,453 @@
+"""sf_query defines a small query language to select files, for example:
+    ext:jpg,png size>5MB modified<2023-01-01 name~"IMG_\\d+" -path:backup
+
+A query is a list of terms that must all match. Terms can be combined with OR,
+grouped with parentheses and negated with a leading '-'. A term without a key
+matches the filename. Supported keys:
+- ext:jpg,png         extension is one of the list
+- category:image,archive
+                      extension belongs to one of the categories in sf_extension_categories
+- name:text name~re   filename contains the text or matches the regular expression
+- path:text path~re   path and filename contain the text or match the regular expression
+- size>5MB            file size, compared with >, <, >=, <= or =
+- modified, created, accessed
+                      date of the file, for example modified>=2023-01 or created=2024-02-29
+- filetype:jpg,image  type detected from the first bytes of the file, or its category
+- taken               date the photo was taken, from the EXIF data
+- width, height       size of the image in pixels
+- content:text content~re
+                      the contents of the file contain the text or match the regular expression
+
+The query is compiled to a tree of predicates, in which the cheapest predicates are
+evaluated first: name and extension, then the file stat, then EXIF data and contents.
+Expensive predicates are only evaluated for files that passed the cheaper ones"""
+
+import os
+import re
+from datetime import datetime, timedelta
+
+from modules.sf_utilities import image_taken_date, iter_in_threads
+from modules.sf_content_search import search_file
+from modules.sf_extension_categories import CATEGORIES, EXTENSION_CATEGORY
+from modules.sf_file_type import FileTypeDetector
+
+# Cost of the predicates, in the order they are evaluated
+COST_NAME     = 0
+COST_STAT     = 1
+COST_METADATA = 2
+COST_CONTENT  = 3
+
+SIZE_UNITS = { '': 1, 'B': 1, 'KB': 1024, 'MB': 1024**2, 'GB': 1024**3, 'TB': 1024**4 }
+
+# Accepted date formats with the attribute that is incremented for a date range
+DATE_FORMATS = [ ('%Y', 'year'), ('%Y-%m', 'month'), ('%Y-%m-%d', 'day'),
+                 ('%Y-%m-%dT%H:%M', 'minute'), ('%Y-%m-%d %H:%M', 'minute'),
+                 ('%Y-%m-%dT%H:%M:%S', 'second'), ('%Y-%m-%d %H:%M:%S', 'second') ]
+
+TOKEN = re.compile(r'''\s*(?:
+    (?P<open>-?\() | (?P<close>\)) |
+    (?P<negate>-)?(?:(?P<key>[A-Za-z]+)(?P<operator>:|~|>=|<=|>|<|=))?
+    (?P<value>"(?:[^"\\]|\\.)*"|[^\s()"]+) )''', re.VERBOSE)
+
+class QueryError(ValueError):
+    """The query cannot be parsed"""
+
+class NameOnly():
+    """Stands in for a SelectedFile when only the name of the entry is known"""
+
+    def __init__(self, entry):
+        self.entry = entry
+
+class Predicate():
+    """Leaf of the predicate tree, which tests one property of a file"""
+
+    cost = COST_NAME
+
+    def evaluate(self, selected_file, max_cost):
+        """Returns True or False, or None if the predicate is more expensive than max_cost"""
+        if self.cost > max_cost:
+            return None
+        return self.test(selected_file)
+
+    def test(self, selected_file):
+        """Override this member to test the file"""
+        return True
+
+class ExtensionPredicate(Predicate):
+    """The extension is one of a list of extensions, ignoring case"""
+
+    def __init__(self, extensions):
+        self.extensions = frozenset(extension.lower().lstrip('.') for extension in extensions)
+
+    def test(self, selected_file):
+        return os.path.splitext(selected_file.entry.name)[1][1:].lower() in self.extensions
+
+def category_extensions(categories):
+    """Returns the set of extensions of the categories"""
+    extensions = set()
+    for category in categories:
+        category = category.strip().lower()
+        if category not in CATEGORIES:
+            raise QueryError(f"Unknown category {category}, choose from: {', '.join(sorted(CATEGORIES))}")
+        extensions |= CATEGORIES[category]
+    return extensions
+
+class TextPredicate(Predicate):
+    """The name or the path contains a text or matches a regular expression"""
+
+    def __init__(self, attribute, text, regular_expression, case_sensitive):
+        self.attribute = attribute
+        self.text = text if case_sensitive else text.lower()
+        self.case_sensitive = case_sensitive
+        self.pattern = None
+        if regular_expression:
+            try:
+                self.pattern = re.compile(text, 0 if case_sensitive else re.IGNORECASE)
+            except re.error as error:
+                raise QueryError(f"Invalid regular expression {text}: {error}") from error
+
+    def test(self, selected_file):
+        if self.attribute == 'name':
+            value = selected_file.entry.name
+        else:
+            value = str(selected_file.entry)
+
+        if self.pattern is not None:
+            return self.pattern.search(value) is not None
+        if not self.case_sensitive:
+            value = value.lower()
+        return self.text in value
+
+def compare(value, operator, low, high):
+    """Compare a value with a range [low, high) using the operator of the query"""
+    if operator == '>':
+        return value >= high
+    if operator == '>=':
+        return value >= low
+    if operator == '<':
+        return value < low
+    if operator == '<=':
+        return value < high
+    return low <= value < high
+
+class SizePredicate(Predicate):
+    """Compares the file size"""
+
+    cost = COST_STAT
+
+    def __init__(self, operator, size):
+        self.operator = operator
+        self.size = size
+
+    def test(self, selected_file):
+        return compare(selected_file.file_size(), self.operator, self.size, self.size + 1)
+
+class DatePredicate(Predicate):
+    """Compares the modified, created or accessed date of the file"""
+
+    cost = COST_STAT
+
+    def __init__(self, attribute, operator, start, end):
+        self.attribute = attribute
+        self.operator = operator
+        self.start = start.timestamp()
+        self.end = end.timestamp()
+
+    def test(self, selected_file):
+        return compare(getattr(selected_file.file_stat(), self.attribute),
+                       self.operator, self.start, self.end)
+
+class TakenPredicate(Predicate):
+    """Compares the date the photo was taken, files without EXIF date do not match"""
+
+    cost = COST_METADATA
+
+    def __init__(self, operator, start, end):
+        self.operator = operator
+        self.start = start
+        self.end = end
+
+    def test(self, selected_file):
+        taken = image_taken_date(selected_file.entry)
+        if not taken:
+            return False
+        return compare(taken, self.operator, self.start, self.end)
+
+class ImageSizePredicate(Predicate):
+    """Compares the width or height of an image, files that are not images do not match"""
+
+    cost = COST_METADATA
+
+    def __init__(self, attribute, operator, pixels):
+        self.attribute = attribute
+        self.operator = operator
+        self.pixels = pixels
+
+    def test(self, selected_file):
+        if self.attribute == 'width':
+            pixels = selected_file.image_width()
+        else:
+            pixels = selected_file.image_height()
+        if pixels == "":
+            return False
+        return compare(pixels, self.operator, self.pixels, self.pixels + 1)
+
+class FileTypePredicate(Predicate):
+    """The type detected from the first bytes of the file is one of the types or categories"""
+
+    cost = COST_METADATA
+
+    def __init__(self, file_types, detector):
+        self.file_types = frozenset(file_type.strip().lower().lstrip('.') for file_type in file_types)
+        self.detector = detector
+
+    def test(self, selected_file):
+        file_type = self.detector.file_type(selected_file)
+        return file_type in self.file_types or EXTENSION_CATEGORY.get(file_type) in self.file_types
+
+class ContentPredicate(Predicate):
+    """The contents of the file contain a text or match a regular expression"""
+
+    cost = COST_CONTENT
+
+    def __init__(self, text, regular_expression, case_sensitive):
+        pattern = text if regular_expression else re.escape(text)
+        flags = 0 if case_sensitive else re.IGNORECASE
+        try:
+            self.pattern = re.compile(pattern.encode('utf-8'), flags | re.MULTILINE)
+        except re.error as error:
+            raise QueryError(f"Invalid regular expression {text}: {error}") from error
+
+    def test(self, selected_file):
+        content_matches = search_file(str(selected_file.entry), self.pattern)
+        if content_matches is None or content_matches[0] == 0:
+            return False
+        selected_file.content_matches = content_matches
+        return True
+
+class And():
+    """All children must match, the cheapest children are evaluated first"""
+
+    def __init__(self, children):
+        self.children = sorted(children, key= lambda child: child.cost)
+        self.cost = max([ child.cost for child in self.children ], default=COST_NAME)
+
+    def evaluate(self, selected_file, max_cost):
+        result = True
+        for child in self.children:
+            child_result = child.evaluate(selected_file, max_cost)
+            if child_result is False:
+                return False
+            if child_result is None:
+                result = None
+        return result
+
+class Or():
+    """One of the children must match, the cheapest children are evaluated first"""
+
+    def __init__(self, children):
+        self.children = sorted(children, key= lambda child: child.cost)
+        self.cost = max([ child.cost for child in self.children ], default=COST_NAME)
+
+    def evaluate(self, selected_file, max_cost):
+        result = False
+        for child in self.children:
+            child_result = child.evaluate(selected_file, max_cost)
+            if child_result is True:
+                return True
+            if child_result is None:
+                result = None
+        return result
+
+class Not():
+    """The child must not match"""
+
+    def __init__(self, child):
+        self.child = child
+        self.cost = child.cost
+
+    def evaluate(self, selected_file, max_cost):
+        result = self.child.evaluate(selected_file, max_cost)
+        return None if result is None else not result
+
+def parse_size(value):
+    """Size in bytes of a value like 5MB or 300kb"""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)\s*([A-Za-z]*)', value)
+    if not match or match.group(2).upper() not in SIZE_UNITS:
+        raise QueryError(f"Invalid size {value}, use for instance 500kB or 5MB")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+def parse_date(value):
+    """Returns the range [start, end) of a date like 2023, 2023-01, 2023-01-31 or 2023-01-31T12:00"""
+    for date_format, resolution in DATE_FORMATS:
+        try:
+            start = datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+
+        if resolution == 'year':
+            end = start.replace(year=start.year+1)
+        elif resolution == 'month':
+            end = start.replace(year=start.year + start.month//12, month=start.month%12 + 1)
+        else:
+            end = start + timedelta(**{resolution + 's': 1})
+        return start, end
+
+    raise QueryError(f"Invalid date {value}, use for instance 2023-01-31")
+
+def parse_number(value):
+    """Integer value of a query term"""
+    try:
+        return int(value)
+    except ValueError as error:
+        raise QueryError(f"Invalid number {value}") from error
+
+class QueryParser():
+    """Compiles the text of a query into a tree of predicates"""
+
+    date_attributes = { 'modified': 'st_mtime', 'created': 'st_ctime', 'accessed': 'st_atime' }
+
+    def __init__(self, text, case_sensitive=False):
+        self.case_sensitive = case_sensitive
+        self.tokens = self.tokenize(text)
+        self.position = 0
+        self.file_type_detector = None
+
+    @staticmethod
+    def tokenize(text):
+        """Split the query into tokens"""
+        tokens = []
+        position = 0
+        text = text.strip()
+        while position < len(text):
+            match = TOKEN.match(text, position)
+            if not match:
+                raise QueryError(f"Cannot read the query from: {text[position:]}")
+            position = match.end()
+            tokens.append(match)
+        return tokens
+
+    def peek(self):
+        """The next token, or None at the end of the query"""
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    @staticmethod
+    def is_or(token):
+        return token is not None and token.group('value') == 'OR' \
+               and not token.group('key') and not token.group('negate')
+
+    def parse(self):
+        """Returns the predicate tree of the query"""
+        predicate = self.parse_or()
+        if self.peek() is not None:
+            raise QueryError("Unexpected ')' in the query")
+        return predicate
+
+    def parse_or(self):
+        children = [ self.parse_and() ]
+        while self.is_or(self.peek()):
+            self.position += 1
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def parse_and(self):
+        children = []
+        while True:
+            token = self.peek()
+            if token is None or token.group('close') or self.is_or(token):
+                break
+            self.position += 1
+
+            if token.group('open'):
+                child = self.parse_or()
+                if self.peek() is None or not self.peek().group('close'):
+                    raise QueryError("Missing ')' in the query")
+                self.position += 1
+                if token.group('open').startswith('-'):
+                    child = Not(child)
+            else:
+                child = self.term(token)
+            children.append(child)
+
+        if not children and self.peek() is not None:
+            raise QueryError("Empty term in the query")
+        return children[0] if len(children) == 1 else And(children)
+
+    def term(self, token):
+        """Predicate for a single term"""
+        key = (token.group('key') or 'name').lower()
+        operator = token.group('operator') or ':'
+        value = token.group('value')
+        if value.startswith('"'):
+            value = value[1:-1].replace('\\"', '"')
+
+        comparison = operator in ('>', '<', '>=', '<=', '=')
+        if key in ('ext', 'extension') and operator == ':':
+            predicate = ExtensionPredicate(value.split(','))
+        elif key in ('category', 'type') and operator == ':':
+            predicate = ExtensionPredicate(category_extensions(value.split(',')))
+        elif key in ('name', 'path') and operator in (':', '~'):
+            predicate = TextPredicate(key, value, operator == '~', self.case_sensitive)
+        elif key == 'size' and comparison:
+            predicate = SizePredicate(operator, parse_size(value))
+        elif key in self.date_attributes and (comparison or operator == ':'):
+            predicate = DatePredicate(self.date_attributes[key], operator, *parse_date(value))
+        elif key in ('filetype', 'kind') and operator == ':':
+            if self.file_type_detector is None:
+                self.file_type_detector = FileTypeDetector()
+            predicate = FileTypePredicate(value.split(','), self.file_type_detector)
+        elif key == 'taken' and (comparison or operator == ':'):
+            predicate = TakenPredicate(operator, *parse_date(value))
+        elif key in ('width', 'height') and comparison:
+            predicate = ImageSizePredicate(key, operator, parse_number(value))
+        elif key == 'content' and operator in (':', '~'):
+            predicate = ContentPredicate(value, operator == '~', self.case_sensitive)
+        else:
+            raise QueryError(f"Unknown term {token.group().strip()}")
+
+        if token.group('negate'):
+            return Not(predicate)
+        return predicate
+
+class Query():
+    """Compiled query that selects files"""
+
+    # Maximum number of files that are waiting for the expensive predicates
+    max_pending_files = 256
+
+    def __init__(self, text, case_sensitive=False):
+        """Raises QueryError if the query cannot be parsed"""
+        self.text = text
+        self.case_sensitive = case_sensitive
+        parser = QueryParser(text, case_sensitive)
+        self.predicate = parser.parse() if text.strip() else And([])
+        self.cost = self.predicate.cost
+        self.file_type_detector = parser.file_type_detector
+
+    def save_caches(self):
+        """Save the detected file types, so unchanged files are not read again in the next search"""
+        if self.file_type_detector is not None:
+            self.file_type_detector.cache.save()
+
+    def accepts_name(self, entry):
+        """Returns False if the entry does not match on name and extension alone,
+        so the file is skipped before its stat is requested"""
+        return self.predicate.evaluate(NameOnly(entry), COST_NAME) is not False
+
+    def accepts(self, selected_file):
+        """Returns True if the file matches the whole query"""
+        return self.predicate.evaluate(selected_file, COST_CONTENT) is True
+
+    def iter_matches(self, selected_files):
+        """Generator that yields the selected files that match the whole query,
+        in the order they were received. If EXIF data or contents are needed,
+        the files are tested in a pool of threads"""
+        if self.cost <= COST_STAT:
+            yield from (selected_file for selected_file in selected_files if self.accepts(selected_file))
+            return
+
+        for selected_file, accepted in iter_in_threads(selected_files, self.accepts, self.max_pending_files):
+            if accepted:
+                yield selected_file
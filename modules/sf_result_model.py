@@ -0,0 +1,108 @@
+"""sf_result_model shows a mapped search result in the tree view.
+Items are created when the tree view asks for them, so only the visible
+directories and files are read from the mapped file"""
+
+from PyQt5 import QtGui, QtCore
+
+from modules.sf_utilities import app_icon, format_size
+
+class MappedResultModel(QtCore.QAbstractItemModel):
+    """Read only tree model on top of a MappedResult
+
+    The internal id of an index is the number of the directory, or the number of
+    directories plus the number of the file"""
+
+    headers = ['File', 'Files', 'Size']
+
+    def __init__(self, mapped_result, parent=None):
+        super().__init__(parent)
+        self.mapped_result = mapped_result
+        self.directory_icon = app_icon('icon_folder.ico')
+        self.file_icon = app_icon('icon_file.ico')
+        self.directory_font = QtGui.QFont()
+        self.directory_font.setBold(True)
+
+    def node_directory(self, index):
+        """Number of the directory of the index, the root directory for an invalid index,
+        or None if the index is a file"""
+        if not index.isValid():
+            return 0
+        node = index.internalId()
+        if node < self.mapped_result.directory_count:
+            return node
+        return None
+
+    def directory_index(self, directory):
+        """Index of a directory in its parent directory"""
+        parent = self.mapped_result.directory_parent[directory]
+        if parent < 0:
+            return QtCore.QModelIndex()
+        return self.createIndex(directory - self.mapped_result.directory_first_subdir[parent], 0, directory)
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        directory = self.node_directory(parent)
+        if directory is None or not self.hasIndex(row, column, parent):
+            return QtCore.QModelIndex()
+
+        # Subdirectories are shown before the files
+        subdir_count = self.mapped_result.directory_subdir_count[directory]
+        if row < subdir_count:
+            node = self.mapped_result.directory_first_subdir[directory] + row
+        else:
+            node = self.mapped_result.directory_count + \
+                   self.mapped_result.directory_first_file[directory] + row - subdir_count
+        return self.createIndex(row, column, node)
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+
+        directory = self.node_directory(index)
+        if directory is None:
+            file_number = index.internalId() - self.mapped_result.directory_count
+            parent = self.mapped_result.file_directory[file_number]
+        else:
+            parent = self.mapped_result.directory_parent[directory]
+
+        if parent <= 0:
+            return QtCore.QModelIndex()
+        return self.directory_index(parent)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        directory = self.node_directory(parent)
+        if directory is None:
+            return 0
+        return self.mapped_result.directory_subdir_count[directory] + \
+               self.mapped_result.directory_file_count[directory]
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return len(self.headers)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        directory = self.node_directory(index)
+        column = index.column()
+        if role == QtCore.Qt.DisplayRole:
+            if directory is None:
+                file_number = index.internalId() - self.mapped_result.directory_count
+                return [self.mapped_result.file_name_of(file_number), '',
+                        format_size(self.mapped_result.file_size[file_number])][column]
+            return [self.mapped_result.directory_name(directory),
+                    str(self.mapped_result.directory_total_files[directory]),
+                    format_size(self.mapped_result.directory_total_size[directory])][column]
+        if role == QtCore.Qt.DecorationRole and column == 0:
+            return self.file_icon if directory is None else self.directory_icon
+        if role == QtCore.Qt.FontRole and directory is not None:
+            return self.directory_font
+        if role == QtCore.Qt.TextAlignmentRole and column > 0:
+            return QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.headers[section]
+        return None
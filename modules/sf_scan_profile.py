@@ -0,0 +1,62 @@
+"""sf_scan_profile records how long each directory took to read during a search, with its number
+of entries and errors, to find the subtrees that make a search slow: a slow mount, a directory
+with a huge number of entries or a directory where every stat is checked against many permissions.
+The report lists the directories that took most time, with the totals of their subtree.
+The folded stacks can be turned into a flame graph, for instance with flamegraph.pl or speedscope,
+where the width of each directory is the time spent in its subtree"""
+
+import threading
+from pathlib import Path
+
+import modules.sf_constants as const
+
+class ScanProfile():
+    """Listing time, number of entries and number of errors per directory of a search"""
+
+    def __init__(self):
+        # Per directory: (seconds, entries, errors)
+        self.directories = {}
+        self.lock = threading.Lock()
+
+    def record(self, directory, seconds, entry_count, error_count):
+        """Record one directory, this can be called from the threads of a concurrent scan"""
+        with self.lock:
+            self.directories[Path(directory)] = (seconds, entry_count, error_count)
+
+    def subtree_totals(self):
+        """Returns per directory the (seconds, entries, directories) of the directory and all
+        directories below it. The deepest directories are added to their parents first"""
+        totals = { directory: [seconds, entry_count, 1]
+                   for directory, (seconds, entry_count, error_count) in self.directories.items() }
+        for directory in sorted(totals, key= lambda directory: len(directory.parts), reverse=True):
+            parent_totals = totals.get(directory.parent)
+            if parent_totals is not None and directory.parent != directory:
+                for index, value in enumerate(totals[directory]):
+                    parent_totals[index] += value
+        return totals
+
+    def hot_directories(self, count=const.DEFAULT_HOT_DIRECTORIES):
+        """Returns the count directories that took most time to read, the slowest first"""
+        return sorted(self.directories, key= lambda directory: self.directories[directory][0],
+                      reverse=True)[:count]
+
+    def report_lines(self, count=const.DEFAULT_HOT_DIRECTORIES):
+        """Generates the lines of a tab separated report with the directories that took most time"""
+        yield '\t'.join(const.SCAN_PROFILE_COLUMNS)
+
+        totals = self.subtree_totals()
+        for directory in self.hot_directories(count):
+            seconds, entry_count, error_count = self.directories[directory]
+            subtree_seconds, subtree_entries, subtree_directories = totals[directory]
+            yield '\t'.join([str(directory), f"{seconds:.6f}", str(entry_count), str(error_count),
+                             f"{subtree_seconds:.6f}", str(subtree_entries), str(subtree_directories)])
+
+    def folded_lines(self):
+        """Generates one line per directory with the parts of its path separated by ';' and
+        the time to read the directory itself in microseconds, the folded stack format of
+        flame graph tools, which add up the time of the subdirectories"""
+        for directory in sorted(self.directories):
+            microseconds = round(self.directories[directory][0] * 1e6)
+            if microseconds > 0:
+                frames = ';'.join(part.replace(';', '_') for part in directory.parts)
+                yield f"{frames} {microseconds}"
@@ -0,0 +1,887 @@
+"""sf_search defines the search engine, which does not depend on PyQt5:
+- a class SelectedFile containing a file that was found
+- a class FileSearch that scans the disk and holds the list of selected files
+- a generator iter_files that yields the files as soon as they are found
+"""
+
+import logging
+import os
+import queue
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import modules.sf_constants as const
+from modules.sf_utilities import image_size, image_taken_date
+from modules.sf_extension_categories import EXTENSION_CATEGORY
+from modules.sf_search_statistics import SearchStatistics
+from modules.sf_content_search import ContentFilter
+from modules.sf_duplicates import DuplicateFinder, HashCache
+from modules.sf_concurrent_scan import ConcurrentScan
+from modules.sf_file_type import FileTypeDetector, sniff_file_type
+from modules.sf_top_files import TopFiles
+from modules.sf_fuzzy import FuzzyMatcher
+from modules.sf_logging import timed_span
+from modules.sf_fd_scan import FD_SCAN_SUPPORTED, DirectoryEntry, open_directory
+import modules.sf_spill as sf_spill
+
+# This object sits in the parallel thread that moves files from camera to computer
+class SelectedFile():
+    """File that was found in the search, which can be shown in a PyQt tree view"""
+
+    def __init__(self, identifier, root, entry, stat=None, top_directory=None, parents=None):
+        """Create new standard item with file info
+        The identifier is needed to link a file in the GUI to a file in the list.
+        If a file in the list is directly displayed in the GUI, a multithreading problem occurs
+        The stat result can be passed if it is already known, to prevent a second call to the disk
+        If more than one root is searched, the root is added as top directory to the parents
+        The parents relative to the root can be passed if they are already known"""
+        self.identifier = identifier
+        self.root = root
+        self.entry = entry
+        self.stat = stat
+        self.image_size = None
+        self.content_matches = None
+        self.duplicate_group = None
+        self.detected_type = None
+        self.match_score = None
+        if parents is None:
+            parents = entry.relative_to(root).parts[:-1]
+        self.parents = parents
+        if top_directory is not None:
+            self.parents = (top_directory,) + self.parents
+
+    def file_stat(self):
+        """Result of stat on the file, only requested from the disk once"""
+        if self.stat is None:
+            self.stat = self.entry.stat()
+
+        return self.stat
+
+    def extension(self):
+        """File extension"""
+        return Path(self.entry).suffix[1:]
+    
+    def category(self):
+        """Category of the extension, such as image or archive, or an empty string if it is unknown"""
+        return EXTENSION_CATEGORY.get(self.extension().lower(), '')
+
+    def file_type(self):
+        """Type of the file detected from its first bytes, or an empty string if it is unknown"""
+        if self.detected_type is None:
+            self.detected_type = sniff_file_type(str(self.entry))
+
+        return self.detected_type
+
+    def file_size(self):
+        """File size of the file"""
+        return self.file_stat().st_size
+
+    def created(self):
+        """The date and time the file was created, formatted as string"""
+        return datetime.fromtimestamp(self.file_stat().st_ctime).strftime(const.DATE_FMT)
+
+    def modified(self):
+        """The date and time the file was modified, formatted as string"""
+        return datetime.fromtimestamp(self.file_stat().st_mtime).strftime(const.DATE_FMT)
+
+    def accessed(self):
+        """The date and time the file was last accessed, formatted as string"""
+        return datetime.fromtimestamp(self.file_stat().st_atime).strftime(const.DATE_FMT)
+
+    def directory(self):
+        """Directory in which the file resides"""
+        return str(self.entry.parent)
+
+    def full_path(self):
+        """The full path of the file"""
+        return str(self.entry.resolve() )
+
+    def image_width(self):
+        """The width of the image, if the file is an image, or an empty string if it is not"""
+        if self.image_size is None:
+            self.image_size = image_size(self.entry)
+
+        return self.image_size[0]
+
+    def image_height(self):
+        """The height of the image, if the file is an image, or an empty string if it is not"""
+        if self.image_size is None:
+            self.image_size = image_size(self.entry)
+
+        return self.image_size[1]
+
+    def content_match_count(self):
+        """Number of times the contents matched the content filter, or an empty string"""
+        if self.content_matches is None:
+            return ""
+        return self.content_matches[0]
+
+    def content_first_line(self):
+        """Line number of the first match of the content filter, or an empty string"""
+        if self.content_matches is None:
+            return ""
+        return self.content_matches[1]
+
+    def duplicate_group_number(self):
+        """Number of the group of files with the same contents, or an empty string"""
+        if self.duplicate_group is None:
+            return ""
+        return self.duplicate_group
+
+    def field(self, field):
+        """Returns the field, if the field is specified as a string"""
+        #ToDo: redefine as a directory
+        if field==const.COL_PATH:
+            return self.directory()
+        elif field==const.COL_FILE_NAME:
+            return self.entry.name
+        elif field==const.COL_FILE_EXTENSION:
+            return self.extension()
+        elif field==const.COL_FILE_SIZE:
+            return self.file_size()
+        elif field==const.COL_PATH_AND_NAME:
+            return self.full_path()
+        elif field==const.COL_PATH_DEPTH:
+            return len(self.entry.parents)
+        elif field==const.COL_CREATE_DATE:
+            return self.created()
+        elif field==const.COL_MODIFIED_DATE:
+            return self.modified()
+        elif field==const.COL_ACCESSED_DATE:
+            return self.accessed()
+        elif field==const.COL_IMAGE_TAKEN_DATE:
+            return image_taken_date(self.entry)
+        elif field==const.COL_IMAGE_WIDTH:
+            return self.image_width()
+        elif field==const.COL_IMAGE_HEIGHT:
+            return self.image_height()
+        elif field==const.COL_CONTENT_MATCHES:
+            return self.content_match_count()
+        elif field==const.COL_CONTENT_FIRST_LINE:
+            return self.content_first_line()
+        elif field==const.COL_DUPLICATE_GROUP:
+            return self.duplicate_group_number()
+        elif field==const.COL_FILE_CATEGORY:
+            return self.category()
+        elif field==const.COL_DETECTED_TYPE:
+            return self.file_type()
+        elif field==const.COL_MATCH_SCORE:
+            return "" if self.match_score is None else f"{self.match_score:.3f}"
+        else:
+            return "Invalid field"
+
+def root_directories(root_directory):
+    """Returns the list of directories to search, root_directory is a directory,
+    a list of directories or directories separated by ';'.
+    Directories that are inside another directory in the list are left out"""
+    if not isinstance(root_directory, (list, tuple)):
+        root_directory = [ root_directory ]
+
+    directories = [ Path(directory.strip())
+                    for directories in root_directory
+                    for directory in str(directories).split(const.ROOT_SEPARATOR)
+                    if directory.strip() ]
+
+    result = []
+    for directory in directories:
+        resolved = directory.resolve()
+        if not any(resolved == other.resolve() or other.resolve() in resolved.parents
+                   for other in result):
+            result = [ other for other in result if resolved not in other.resolve().parents ]
+            result.append(directory)
+
+    return result
+
+class FileSearch():
+    """Creates list of files as a result of the search"""
+
+    # Number of seconds between two progress reports
+    progress_interval = 0.1
+
+    # Read directories relative to the file descriptor of their parent, where the system supports it
+    directory_fds = FD_SCAN_SUPPORTED
+
+    def __init__(self):
+        """Initialize the the file selection list object
+        The unique identifier is needed to link a file in the GUI to a file in the list.
+        If a file in the list is directly displayed in the GUI, a multithreading problem occurs"""
+        self.root_directory = ''
+        self.root_directories = []
+        self.root_statistics = []
+        self.filter_extension = ''
+        self.filter_filename = ''
+        self.filename_case_sensitive = False
+        self.content_filter = None
+        self.query = None
+        self.top_mode = const.TOP_ALL
+        self.top_count = const.DEFAULT_TOP_COUNT
+        self.match_limit = 0
+        self.breadth_first = False
+        self.limit_reached = False
+        self.ranked = False
+        self.find_duplicates = False
+        self.duplicate_groups = None
+        self.scan_concurrency = {}
+        self.memory_budget = 0
+        self.spilled_result = None
+        self.scan_profile = None
+        self.unique_identifier = 0
+        self.selected_files = []
+        self.directory_totals = {}
+        self.expected_entries = None
+        self.statistics = SearchStatistics()
+        self.continue_execution = True
+
+    def new_search(self):
+        self.root_directories = root_directories(self.root_directory)
+        self.root_statistics = []
+        self.unique_identifier = 0
+        self.selected_files = []
+        self.duplicate_groups = None
+        self.directory_totals = {}
+        self.limit_reached = False
+        self.ranked = False
+        self.spilled_result = None
+        self.statistics = SearchStatistics(self.expected_entries)
+
+    def select_files(self, root_directory, filter_extension, filter_filename, filename_case_sensitive,
+                     expected_entries=None, content_filter=None, find_duplicates=False,
+                     scan_concurrency=None, query=None, top_mode=const.TOP_ALL,
+                     top_count=const.DEFAULT_TOP_COUNT, match_limit=0, breadth_first=False,
+                     memory_budget=None):
+        """Set search variables
+        root_directory is a directory, a list of directories or directories separated by ';'
+        expected_entries is the number of entries found in the previous search of the same root
+        content_filter is an optional ContentFilter, applied to files that match the other filters
+        If find_duplicates is True, only files that have the same contents as another file are selected
+        scan_concurrency is a dictionary with the number of directories that are read at the same time
+        for a directory and the directories below it, for instance a network mount
+        query is an optional Query, applied to files that match the extension and filename filters
+        top_mode is one of const.TOP_MODES to only keep the top_count largest, newest or oldest files
+        The search stops after match_limit files are found, unless match_limit is 0
+        If breadth_first is True, all directories at one level are searched before the next level,
+        so files close to the root are found first
+        memory_budget is the number of megabytes that the selected files may use, if there are more
+        files they are kept in temporary files on disk, see spilled_result. 0 means no limit"""
+        self.root_directory = root_directory
+        self.filter_extension = filter_extension
+        self.filter_filename = filter_filename
+        self.filename_case_sensitive = filename_case_sensitive
+        self.expected_entries = expected_entries
+        self.content_filter = content_filter
+        self.query = query
+        self.top_mode = top_mode
+        self.top_count = top_count
+        self.match_limit = match_limit
+        self.breadth_first = breadth_first
+        self.find_duplicates = find_duplicates
+        if scan_concurrency is not None:
+            self.scan_concurrency = scan_concurrency
+        if memory_budget is not None:
+            self.memory_budget = memory_budget
+        self.continue_execution = True
+        self.new_search()
+
+    def run(self):
+        """Search the root directory, this can be executed in a separate thread"""
+        logging.info("Starting search")
+        self.new_search()
+
+        if self.top_mode and not self.find_duplicates:
+            self.select_top_files()
+            return
+
+        # Files that do not fit in the memory budget are kept on disk, all duplicates need all files
+        memory_files = 0
+        if self.memory_budget and not self.find_duplicates:
+            memory_files = sf_spill.memory_budget_files(self.memory_budget)
+
+        selection = self.iter_selection()
+        with timed_span('scan') as span:
+            for selected_file in selection:
+                # Add new member to the selected_files list
+                self.selected_files.append(selected_file)
+                self.add_to_directory_totals(selected_file)
+
+                # Stop the scan as soon as enough files are found, all duplicates need all files
+                if self.match_limit and not self.find_duplicates and \
+                        self.statistics.matches >= self.match_limit:
+                    logging.info("Search stopped after %d files", self.statistics.matches)
+                    self.limit_reached = True
+                    break
+
+                if memory_files and len(self.selected_files) >= memory_files:
+                    self.spill_selected_files()
+
+            span.update(entries=self.statistics.entries, files=self.statistics.matches)
+
+        # Closing the selection stops the threads of the other root directories by clearing
+        # continue_execution, but a search that reached the limit is complete, not cancelled
+        if self.limit_reached:
+            selection.close()
+            self.continue_execution = True
+
+        if self.find_duplicates and self.continue_execution:
+            self.select_duplicates()
+
+        # Do not report results of a search that was cancelled
+        if not self.continue_execution:
+            logging.info("Search cancelled")
+            if self.spilled_result is not None:
+                self.spilled_result.remove()
+                self.spilled_result = None
+            return
+
+        with timed_span('sort', files=self.statistics.matches):
+            if self.spilled_result is not None:
+                self.spill_selected_files()
+                self.spilled_result.finish(self)
+            else:
+                self.sort_selected_files()
+
+        self.statistics = self.statistics.snapshot()
+        logging.info("%d files found in %d entries", len(self.selected_files), self.statistics.entries)
+        self.report_finished()
+
+    def spill_selected_files(self):
+        """Move the selected files to a temporary file, when the search is complete the files are
+        merged into a mapped result in spilled_result. The owner of the search removes it"""
+        if self.spilled_result is None:
+            logging.info("More than %d MB of files found, keeping the files on disk", self.memory_budget)
+            self.spilled_result = sf_spill.SpilledResult()
+        self.spilled_result.spill(self.selected_files)
+        self.selected_files = []
+
+    def select_top_files(self):
+        """Only keep the largest, newest or oldest files, in a heap with a fixed size
+        The files are sorted from the best to the worst file instead of on name"""
+        top_files = TopFiles(self.top_mode, self.top_count)
+        with timed_span('scan') as span:
+            for selected_file in self.iter_selection():
+                top_files.add(selected_file)
+            span.update(entries=self.statistics.entries, files=self.statistics.matches)
+
+        # Do not report results of a search that was cancelled
+        if not self.continue_execution:
+            logging.info("Search cancelled")
+            return
+
+        self.selected_files = top_files.best()
+        for selected_file in self.selected_files:
+            self.add_to_directory_totals(selected_file)
+
+        self.statistics = self.statistics.snapshot()
+        logging.info("%d %s files kept of %d matches", len(self.selected_files), self.top_mode,
+                     self.statistics.matches)
+        self.report_finished()
+
+    def select_similar_names(self, text, count):
+        """Only keep the count files of which the name is most similar to the text, best match first
+        The files in memory are used, the disk is not searched again"""
+        matches = FuzzyMatcher(text).best(self.selected_files, count)
+        for score, selected_file in matches:
+            selected_file.match_score = score
+        self.selected_files = [ selected_file for score, selected_file in matches ]
+        self.ranked = True
+
+        self.directory_totals = {}
+        for selected_file in self.selected_files:
+            self.add_to_directory_totals(selected_file)
+
+    def sort_selected_files(self):
+        """Sort files, directories first, then sort on filename"""
+        self.selected_files.sort( key= lambda selected_file:
+            (selected_file.entry.is_dir(), str(selected_file.full_path() ) ) )
+
+    def select_duplicates(self):
+        """Only keep the files that have the same contents as another file"""
+        logging.info("Searching duplicates in %d files", len(self.selected_files))
+        duplicate_finder = DuplicateFinder(HashCache(),
+                                           continue_execution= lambda: self.continue_execution)
+        self.duplicate_groups = duplicate_finder.duplicate_groups(self.selected_files)
+
+        self.selected_files = [ selected_file for group in self.duplicate_groups for selected_file in group ]
+        self.statistics.matches = len(self.selected_files)
+        self.statistics.bytes = sum(selected_file.file_size() for selected_file in self.selected_files)
+
+        self.directory_totals = {}
+        for selected_file in self.selected_files:
+            self.add_to_directory_totals(selected_file)
+
+    def report_progress(self, statistics):
+        """Called at a fixed rate during the search with a snapshot of the statistics
+        Override this member to show the progress"""
+
+    def report_finished(self):
+        """Called when the search is complete
+        Override this member to process the result"""
+
+    def requirement(self, entry):
+        """Filter the files that were found
+        Override this member to make a different selection. The entry is a Path, or with
+        directory_fds a sf_fd_scan.DirectoryEntry that only has name, path, is_dir, is_symlink,
+        stat and __fspath__, so an override should only use these or convert it with Path(entry)"""
+
+        # Do not select directories
+        if entry.is_dir():
+            return False
+
+        # Do not select if extension requirement is not met
+        # ToDo: compare actual extension, instead of endswith
+        # ToDo: ensure filter '' is still selecting all files
+        if self.filter_extension and os.path.splitext(entry.name)[1][1:] != self.filter_extension:
+            #logging.info("Search declined since [%s] is not [%s]", )
+            return False
+
+        # Do not select if filename filter requirement is not met
+        if self.filename_case_sensitive:
+            if not self.filter_filename in entry.name:
+                return False
+        else:
+            if not self.filter_filename.lower() in entry.name.lower():
+                return False
+
+        # Do not select if the name does not match the query, the rest of the query is tested later
+        if self.query is not None and not self.query.accepts_name(entry):
+            return False
+
+        # Select the file
+        return True
+
+    def iter_selection(self):
+        """Generator that scans the disk and yields the relevant files as soon as they are found
+        The contents of the files that match on name are searched while the disk is scanned"""
+        selected_files = self.iter_name_selection()
+        if self.query is not None:
+            selected_files = self.query.iter_matches(selected_files)
+        if self.content_filter is not None:
+            selected_files = self.content_filter.iter_matches(selected_files)
+
+        try:
+            for selected_file in selected_files:
+                self.statistics.matches += 1
+                self.statistics.bytes += selected_file.file_size()
+                yield selected_file
+        finally:
+            # Closing the generators waits for the threads that test the files, which update the caches
+            selected_files.close()
+            if self.query is not None:
+                self.query.save_caches()
+
+    def iter_name_selection(self):
+        """Generator that scans the disk and yields the files that meet the requirement
+        If more than one root directory is searched, the roots are searched concurrently
+        and files that are found more than once are only yielded the first time.
+        The search stops when the caller stops iterating, or when continue_execution is cleared"""
+        if len(self.root_directories) == 1:
+            candidates = self.iter_directory_tree(self.root_directories[0], self.statistics, True)
+        else:
+            candidates = self.iter_directory_trees(self.root_directories)
+
+        # Files that are found in more than one root are identified by device and inode
+        found_files = set()
+
+        for root_directory, entry, stat in candidates:
+            if len(self.root_directories) > 1:
+                if stat.st_ino and (stat.st_dev, stat.st_ino) in found_files:
+                    continue
+                found_files.add( (stat.st_dev, stat.st_ino) )
+                top_directory = str(root_directory)
+            else:
+                top_directory = None
+
+            selected_file = SelectedFile(self.unique_identifier, root_directory, entry, stat,
+                                         top_directory)
+            self.unique_identifier+=1
+            yield selected_file
+
+    def iter_directory_trees(self, root_directories):
+        """Generator that searches several root directories in parallel threads
+        and yields the relevant entries as (root directory, entry, stat) tuples"""
+        candidates = queue.Queue(maxsize=1000)
+        self.root_statistics = [ SearchStatistics() for root_directory in root_directories ]
+
+        def search_root_directory(root_directory, statistics):
+            try:
+                for candidate in self.iter_directory_tree(root_directory, statistics, False):
+                    candidates.put(candidate)
+            finally:
+                # Tell the consumer that this root directory is complete
+                candidates.put(None)
+
+        remaining_roots = len(root_directories)
+        with ThreadPoolExecutor(max_workers=remaining_roots) as executor:
+            for root_directory, statistics in zip(root_directories, self.root_statistics):
+                executor.submit(search_root_directory, root_directory, statistics)
+
+            try:
+                while remaining_roots > 0:
+                    try:
+                        candidate = candidates.get(timeout=self.progress_interval)
+                    except queue.Empty:
+                        candidate = False
+
+                    # Report progress at a fixed rate, also if nothing is found
+                    if self.statistics.report_due(self.progress_interval):
+                        self.report_progress( self.progress_snapshot() )
+
+                    if candidate is None:
+                        remaining_roots -= 1
+                    elif candidate:
+                        yield candidate
+            finally:
+                # If the caller stopped iterating, stop the threads and
+                # empty the queue so the threads are not blocked
+                if remaining_roots > 0:
+                    self.continue_execution = False
+                while remaining_roots > 0:
+                    if candidates.get() is None:
+                        remaining_roots -= 1
+
+        # The statistics of all root directories together
+        for statistics in self.root_statistics:
+            self.statistics.directories += statistics.directories
+            self.statistics.entries += statistics.entries
+        self.root_statistics = []
+
+    def iter_directory_tree(self, root_directory, statistics, report_progress):
+        """Generator that searches one root directory and yields the relevant entries
+        as (root directory, entry, stat) tuples. The directories are searched depth first,
+        unless more than one directory is read at the same time for this root, or the directories
+        are profiled, in which case each directory is read at once with read_directory"""
+        concurrency = self.concurrency(root_directory)
+        if concurrency > 1:
+            yield from self.iter_directory_tree_concurrently(root_directory, statistics,
+                                                             report_progress, concurrency)
+            return
+
+        if self.breadth_first or self.scan_profile is not None:
+            yield from self.iter_directory_tree_breadth_first(root_directory, statistics, report_progress)
+            return
+
+        if self.directory_fds:
+            yield from self.iter_directory_tree_with_fds(root_directory, statistics, report_progress)
+            return
+
+        # Stack with the directories that are being searched and their remaining entries
+        statistics.directories += 1
+        directory_stack = [ (root_directory, root_directory.iterdir()) ]
+
+        while directory_stack:
+
+            # Allow the user to interrupt the search
+            if not self.continue_execution:
+                return
+
+            path, entries = directory_stack[-1]
+            try:
+                entry = next(entries)
+            except StopIteration:
+                directory_stack.pop()
+                continue
+            except OSError:
+                logging.info("Error looping through %s", str(path))
+                directory_stack.pop()
+                continue
+
+            # Report progress at a fixed rate, independent of the number of matches
+            statistics.entries += 1
+            if report_progress and statistics.report_due(self.progress_interval):
+                self.report_progress( self.progress_snapshot() )
+
+            try:
+                if self.requirement(entry):
+                    yield (root_directory, entry, entry.stat())
+
+                if entry.is_dir() and not self.symlink_loop(entry):
+                    # Search the subdirectory before the remaining entries of this directory
+                    statistics.directories += 1
+                    directory_stack.append( (entry, entry.iterdir()) )
+            except OSError:
+                logging.info("Error reading %s", str(entry))
+
+    def iter_directory_tree_with_fds(self, root_directory, statistics, report_progress):
+        """Generator that searches one root directory depth first like iter_directory_tree,
+        but opens each directory relative to the file descriptor of its parent. The requirement
+        is tested on a DirectoryEntry, a Path is only created for the entries that are yielded"""
+        statistics.directories += 1
+        try:
+            directory_stack = [ (str(root_directory),) + open_directory(root_directory) ]
+        except OSError:
+            logging.info("Error looping through %s", str(root_directory))
+            return
+
+        # Stack with the path, file descriptor and remaining entries of the directories being searched
+        try:
+            while directory_stack:
+
+                # Allow the user to interrupt the search
+                if not self.continue_execution:
+                    return
+
+                path, fd, entries = directory_stack[-1]
+                try:
+                    dir_entry = next(entries)
+                except (StopIteration, OSError) as error:
+                    if isinstance(error, OSError):
+                        logging.info("Error looping through %s", path)
+                    entries.close()
+                    os.close(fd)
+                    directory_stack.pop()
+                    continue
+
+                # Report progress at a fixed rate, independent of the number of matches
+                statistics.entries += 1
+                if report_progress and statistics.report_due(self.progress_interval):
+                    self.report_progress( self.progress_snapshot() )
+
+                entry = DirectoryEntry(path, dir_entry)
+                try:
+                    if self.requirement(entry):
+                        yield (root_directory, Path(entry.path), entry.stat())
+
+                    if entry.is_dir() and not (entry.is_symlink() and self.symlink_loop(Path(entry.path))):
+                        # Search the subdirectory before the remaining entries of this directory
+                        statistics.directories += 1
+                        directory_stack.append( (entry.path,) + open_directory(entry.name, fd) )
+                except OSError:
+                    logging.info("Error reading %s", entry.path)
+        finally:
+            # The caller stopped iterating or the search was interrupted
+            for path, fd, entries in directory_stack:
+                entries.close()
+                os.close(fd)
+
+    def iter_directory_tree_breadth_first(self, root_directory, statistics, report_progress):
+        """Generator that searches one root directory level by level
+        and yields the relevant entries as (root directory, entry, stat) tuples"""
+        statistics.directories += 1
+        directories = deque([ root_directory ])
+
+        while directories:
+
+            # Allow the user to interrupt the search
+            if not self.continue_execution:
+                return
+
+            entry_count, subdirectories, candidates = self.read_directory(directories.popleft())
+            statistics.entries += entry_count
+            statistics.directories += len(subdirectories)
+            if report_progress and statistics.report_due(self.progress_interval):
+                self.report_progress( self.progress_snapshot() )
+
+            for entry, stat in candidates:
+                yield (root_directory, entry, stat)
+
+            # The subdirectories are searched after the other directories at this level
+            directories.extend(subdirectories)
+
+    def iter_directory_tree_concurrently(self, root_directory, statistics, report_progress, concurrency):
+        """Generator that searches one root directory with several directories read at the same time
+        and yields the relevant entries as (root directory, entry, stat) tuples"""
+        logging.info("Searching %s with %d directories at the same time", str(root_directory), concurrency)
+
+        def progress():
+            if report_progress and statistics.report_due(self.progress_interval):
+                self.report_progress( self.progress_snapshot() )
+
+        def read_directory(directory):
+            entry_count, subdirectories, candidates = self.read_directory(directory)
+            return (entry_count, subdirectories,
+                    [ (root_directory, entry, stat) for entry, stat in candidates ])
+
+        concurrent_scan = ConcurrentScan(read_directory, concurrency,
+                                         continue_execution= lambda: self.continue_execution)
+        yield from concurrent_scan.iter_results(root_directory, statistics, progress, self.progress_interval)
+
+    def read_directory(self, directory):
+        """Reads one directory and returns a tuple (number of entries, list of subdirectories,
+        list of (entry, stat) tuples of the entries that meet the requirement)
+        This can be called for several directories at the same time in different threads
+        If the search has a scan_profile, the time to read the directory is recorded"""
+        start_time = time.perf_counter()
+        entry_count = 0
+        error_count = 0
+        subdirectories = []
+        candidates = []
+
+        try:
+            entries = list(directory.iterdir())
+        except OSError:
+            logging.info("Error looping through %s", str(directory))
+            entries = []
+            error_count += 1
+
+        for entry in entries:
+            entry_count += 1
+            try:
+                if self.requirement(entry):
+                    candidates.append( (entry, entry.stat()) )
+
+                if entry.is_dir() and not self.symlink_loop(entry):
+                    subdirectories.append(entry)
+            except OSError:
+                logging.info("Error reading %s", str(entry))
+                error_count += 1
+
+        if self.scan_profile is not None:
+            self.scan_profile.record(directory, time.perf_counter() - start_time, entry_count, error_count)
+        return (entry_count, subdirectories, candidates)
+
+    def concurrency(self, root_directory):
+        """Number of directories that are read at the same time for this root directory
+        The setting for the longest matching directory in scan_concurrency is used,
+        so different mounts can be tuned separately"""
+        concurrency = const.DEFAULT_SCAN_CONCURRENCY
+        matching_length = -1
+        root = os.path.normcase(str(Path(root_directory)))
+
+        for directory, directory_concurrency in self.scan_concurrency.items():
+            directory = os.path.normcase(str(Path(directory)))
+            if (root == directory or root.startswith(directory.rstrip(os.sep) + os.sep)) \
+                    and len(directory) > matching_length:
+                concurrency = directory_concurrency
+                matching_length = len(directory)
+
+        return concurrency
+
+    def progress_snapshot(self):
+        """Returns a snapshot of the statistics of the search, including all root directories"""
+        snapshot = self.statistics.snapshot()
+        for statistics in self.root_statistics:
+            snapshot.directories += statistics.directories
+            snapshot.entries += statistics.entries
+        return snapshot
+
+    def symlink_loop(self, entry):
+        """Returns True if the entry is a symbolic link to one of the directories above it,
+        following such a link would make the search endless"""
+        if not entry.is_symlink():
+            return False
+
+        target = entry.resolve()
+        parent = entry.parent.resolve()
+        return target == parent or target in parent.parents
+
+    def add_to_directory_totals(self, selected_file):
+        """Add the file to the number of files and total size of each directory above it
+        The directories are identified by the tuple of their parts relative to the root,
+        the root directory itself is identified by an empty tuple"""
+        file_size = selected_file.file_size()
+        parents = selected_file.parents
+
+        for depth in range(len(parents)+1):
+            totals = self.directory_totals.setdefault(parents[:depth], [0, 0])
+            totals[0] += 1
+            totals[1] += file_size
+
+    def directory_path(self, parents):
+        """Returns the path of the directory identified by its parents"""
+        if len(self.root_directories) == 1:
+            return str(Path(self.root_directories[0], *parents))
+
+        # With more than one root directory, the first parent is the root directory
+        if not parents:
+            return const.ROOT_SEPARATOR.join(str(root) for root in self.root_directories)
+        return str(Path(*parents))
+
+    def directory_field(self, parents, field):
+        """Returns a field of the directory report for the directory identified by its parents"""
+        if field==const.COL_DIRECTORY:
+            return self.directory_path(parents)
+        elif field==const.COL_DIR_FILE_COUNT:
+            return self.directory_totals[parents][0]
+        elif field==const.COL_DIR_TOTAL_SIZE:
+            return self.directory_totals[parents][1]
+        else:
+            return "Invalid field"
+
+    def directory_report_lines(self):
+        """Generates the lines of a tab separated report with the number of files and
+        total size per directory, largest directories first"""
+        if self.spilled_result is not None:
+            yield from self.spilled_report_lines(lambda mapped_result: mapped_result.directory_report_lines())
+            return
+
+        directories = sorted(self.directory_totals.keys(), key= lambda parents:
+                             (-self.directory_totals[parents][1], parents) )
+
+        yield '\t'.join(const.DIRECTORY_REPORT_COLUMNS)
+
+        for parents in directories:
+            yield '\t'.join([str(self.directory_field(parents, column)) \
+                              for column in const.DIRECTORY_REPORT_COLUMNS])
+
+    def report_lines(self, report_columns):
+        """Generates the lines of a tab separated report with only the selected columns"""
+        if self.spilled_result is not None:
+            yield from self.spilled_report_lines(lambda mapped_result: mapped_result.report_lines(report_columns))
+            return
+
+        selected_columns = [text for text, checked in report_columns if checked]
+
+        if self.duplicate_groups is not None:
+            # Report the files per group of duplicates
+            if const.COL_DUPLICATE_GROUP not in selected_columns:
+                selected_columns.insert(0, const.COL_DUPLICATE_GROUP)
+            self.selected_files.sort( key= lambda selected_file:
+                            ( selected_file.duplicate_group, str(selected_file.entry) ) )
+        elif self.top_mode or self.ranked:
+            # The largest, newest or oldest files and similar names are already sorted, best file first
+            pass
+        else:
+            # Sort in different order, shorter paths first
+            self.selected_files.sort( key= lambda selected_file:
+                            ( str(selected_file.entry.resolve() ), str(selected_file.entry.name.lower() ) ) )
+
+        # Detect the types of all files at once, in parallel and with the cache
+        if const.COL_DETECTED_TYPE in selected_columns:
+            FileTypeDetector().detect_file_types(self.selected_files)
+
+        yield '\t'.join(selected_columns)
+
+        for selected_file in self.selected_files:
+            yield '\t'.join([str(selected_file.field(column)) \
+                              for column in selected_columns])
+
+    def spilled_report_lines(self, report_lines):
+        """Generates the lines of a report of the files that are kept on disk,
+        report_lines is called with the opened mapped result"""
+        mapped_result = self.spilled_result.open()
+        try:
+            yield from report_lines(mapped_result)
+        finally:
+            mapped_result.close()
+
+def iter_files(root, filters=None, columns=None):
+    """Generator that yields the files below root as soon as they are found
+    filters is a dictionary with the optional keys 'extension', 'filename', 'case_sensitive',
+    'contains' and 'regular_expression'
+    columns is an optional list of report columns, such as const.COL_FILE_SIZE.
+    Without columns, SelectedFile objects are yielded, otherwise a dictionary with the value
+    of each column. The files are not kept in memory and the search stops as soon as
+    the caller stops iterating"""
+    if filters is None:
+        filters = {}
+
+    content_filter = None
+    if filters.get('contains'):
+        content_filter = ContentFilter(filters['contains'],
+                                       filters.get('regular_expression', False),
+                                       filters.get('case_sensitive', False))
+
+    file_search = FileSearch()
+    file_search.select_files(root,
+                             filters.get('extension', ''),
+                             filters.get('filename', ''),
+                             filters.get('case_sensitive', False),
+                             content_filter=content_filter)
+
+    for selected_file in file_search.iter_selection():
+        if columns is None:
+            yield selected_file
+        else:
+            yield { column: selected_file.field(column) for column in columns }
@@ -1,14 +1,14 @@
 """This module defines a dialog box class that reports progress of the search"""
 
 import logging
-from PyQt5 import QtCore, QtWidgets
+from PyQt5 import QtWidgets
 from modules.sf_file_selection import FileSelection
-from modules.sf_utilities import app_icon
+from modules.sf_utilities import app_icon, format_size
 
 class SearchProgress(QtWidgets.QDialog):
     """Dialog box that reports progress of the search and closes when the search is complete"""
 
-    def __init__(self, parent=None, search_assignment = None ):
+    def __init__(self, parent=None, search_assignment = None, search_service = None ):
         super().__init__(parent)
         self.setModal(True)
 
@@ -27,6 +27,16 @@ class SearchProgress(QtWidgets.QDialog):
         self.new_search.filter_filename = search_assignment.filter_filename
         self.new_search.filter_extension = search_assignment.filter_extension
         self.new_search.filename_case_sensitive = search_assignment.filename_case_sensitive
+        self.new_search.expected_entries = search_assignment.expected_entries
+        self.new_search.content_filter = search_assignment.content_filter
+        self.new_search.query = search_assignment.query
+        self.new_search.top_mode = search_assignment.top_mode
+        self.new_search.top_count = search_assignment.top_count
+        self.new_search.match_limit = search_assignment.match_limit
+        self.new_search.breadth_first = search_assignment.breadth_first
+        self.new_search.find_duplicates = search_assignment.find_duplicates
+        self.new_search.scan_concurrency = search_assignment.scan_concurrency
+        self.new_search.memory_budget = search_assignment.memory_budget
 
         # Create a vertical layout with status
         main_layout = QtWidgets.QVBoxLayout()
@@ -37,6 +47,18 @@ class SearchProgress(QtWidgets.QDialog):
             main_layout.addWidget(QtWidgets.QLabel(text=f"Extension {self.new_search.filter_extension}"))
         if self.new_search.filter_filename:
             main_layout.addWidget(QtWidgets.QLabel(text=f"Filename containing {self.new_search.filter_filename}"))
+        if self.new_search.content_filter is not None:
+            main_layout.addWidget(QtWidgets.QLabel(text=f"File containing {self.new_search.content_filter.text}"))
+        if self.new_search.query is not None:
+            main_layout.addWidget(QtWidgets.QLabel(text=f"Query {self.new_search.query.text}"))
+        if self.new_search.top_mode:
+            main_layout.addWidget(QtWidgets.QLabel(
+                text=f"Only the {self.new_search.top_count} {self.new_search.top_mode} files"))
+        if self.new_search.match_limit:
+            main_layout.addWidget(QtWidgets.QLabel(
+                text=f"Stop after {self.new_search.match_limit} files"))
+        if self.new_search.find_duplicates:
+            main_layout.addWidget(QtWidgets.QLabel(text="Only files with duplicates"))
 
         self.progress_label = QtWidgets.QLabel(text="0 files found")
         main_layout.addWidget(self.progress_label)
@@ -58,47 +80,69 @@ class SearchProgress(QtWidgets.QDialog):
         self.setFixedWidth(self.sizeHint().width())
         self.setFixedHeight(self.sizeHint().height())
 
-        logging.info("Dialog initialized, creating thread")
+        logging.info("Dialog initialized, starting search")
 
-        # Create a second thread and tie searching for files to that thread
-        self.search_files_thread = QtCore.QThread(parent=self)
-
-        self.new_search.moveToThread(self.search_files_thread)
-        self.search_files_thread.started.connect(self.new_search.run)
-        self.new_search.finished.connect(self.search_files_thread.quit)
-        self.search_files_thread.finished.connect(self.search_files_thread.deleteLater)
+        # The search is executed in the worker thread of the search service,
+        # signals from that thread are queued to this dialog
         self.new_search.finished.connect(self.thread_is_finished)
         self.new_search.progress.connect(self.report_progress)
-        self.search_files_thread.start()
+        self.search_service = search_service
+        search_service.search(self.new_search)
 
-        logging.info("Thread should be started")
+        logging.info("Search should be started")
 
     def thread_is_finished(self):
         """Thread has finished searching"""
         logging.info("Search completed")
-        file_count = len(self.new_search.selected_files)
-        self.progress_label.setText(f"Search completed. {file_count} files found")
-        self.progress_label.repaint()
+        file_count = self.new_search.statistics.matches
+        if self.new_search.limit_reached:
+            self.progress_label.setText(f"Search stopped. {file_count} files found")
+        else:
+            self.progress_label.setText(f"Search completed. {file_count} files found")
         super().accept()
 
-    def report_progress(self, number_of_files):
-        """Thread reports how many files have been found so far"""
-        self.progress_label.setText(f"{number_of_files} files found")
-        self.progress_label.repaint()
+    def report_progress(self, statistics):
+        """Thread reports a snapshot of the search statistics at a fixed rate"""
+        text = (f"{statistics.matches} files found ({format_size(statistics.bytes)})\n"
+                f"{statistics.directories} directories and {statistics.entries} entries visited\n"
+                f"{statistics.entries_per_second():.0f} entries per second")
+
+        remaining_time = statistics.remaining_time()
+        if remaining_time is not None:
+            text += f"\nAbout {remaining_time:.0f} seconds remaining"
+
+        self.progress_label.setText(text)
 
     def result(self):
         """Returning the result from the thread"""
         return self.new_search.selected_files
 
+    def statistics(self):
+        """Returning the statistics of the completed search from the thread"""
+        return self.new_search.statistics
+
+    def limit_reached(self):
+        """Returns True if the search stopped because enough files were found"""
+        return self.new_search.limit_reached
+
+    def spilled_result(self):
+        """Returns the files that did not fit in memory from the thread, or None"""
+        return self.new_search.spilled_result
+
+    def duplicate_groups(self):
+        """Returning the groups of files with the same contents from the thread"""
+        return self.new_search.duplicate_groups
+
+    def directory_totals(self):
+        """Returning the number of files and total size per directory from the thread"""
+        return self.new_search.directory_totals
+
     def reject(self):
         """Search is interrupted by the user"""
         logging.info("Search is interrupted by the user")
 
-        # Stop the thread
-        self.new_search.continue_execution = False
-        #self.search_files_thread.exit()
-
-        # Clear the result list
-        self.new_search.selected_files = []
+        # Stop the search, or skip it if the worker thread did not start it yet.
+        # The result is not cleared here, the search may still be adding files in its thread
+        self.search_service.cancel(timeout=0)
 
         super().reject()
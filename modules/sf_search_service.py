@@ -0,0 +1,122 @@
+"""sf_search_service defines a class SearchService that executes searches
+in a worker thread which lives as long as the application.
+Only one search is executed at the same time, a new search is queued behind the
+previous search, so two searches never access the disk simultaneously and the GUI
+thread does not wait until a search that is reading a slow disk has stopped"""
+
+import logging
+import threading
+import time
+from PyQt5 import QtCore
+
+from modules.sf_profile import thread_profile
+
+class SearchWorker(QtCore.QObject):
+    """Executes searches in the thread of the search service, one at a time"""
+
+    def __init__(self):
+        super().__init__(None)
+
+        # Set when no search is executing or queued
+        self.idle = threading.Event()
+        self.idle.set()
+        self.queued_searches = 0
+        self.lock = threading.Lock()
+
+        # The last search that was queued, searches that were queued before it are skipped
+        self.current_search = None
+
+    def queue_search(self, file_selection):
+        """Called in the thread of the caller, before the search is sent to the worker thread"""
+        with self.lock:
+            # The search is not reset when it starts, so a cancel that arrives before then is kept
+            file_selection.continue_execution = True
+            self.queued_searches += 1
+            self.current_search = file_selection
+            self.idle.clear()
+
+    def cancel_search(self):
+        """Stop the current search, or skip it if it did not start yet"""
+        with self.lock:
+            if self.current_search is not None:
+                self.current_search.continue_execution = False
+            self.current_search = None
+
+    def run(self, file_selection):
+        """Execute the search in the worker thread, unless it was cancelled or
+        another search was queued after it"""
+        try:
+            with self.lock:
+                start_search = file_selection is self.current_search
+            if start_search:
+                with thread_profile():
+                    file_selection.run()
+            else:
+                logging.info("Search skipped, it was cancelled before it started")
+        finally:
+            with self.lock:
+                if file_selection is self.current_search:
+                    self.current_search = None
+                self.queued_searches -= 1
+                if self.queued_searches == 0:
+                    self.idle.set()
+
+
+class SearchService(QtCore.QObject):
+    """Long lived worker thread that is reused for each search"""
+
+    start_search = QtCore.pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.worker = SearchWorker()
+        self.worker_thread = QtCore.QThread()
+        self.worker.moveToThread(self.worker_thread)
+
+        # Since the worker lives in another thread, the search is queued to that thread
+        self.start_search.connect(self.worker.run)
+        self.worker_thread.start()
+
+    @property
+    def current_search(self):
+        """The search that is executing or queued, None if there is no such search"""
+        return self.worker.current_search
+
+    def search(self, file_selection):
+        """Stop the previous search and queue the new search behind it in the worker thread,
+        without waiting in this thread until the previous search has stopped"""
+        self.cancel(timeout=0)
+
+        self.worker.queue_search(file_selection)
+        self.start_search.emit(file_selection)
+
+    def cancel(self, timeout=None):
+        """Stop the current search and wait at most timeout seconds until the worker is idle,
+        or until it is idle if timeout is None. Use a timeout of 0 in the GUI thread, so it
+        does not wait for a search that is reading a slow disk
+        Returns the number of seconds it waited"""
+        start_time = time.monotonic()
+
+        self.worker.cancel_search()
+
+        stopped = self.worker.idle.wait(timeout)
+        elapsed_time = time.monotonic() - start_time
+        if stopped:
+            logging.info("Previous search stopped in %.3f s", elapsed_time)
+        else:
+            logging.info("Search did not stop within %s s, the next search is queued behind it", timeout)
+        return elapsed_time
+
+    def shutdown(self):
+        """Stop the current search and the worker thread
+        Returns the number of seconds it took to stop the thread"""
+        start_time = time.monotonic()
+
+        self.cancel()
+        self.worker_thread.quit()
+        self.worker_thread.wait()
+
+        elapsed_time = time.monotonic() - start_time
+        logging.info("Search service stopped in %.3f s", elapsed_time)
+        return elapsed_time
@@ -0,0 +1,55 @@
+"""sf_search_statistics defines a class SearchStatistics that keeps track of
+the progress of a search, such as the number of directories and files visited"""
+
+import time
+
+class SearchStatistics():
+    """Counters describing the progress of a search"""
+
+    def __init__(self, expected_entries=None):
+        """Start counting
+        expected_entries is the number of entries seen in a previous search of the same root,
+        which is used to estimate the remaining time"""
+        self.start_time = time.monotonic()
+        self.last_report = self.start_time
+        self.expected_entries = expected_entries
+        self.directories = 0
+        self.entries = 0
+        self.matches = 0
+        self.bytes = 0
+        self.elapsed_time = 0.0
+
+    def report_due(self, interval):
+        """Returns True once every interval seconds"""
+        now = time.monotonic()
+        if now - self.last_report < interval:
+            return False
+
+        self.last_report = now
+        return True
+
+    def snapshot(self):
+        """Returns a copy of the counters, that can safely be passed to another thread"""
+        snapshot = SearchStatistics(self.expected_entries)
+        snapshot.start_time = self.start_time
+        snapshot.directories = self.directories
+        snapshot.entries = self.entries
+        snapshot.matches = self.matches
+        snapshot.bytes = self.bytes
+        snapshot.elapsed_time = time.monotonic() - self.start_time
+        return snapshot
+
+    def entries_per_second(self):
+        """Number of files and directories visited per second"""
+        if self.elapsed_time <= 0:
+            return 0.0
+        return self.entries / self.elapsed_time
+
+    def remaining_time(self):
+        """Estimated number of seconds until the search is complete,
+        or None if there is no previous search of the same root"""
+        if not self.expected_entries or self.entries == 0:
+            return None
+
+        remaining_entries = max(self.expected_entries - self.entries, 0)
+        return remaining_entries / self.entries_per_second()
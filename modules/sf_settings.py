@@ -18,10 +18,33 @@ class Settings():
         self.filter_filename = ''
         self.filename_case_sensitive = False
         self.recent_filename_filters = []
+        self.filter_content = ''
+        self.content_regular_expression = False
+        self.recent_content_filters = []
+        self.find_duplicates = False
+        self.filter_query = ''
+        self.recent_queries = []
+        self.top_mode = const.TOP_ALL
+        self.top_count = const.DEFAULT_TOP_COUNT
+        self.match_limit = 0
+        self.breadth_first = False
+        self.watch_interval = const.DEFAULT_WATCH_INTERVAL
+
+        # Number of megabytes the files found may use, more files are kept on disk, 0 for no limit
+        self.memory_budget = const.DEFAULT_MEMORY_BUDGET
+
+        # Level of the log file, one of const.LOG_LEVELS
+        self.log_level = const.DEFAULT_LOG_LEVEL
+
+        # Number of directories read at the same time per directory, for instance for network mounts
+        self.scan_concurrency = {}
 
         # Name of the column, followed by a boolean which tells whether it is shown
         self.report_columns = const.DEFAULT_COLUMNS
 
+        # Number of entries seen in the last search of each recent directory, used to estimate progress
+        self.scan_entry_counts = {}
+
         # Overrule default values with values from disk
         self.load()
 
@@ -36,6 +59,10 @@ class Settings():
         if len(self.recent_directories)>10:
             self.recent_directories = self.recent_directories[:10]
 
+        # Only remember the size of recent directories
+        self.scan_entry_counts = { directory_name: entries for directory_name, entries
+            in self.scan_entry_counts.items() if directory_name in self.recent_directories }
+
         # Maintain the list of recent extensions
         if self.filter_extension not in self.recent_extensions:
             self.recent_extensions.insert(0, self.filter_extension)
@@ -54,6 +81,20 @@ class Settings():
         if len(self.recent_filename_filters)>10:
             self.recent_filename_filters = self.recent_filename_filters[:10]
 
+        # Maintain the list of recent content filters
+        if self.filter_content not in self.recent_content_filters:
+            self.recent_content_filters.insert(0, self.filter_content)
+
+        if len(self.recent_content_filters)>10:
+            self.recent_content_filters = self.recent_content_filters[:10]
+
+        # Maintain the list of recent queries
+        if self.filter_query not in self.recent_queries:
+            self.recent_queries.insert(0, self.filter_query)
+
+        if len(self.recent_queries)>10:
+            self.recent_queries = self.recent_queries[:10]
+
     def load(self):
         logging.info(f'load_settings called for {str(self.settings_file)}')
         settings_dict = {}
@@ -88,6 +129,51 @@ class Settings():
         if const.SETTINGS_REPORT_COLUMNS in settings_dict.keys():
             self.report_columns = settings_dict[const.SETTINGS_REPORT_COLUMNS]
 
+        if const.SETTINGS_FILTER_CONTENT in settings_dict.keys():
+            self.filter_content = settings_dict[const.SETTINGS_FILTER_CONTENT]
+
+        if const.SETTINGS_CONTENT_REGEX in settings_dict.keys():
+            self.content_regular_expression = settings_dict[const.SETTINGS_CONTENT_REGEX]
+
+        if const.SETTINGS_RECENT_CONTENTS in settings_dict.keys():
+            self.recent_content_filters = settings_dict[const.SETTINGS_RECENT_CONTENTS]
+
+        if const.SETTINGS_FIND_DUPLICATES in settings_dict.keys():
+            self.find_duplicates = settings_dict[const.SETTINGS_FIND_DUPLICATES]
+
+        if const.SETTINGS_FILTER_QUERY in settings_dict.keys():
+            self.filter_query = settings_dict[const.SETTINGS_FILTER_QUERY]
+
+        if const.SETTINGS_RECENT_QUERIES in settings_dict.keys():
+            self.recent_queries = settings_dict[const.SETTINGS_RECENT_QUERIES]
+
+        if const.SETTINGS_TOP_MODE in settings_dict.keys():
+            self.top_mode = settings_dict[const.SETTINGS_TOP_MODE]
+
+        if const.SETTINGS_TOP_COUNT in settings_dict.keys():
+            self.top_count = settings_dict[const.SETTINGS_TOP_COUNT]
+
+        if const.SETTINGS_MATCH_LIMIT in settings_dict.keys():
+            self.match_limit = settings_dict[const.SETTINGS_MATCH_LIMIT]
+
+        if const.SETTINGS_BREADTH_FIRST in settings_dict.keys():
+            self.breadth_first = settings_dict[const.SETTINGS_BREADTH_FIRST]
+
+        if const.SETTINGS_WATCH_INTERVAL in settings_dict.keys():
+            self.watch_interval = settings_dict[const.SETTINGS_WATCH_INTERVAL]
+
+        if const.SETTINGS_MEMORY_BUDGET in settings_dict.keys():
+            self.memory_budget = settings_dict[const.SETTINGS_MEMORY_BUDGET]
+
+        if const.SETTINGS_LOG_LEVEL in settings_dict.keys():
+            self.log_level = settings_dict[const.SETTINGS_LOG_LEVEL]
+
+        if const.SETTINGS_SCAN_CONCURRENCY in settings_dict.keys():
+            self.scan_concurrency = settings_dict[const.SETTINGS_SCAN_CONCURRENCY]
+
+        if const.SETTINGS_SCAN_ENTRY_COUNTS in settings_dict.keys():
+            self.scan_entry_counts = settings_dict[const.SETTINGS_SCAN_ENTRY_COUNTS]
+
         self.cleanup()
 
 
@@ -106,6 +192,21 @@ class Settings():
         settings_dict[const.SETTINGS_FILENAME_CASE_SENSITIVE] = self.filename_case_sensitive
         settings_dict[const.SETTINGS_RECENT_FILENAMES]        = self.recent_filename_filters
         settings_dict[const.SETTINGS_REPORT_COLUMNS]          = self.report_columns
+        settings_dict[const.SETTINGS_FILTER_CONTENT]          = self.filter_content
+        settings_dict[const.SETTINGS_CONTENT_REGEX]           = self.content_regular_expression
+        settings_dict[const.SETTINGS_RECENT_CONTENTS]         = self.recent_content_filters
+        settings_dict[const.SETTINGS_FIND_DUPLICATES]         = self.find_duplicates
+        settings_dict[const.SETTINGS_FILTER_QUERY]            = self.filter_query
+        settings_dict[const.SETTINGS_RECENT_QUERIES]          = self.recent_queries
+        settings_dict[const.SETTINGS_TOP_MODE]                = self.top_mode
+        settings_dict[const.SETTINGS_TOP_COUNT]               = self.top_count
+        settings_dict[const.SETTINGS_MATCH_LIMIT]             = self.match_limit
+        settings_dict[const.SETTINGS_BREADTH_FIRST]           = self.breadth_first
+        settings_dict[const.SETTINGS_WATCH_INTERVAL]          = self.watch_interval
+        settings_dict[const.SETTINGS_MEMORY_BUDGET]           = self.memory_budget
+        settings_dict[const.SETTINGS_LOG_LEVEL]               = self.log_level
+        settings_dict[const.SETTINGS_SCAN_CONCURRENCY]        = self.scan_concurrency
+        settings_dict[const.SETTINGS_SCAN_ENTRY_COUNTS]       = self.scan_entry_counts
 
         json_settings_object = json.dumps(settings_dict, indent=4)
         with open(self.settings_file, "w") as outfile:
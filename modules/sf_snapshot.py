@@ -0,0 +1,224 @@
+"""sf_snapshot saves the result of a search to a compact binary file, and loads it again.
+The file starts with an identifier and a header with the search settings in json,
+followed by a compressed block with a fixed size record per file and the paths.
+The paths are relative to their root directory and front coded: each path only stores
+the part that differs from the previous path, since sorted paths share long prefixes.
+Since version 2 the files are sorted on the parts of their path, so two snapshots
+can be compared while they are read, see iter_snapshot_files"""
+
+import json
+import os
+import struct
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+import modules.sf_constants as const
+from modules.sf_search import SelectedFile
+from modules.sf_search_statistics import SearchStatistics
+
+SNAPSHOT_IDENTIFIER = b'SFSNAP\x00\x01'
+SNAPSHOT_VERSION = 2
+
+# Length of the header in bytes
+HEADER_LENGTH = struct.Struct('<I')
+
+# Per file: length of the prefix shared with the previous path, length of the rest of the path,
+# root number, size, modified, created and accessed time in ns, device, inode, mode,
+# number of content matches, first matching line and duplicate group
+RECORD = struct.Struct('<IIHQqqqQQIIII')
+
+# Number of bytes that are decompressed at once when a snapshot is read as a stream
+STREAM_BLOCK_SIZE = 1024 * 1024
+
+def is_snapshot_file(file_name):
+    """Returns True if the file name refers to an existing snapshot"""
+    return str(file_name).lower().endswith(const.SNAPSHOT_EXTENSION) and Path(file_name).is_file()
+
+def save_snapshot(file_search, file_name):
+    """Save the search settings and selected files of the search to a snapshot file"""
+    root_numbers = { str(root): number for number, root in enumerate(file_search.root_directories) }
+
+    records = bytearray()
+    paths = bytearray()
+    previous_path = b''
+
+    # Sort on the parts of the path, the root directory first if more than one root was searched
+    for selected_file in sorted(file_search.selected_files, key= lambda selected_file:
+                                selected_file.parents + (selected_file.entry.name,) ):
+        path = os.fsencode(str(selected_file.entry.relative_to(selected_file.root)))
+        prefix_length = len(os.path.commonprefix([previous_path, path]))
+        previous_path = path
+
+        stat = selected_file.file_stat()
+        content_count, first_line = selected_file.content_matches or (0, 0)
+        records += RECORD.pack(prefix_length, len(path) - prefix_length,
+                               root_numbers[str(selected_file.root)],
+                               stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns, stat.st_atime_ns,
+                               stat.st_dev & 0xFFFFFFFFFFFFFFFF, stat.st_ino & 0xFFFFFFFFFFFFFFFF,
+                               stat.st_mode, content_count, first_line or 0,
+                               selected_file.duplicate_group or 0)
+        paths += path[prefix_length:]
+
+    header = {
+        'version': SNAPSHOT_VERSION,
+        'created': datetime.now().strftime(const.DATE_FMT),
+        'root_directories': [ str(root) for root in file_search.root_directories ],
+        'filter_extension': file_search.filter_extension,
+        'filter_filename': file_search.filter_filename,
+        'filename_case_sensitive': file_search.filename_case_sensitive,
+        'filter_content': file_search.content_filter.text if file_search.content_filter else '',
+        'find_duplicates': file_search.duplicate_groups is not None,
+        'entries': file_search.statistics.entries,
+        'count': len(file_search.selected_files) }
+    header_bytes = json.dumps(header).encode('utf-8')
+
+    with open(file_name, 'wb') as outfile:
+        outfile.write(SNAPSHOT_IDENTIFIER)
+        outfile.write(HEADER_LENGTH.pack(len(header_bytes)))
+        outfile.write(header_bytes)
+        outfile.write(zlib.compress(bytes(records) + bytes(paths), 1))
+
+def read_snapshot_header(openfile, file_name):
+    """Reads the identifier and the header with the search settings from an open snapshot file"""
+    if openfile.read(len(SNAPSHOT_IDENTIFIER)) != SNAPSHOT_IDENTIFIER:
+        raise ValueError(f"{file_name} is not a snapshot file")
+
+    header_length, = HEADER_LENGTH.unpack(openfile.read(HEADER_LENGTH.size))
+    return json.loads(openfile.read(header_length).decode('utf-8'))
+
+def load_snapshot(file_search, file_name):
+    """Replace the search settings and selected files of the search by the contents of a snapshot file"""
+    with open(file_name, 'rb') as openfile:
+        header = read_snapshot_header(openfile, file_name)
+        body = zlib.decompress(openfile.read())
+
+    file_search.root_directory = const.ROOT_SEPARATOR.join(header['root_directories'])
+    file_search.filter_extension = header['filter_extension']
+    file_search.filter_filename = header['filter_filename']
+    file_search.filename_case_sensitive = header['filename_case_sensitive']
+    file_search.content_filter = None
+    file_search.find_duplicates = header['find_duplicates']
+    file_search.new_search()
+
+    roots = [ Path(root) for root in header['root_directories'] ]
+    records_length = header['count'] * RECORD.size
+    paths = body[records_length:]
+    path_position = 0
+    previous_path = b''
+    duplicate_groups = {}
+
+    # Files in the same directory share the Path object and parents of the directory
+    directories = {}
+
+    for identifier, (prefix_length, suffix_length, root_number, size, mtime, ctime, atime,
+                     device, inode, mode, content_count, first_line, duplicate_group) \
+            in enumerate(RECORD.iter_unpack(body[:records_length])):
+
+        path = previous_path[:prefix_length] + paths[path_position:path_position+suffix_length]
+        path_position += suffix_length
+        previous_path = path
+
+        root = roots[root_number]
+        directory_name, _, file_name = os.fsdecode(path).rpartition(os.sep)
+        if (root_number, directory_name) not in directories:
+            directory = Path(root, directory_name)
+            directories[ (root_number, directory_name) ] = (directory, directory.relative_to(root).parts)
+        directory, parents = directories[ (root_number, directory_name) ]
+
+        stat = os.stat_result((mode, inode, device, 1, 0, 0, size, atime // 10**9, mtime // 10**9, ctime // 10**9),
+                              { 'st_atime': atime / 1e9, 'st_mtime': mtime / 1e9, 'st_ctime': ctime / 1e9,
+                                'st_atime_ns': atime, 'st_mtime_ns': mtime, 'st_ctime_ns': ctime })
+        selected_file = SelectedFile(identifier, root, directory / file_name, stat,
+                                     str(root) if len(roots) > 1 else None, parents)
+
+        if content_count > 0:
+            selected_file.content_matches = (content_count, first_line)
+        if duplicate_group > 0:
+            selected_file.duplicate_group = duplicate_group
+            duplicate_groups.setdefault(duplicate_group, []).append(selected_file)
+
+        file_search.selected_files.append(selected_file)
+        file_search.add_to_directory_totals(selected_file)
+
+    file_search.unique_identifier = len(file_search.selected_files)
+    if file_search.find_duplicates:
+        file_search.duplicate_groups = [ duplicate_groups[group] for group in sorted(duplicate_groups) ]
+
+    file_search.statistics = SearchStatistics()
+    file_search.statistics.entries = header['entries']
+    file_search.statistics.matches = len(file_search.selected_files)
+    file_search.statistics.bytes = sum(selected_file.file_size() for selected_file in file_search.selected_files)
+    return header
+
+def iter_decompressed(file_name, skip=0):
+    """Generates the decompressed records and paths of a snapshot in parts of at most
+    STREAM_BLOCK_SIZE bytes, without the first skip bytes"""
+    decompressor = zlib.decompressobj()
+    with open(file_name, 'rb') as openfile:
+        read_snapshot_header(openfile, file_name)
+        while not decompressor.eof:
+            compressed = decompressor.unconsumed_tail or openfile.read(STREAM_BLOCK_SIZE)
+            if not compressed:
+                raise ValueError(f"{file_name} is damaged")
+
+            data = decompressor.decompress(compressed, STREAM_BLOCK_SIZE)
+            if skip >= len(data):
+                skip -= len(data)
+            else:
+                yield data[skip:]
+                skip = 0
+
+def iter_records(parts, count):
+    """Generates the first count records from the decompressed parts of a snapshot"""
+    buffer = b''
+    for part in parts:
+        buffer += part
+        complete = min(len(buffer) // RECORD.size, count)
+        yield from RECORD.iter_unpack(buffer[:complete*RECORD.size])
+        buffer = buffer[complete*RECORD.size:]
+        count -= complete
+        if count == 0:
+            return
+
+def iter_snapshot_files(file_name):
+    """Generates (parts of the path, size, modified time, inode) of each file in the snapshot,
+    sorted on the parts of the path, without loading the snapshot in memory.
+    With more than one root directory, the root directory is the first part of the path.
+    The files of version 1 snapshots are not sorted, so these are sorted in memory"""
+    with open(file_name, 'rb') as openfile:
+        header = read_snapshot_header(openfile, file_name)
+
+    if header['version'] < 2:
+        yield from sorted(iter_snapshot_records(file_name, header))
+    else:
+        yield from iter_snapshot_records(file_name, header)
+
+def iter_snapshot_records(file_name, header):
+    """Generates the files of the snapshot in the order in which they were saved
+    The records and the paths are read by two separate streams over the same file"""
+    roots = header['root_directories']
+    records = iter_records(iter_decompressed(file_name), header['count'])
+    path_parts = iter_decompressed(file_name, skip=header['count'] * RECORD.size)
+    paths = b''
+    position = 0
+    previous_path = b''
+
+    for (prefix_length, suffix_length, root_number, size, mtime, ctime, atime,
+         device, inode, mode, content_count, first_line, duplicate_group) in records:
+
+        while len(paths) - position < suffix_length:
+            part = next(path_parts, None)
+            if part is None:
+                raise ValueError(f"{file_name} is damaged")
+            paths = paths[position:] + part
+            position = 0
+
+        path = previous_path[:prefix_length] + paths[position:position+suffix_length]
+        position += suffix_length
+        previous_path = path
+
+        parts = tuple(os.fsdecode(path).split(os.sep))
+        if len(roots) > 1:
+            parts = (roots[root_number],) + parts
+        yield (parts, size, mtime, inode)
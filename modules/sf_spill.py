@@ -0,0 +1,108 @@
+"""sf_spill keeps the selected files of very large searches on disk instead of in memory.
+When the selected files exceed the memory budget of the search, they are sorted and written
+to a temporary run file, and the search continues with an empty list. At the end of the search
+the runs are merged into a temporary mapped result, which the tree view and the reports read
+like a saved result. Only the number of files and total size per directory stay in memory"""
+
+import heapq
+import logging
+import os
+import shutil
+import struct
+import tempfile
+from pathlib import Path
+
+import modules.sf_constants as const
+import modules.sf_mapped_result as sf_mapped_result
+
+# Estimated number of bytes of memory used by a selected file, including its path and stat result
+SELECTED_FILE_MEMORY = 1200
+
+# Size, modified, created and accessed time, inode and number of parts of the path
+RUN_RECORD = struct.Struct('<QqqqQH')
+
+# Length of each part of the path
+PART_LENGTH = struct.Struct('<H')
+
+# Number of bytes read or written at once in a run file
+RUN_BUFFER_SIZE = 1024 * 1024
+
+def memory_budget_files(memory_budget):
+    """Number of selected files that fit in a memory budget in megabytes"""
+    return max(1, memory_budget * 1024 * 1024 // SELECTED_FILE_MEMORY)
+
+class SpilledResult():
+    """Selected files of a search that are stored in temporary files"""
+
+    def __init__(self):
+        self.directory = Path(tempfile.mkdtemp(prefix='searchfiles_'))
+        self.run_files = []
+        self.file_count = 0
+        self.mapped_result_file = None
+
+    def spill(self, selected_files):
+        """Sort the files in the order of a mapped result and write them to a new run file"""
+        selected_files = sorted(selected_files, key= lambda selected_file:
+                                sf_mapped_result.mapped_order(selected_file.parents, selected_file.entry.name))
+
+        run_file = self.directory / f"run{len(self.run_files)}.bin"
+        with open(run_file, 'wb', buffering=RUN_BUFFER_SIZE) as outfile:
+            for selected_file in selected_files:
+                stat = selected_file.file_stat()
+                parts = selected_file.parents + (selected_file.entry.name,)
+                outfile.write(RUN_RECORD.pack(stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns, stat.st_atime_ns,
+                                              stat.st_ino & 0xFFFFFFFFFFFFFFFF, len(parts)))
+                for part in parts:
+                    part = os.fsencode(part)
+                    outfile.write(PART_LENGTH.pack(len(part)))
+                    outfile.write(part)
+
+        self.run_files.append(run_file)
+        self.file_count += len(selected_files)
+        logging.info("%d files written to %s, %d files on disk", len(selected_files), run_file, self.file_count)
+
+    @staticmethod
+    def iter_run(run_file):
+        """Generates (parents, name, size, modified, created, accessed, inode) of the files in a run"""
+        with open(run_file, 'rb', buffering=RUN_BUFFER_SIZE) as openfile:
+            while True:
+                record = openfile.read(RUN_RECORD.size)
+                if not record:
+                    return
+                size, modified, created, accessed, inode, part_count = RUN_RECORD.unpack(record)
+
+                parts = []
+                for _ in range(part_count):
+                    length, = PART_LENGTH.unpack(openfile.read(PART_LENGTH.size))
+                    parts.append(os.fsdecode(openfile.read(length)))
+                yield (tuple(parts[:-1]), parts[-1], size, modified, created, accessed, inode)
+
+    def iter_sorted_files(self):
+        """Generates the files of all runs in the order of a mapped result, only one file of each run
+        is in memory at the same time"""
+        return heapq.merge(*[ self.iter_run(run_file) for run_file in self.run_files ],
+                           key= lambda spilled_file: sf_mapped_result.mapped_order(*spilled_file[:2]))
+
+    def finish(self, file_search):
+        """Merge the runs into a temporary mapped result and remove the runs
+        The directories and totals of the search are used, since the files are not in memory"""
+        self.mapped_result_file = self.directory / ('result' + const.MAPPED_RESULT_EXTENSION)
+        sf_mapped_result.write_mapped_result(self.mapped_result_file, self.iter_sorted_files(),
+                                             file_search.directory_totals.keys(), file_search.directory_totals,
+                                             sf_mapped_result.mapped_result_header(file_search))
+        for run_file in self.run_files:
+            run_file.unlink()
+        self.run_files = []
+        logging.info("%d files merged into %s", self.file_count, self.mapped_result_file)
+
+    def open(self):
+        """Open the merged result as MappedResult"""
+        return sf_mapped_result.open_mapped_result(self.mapped_result_file)
+
+    def save(self, file_name):
+        """Copy the merged result to a mapped result file"""
+        shutil.copyfile(self.mapped_result_file, file_name)
+
+    def remove(self):
+        """Remove the temporary files, the merged result must not be open"""
+        shutil.rmtree(self.directory, ignore_errors=True)
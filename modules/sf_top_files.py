@@ -0,0 +1,37 @@
+"""sf_top_files defines a class TopFiles that keeps the largest, newest or oldest files
+of a search in a bounded heap, so memory does not grow with the number of matches"""
+
+import heapq
+
+import modules.sf_constants as const
+
+# Value of a file that is maximized for each mode
+TOP_KEYS = {
+    const.TOP_LARGEST: lambda stat: stat.st_size,
+    const.TOP_NEWEST:  lambda stat: stat.st_mtime_ns,
+    const.TOP_OLDEST:  lambda stat: -stat.st_mtime_ns }
+
+class TopFiles():
+    """Keeps the count best files for the mode, the worst of them on top of a min-heap"""
+
+    def __init__(self, mode, count):
+        if mode not in TOP_KEYS:
+            raise ValueError(f"Unknown mode {mode}, choose from: {', '.join(TOP_KEYS)}")
+        self.mode = mode
+        self.count = count
+        self.key = TOP_KEYS[mode]
+        self.heap = []
+
+    def add(self, selected_file):
+        """Add the file if it is better than the worst file kept so far
+        Of files with the same value, the file that was found first is kept"""
+        item = (self.key(selected_file.file_stat()), -selected_file.identifier, selected_file)
+        if len(self.heap) < self.count:
+            heapq.heappush(self.heap, item)
+        elif item[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, item)
+
+    def best(self):
+        """The files that were kept, the best file first"""
+        return [ selected_file for key, identifier, selected_file in
+                 sorted(self.heap, key= lambda item: item[:2], reverse=True) ]
@@ -1,9 +1,10 @@
 """Some generic utility functions used in other modules"""
 
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from PyQt5 import QtGui
 import PIL.Image
 import exifread
 
@@ -15,9 +16,23 @@ def app_dir(file):
 
 def app_icon(file):
     """"Return an icon in the .app dir"""
+    # PyQt5 is imported here, so the search engine can be used without the GUI
+    from PyQt5 import QtGui
+
     icon_file = str(Path( Path(__file__).parent.parent, '.icons', file ))
     return QtGui.QIcon( icon_file )
 
+def format_size(size):
+    """Return a file size in bytes as a human readable string"""
+    for unit in ['B', 'kB', 'MB', 'GB', 'TB']:
+        if size < 1024 or unit == 'TB':
+            break
+        size /= 1024
+
+    if unit == 'B':
+        return f"{size} {unit}"
+    return f"{size:.1f} {unit}"
+
 def image_taken_date(file):
     """Attempts to retrieve original date and time from a photo
     input: string or result of pathlib
@@ -51,13 +66,12 @@ def image_size(file):
     """Return the size (width,height) of the image in pixels"""
 
     # First try PIL since it is most likely installed on the computer
-    logging.info("image_size called for %s", file)
     try:
         img = PIL.Image.open(file)
         return img.size
     except Exception as error:
         #ToDo: catch specific exception in order not to catch system exit exception
-        logging.info('PIL error %s', error)
+        logging.debug('PIL error %s for %s', error, file)
 
     # The use exifread since PIL may not work on ARW files
     try:
@@ -69,3 +83,26 @@ def image_size(file):
     except:
         #ToDo: catch specific exception in order not to catch system exit exception
         return ("","")
+
+def iter_in_threads(items, function, max_pending):
+    """Generator that calls the function for each item in a pool of threads and yields
+    (item, result) tuples in the order the items were received. At most max_pending items
+    are waiting, so the items can be generated while the results are consumed"""
+    pending = deque()
+    with ThreadPoolExecutor() as executor:
+        try:
+            for item in items:
+                pending.append( (item, executor.submit(function, item)) )
+
+                # Yield the items that are done, wait if too many items are pending
+                while pending and (pending[0][1].done() or len(pending) >= max_pending):
+                    item, future = pending.popleft()
+                    yield (item, future.result())
+
+            while pending:
+                item, future = pending.popleft()
+                yield (item, future.result())
+        finally:
+            # If the caller stopped iterating, do not process the remaining items
+            for item, future in pending:
+                future.cancel()
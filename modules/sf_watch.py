@@ -0,0 +1,155 @@
+"""sf_watch runs a search again at a fixed interval and reports only the files that were
+added, removed or modified since the previous run, for instance to monitor a drop folder.
+The search is incremental: a directory is only listed again if its modification time changed,
+otherwise the entries that met the requirement the previous time are reused, and only these
+are checked with stat. The load on a file server is one stat per directory and per match on name.
+A content filter, or a query on contents or EXIF data, reads these files again in each run"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+
+import modules.sf_constants as const
+from modules.sf_search import FileSearch
+
+# Directories that were modified less than this number of nanoseconds before they were listed
+# are listed again, since a file can be added within the resolution of the modification time
+RECENT_CHANGE_NS = 2 * 10**9
+
+class IncrementalSearch(FileSearch):
+    """Search that remembers the entries of each directory, so directories that did not change
+    are not listed again in the next run"""
+
+    def __init__(self):
+        super().__init__()
+
+        # Per directory: modification time, number of entries, subdirectories and the
+        # entries that meet the requirement
+        self.directory_cache = {}
+        self.visited_directories = set()
+        self.listed_directories = 0
+
+    def new_search(self):
+        super().new_search()
+        # Only the breadth first and concurrent scans read the directories with read_directory
+        self.breadth_first = True
+        self.visited_directories = set()
+        self.listed_directories = 0
+
+    def run(self):
+        super().run()
+
+        # Forget the directories that were removed, unless the search was interrupted
+        if self.continue_execution:
+            self.directory_cache = { directory: cached for directory, cached in self.directory_cache.items()
+                                     if directory in self.visited_directories }
+            logging.info("%d of %d directories listed", self.listed_directories, len(self.visited_directories))
+
+    def read_directory(self, directory):
+        """Reads the directory like FileSearch.read_directory, or returns the entries
+        of the previous run if the directory did not change"""
+        try:
+            modified = directory.stat().st_mtime_ns
+        except OSError:
+            return super().read_directory(directory)
+
+        self.visited_directories.add(directory)
+        cached = self.directory_cache.get(directory)
+        if cached is None or cached[0] != modified:
+            self.listed_directories += 1
+            entry_count, subdirectories, candidates = super().read_directory(directory)
+            if time.time_ns() - modified < RECENT_CHANGE_NS:
+                modified = None
+            self.directory_cache[directory] = (modified, entry_count, subdirectories,
+                                               [ entry for entry, stat in candidates ])
+            return (entry_count, subdirectories, candidates)
+
+        modified, entry_count, subdirectories, entries = cached
+        candidates = []
+        for entry in entries:
+            try:
+                candidates.append( (entry, entry.stat()) )
+            except OSError:
+                logging.info("Error reading %s", str(entry))
+
+        return (entry_count, subdirectories, candidates)
+
+class SearchWatcher():
+    """Runs an incremental search again and again, and reports the changes of the selected files"""
+
+    def __init__(self, file_search=None, interval=const.DEFAULT_WATCH_INTERVAL):
+        """file_search is an IncrementalSearch with the search settings, interval is
+        the number of seconds between the end of a search and the start of the next search"""
+        self.file_search = file_search
+        self.interval = interval
+        self.selected_files = None
+        self.stopped = threading.Event()
+
+    @property
+    def continue_execution(self):
+        """Clearing continue_execution stops the search that is running, like FileSearch"""
+        return self.file_search.continue_execution
+
+    @continue_execution.setter
+    def continue_execution(self, value):
+        self.file_search.continue_execution = value
+
+    def check(self):
+        """Search again and return the changes since the previous search as a list of
+        (change, SelectedFile) tuples sorted on path. The first search only remembers the files"""
+        self.file_search.run()
+        if not self.file_search.continue_execution:
+            return []
+
+        selected_files = { str(selected_file.entry): selected_file
+                           for selected_file in self.file_search.selected_files }
+        previous_files = self.selected_files
+        self.selected_files = selected_files
+        if previous_files is None:
+            logging.info("Watching %d files", len(selected_files))
+            return []
+
+        changes = []
+        for path, selected_file in selected_files.items():
+            previous_file = previous_files.get(path)
+            if previous_file is None:
+                changes.append( (const.CHANGE_ADDED, selected_file) )
+            elif previous_file.file_size() != selected_file.file_size() or \
+                 previous_file.file_stat().st_mtime_ns != selected_file.file_stat().st_mtime_ns:
+                changes.append( (const.CHANGE_MODIFIED, selected_file) )
+        for path, previous_file in previous_files.items():
+            if path not in selected_files:
+                changes.append( (const.CHANGE_REMOVED, previous_file) )
+
+        changes.sort( key= lambda change: str(change[1].entry) )
+        for change, selected_file in changes:
+            logging.info("%s: %s", change, str(selected_file.entry))
+        return changes
+
+    def watch(self, report_changes, checks=None):
+        """Search every interval seconds until stop is called, or until the number of checks is done
+        report_changes is called with the list of changes of each search that found changes"""
+        self.stopped.clear()
+        self.continue_execution = True
+        count = 0
+        while not self.stopped.is_set():
+            changes = self.check()
+            if changes:
+                report_changes(changes)
+
+            count += 1
+            if checks is not None and count >= checks:
+                break
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        """Stop watching, also if a search is running"""
+        self.stopped.set()
+        self.continue_execution = False
+
+def change_lines(changes):
+    """Generates a tab separated line with the time, the change, the path and the size of each change"""
+    now = datetime.now().strftime(const.DATE_FMT)
+    for change, selected_file in changes:
+        yield '\t'.join([now, change, str(selected_file.entry), str(selected_file.file_size())])
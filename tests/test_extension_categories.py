@@ -0,0 +1,30 @@
+"""Tests of the generated extension categories, run from the main directory: python -m pytest tests"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.sf_extension_categories import CATEGORIES, EXTENSION_CATEGORY
+
+class TestExtensionCategories(unittest.TestCase):
+
+    def test_common_extensions(self):
+        expected = {
+            'xml': 'data', 'json': 'data', 'yml': 'data', 'yaml': 'data',
+            'dng': 'image', 'jpg': 'image', 'png': 'image',
+            'srt': 'video', 'ass': 'video', 'mp4': 'video',
+            'py': 'code', 'pyw': 'code', 'xaml': 'code',
+            'mp3': 'audio', 'zip': 'archive', 'pdf': 'document', 'ps': 'document',
+            'bin': 'other', 'dat': 'other' }
+        for extension, category in expected.items():
+            with self.subTest(extension=extension):
+                self.assertEqual(EXTENSION_CATEGORY.get(extension), category)
+
+    def test_each_extension_in_one_category(self):
+        extension_count = sum(len(extensions) for extensions in CATEGORIES.values())
+        self.assertEqual(extension_count, len(EXTENSION_CATEGORY))
+
+if __name__ == '__main__':
+    unittest.main()
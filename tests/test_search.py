@@ -0,0 +1,66 @@
+"""Tests of FileSearch, run from the main directory: python -m pytest tests"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.sf_search import FileSearch
+
+class FinishedSearch(FileSearch):
+    """Search that remembers whether the end of the search was reported"""
+
+    def __init__(self):
+        super().__init__()
+        self.finished = False
+
+    def report_finished(self):
+        self.finished = True
+
+class TestMatchLimit(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.roots = []
+        for root_name in ['first', 'second']:
+            root = Path(self.directory.name, root_name)
+            Path(root, 'subdirectory').mkdir(parents=True)
+            for file_number in range(5):
+                Path(root, 'subdirectory', f"{root_name}_{file_number}.txt").write_text(root_name)
+            self.roots.append(str(root))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def search(self, root_directory, match_limit):
+        file_search = FinishedSearch()
+        file_search.select_files(root_directory, '', '', False, match_limit=match_limit)
+        file_search.run()
+        return file_search
+
+    def test_limit_with_one_root(self):
+        file_search = self.search(self.roots[0], 2)
+        self.assertTrue(file_search.limit_reached)
+        self.assertTrue(file_search.finished)
+        self.assertEqual(len(file_search.selected_files), 2)
+
+    def test_limit_with_more_roots(self):
+        # Stopping the threads of the other roots must not cancel the search
+        file_search = self.search(';'.join(self.roots), 2)
+        self.assertTrue(file_search.limit_reached)
+        self.assertTrue(file_search.continue_execution)
+        self.assertTrue(file_search.finished)
+        self.assertEqual(len(file_search.selected_files), 2)
+        names = [ selected_file.entry.name for selected_file in file_search.selected_files ]
+        self.assertEqual(names, sorted(names))
+
+    def test_more_roots_without_limit(self):
+        file_search = self.search(';'.join(self.roots), 0)
+        self.assertFalse(file_search.limit_reached)
+        self.assertTrue(file_search.finished)
+        self.assertEqual(len(file_search.selected_files), 10)
+
+if __name__ == '__main__':
+    unittest.main()